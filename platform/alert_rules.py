@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+import os
+
+import yaml
+from aws_cdk.core import Environment
+
+from apps.abstract.base_app import BaseApp
+from cdk_stacks.environment.vpc.eks.eks_resources.prometheus_operator.alert_rules import PlatformAlertRules
+
+platform_account_env = Environment(
+    account=os.getenv("AWS_ACCOUNT_ID", "360064003702"),
+    region=os.getenv("AWS_DEFAULT_REGION", "eu-west-1"),
+)
+
+users_account_env = Environment(
+    account=os.getenv("AWS_BASTION_ACCOUNT_ID", platform_account_env.account),
+    region=os.getenv("AWS_DEFAULT_REGION", platform_account_env.region),
+)
+
+# Writes the platform alerting rules in the Prometheus rule file format, to be checked with `promtool`
+app = BaseApp(platform_account_env=platform_account_env, users_account_env=users_account_env)
+rules_path = os.path.join(os.path.dirname(__file__), '..', 'monitoring', 'rules')
+os.makedirs(rules_path, exist_ok=True)
+with open(os.path.join(rules_path, 'platform.rules.yaml'), mode="w") as f:
+    yaml.safe_dump(
+        {"groups": PlatformAlertRules.groups(app.environment_config.get('eks', {}).get('monitoring', {}).get('alerts', {}))},
+        f,
+        sort_keys=False,
+    )
@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+import os
+
+from aws_cdk.core import Environment
+
+from apps.ami_builder import AmiBuilder
+
+platform_account_env = Environment(
+    account=os.getenv("AWS_ACCOUNT_ID", "360064003702"),
+    region=os.getenv("AWS_DEFAULT_REGION", "eu-west-1"),
+)
+
+users_account_env = Environment(
+    account=os.getenv("AWS_BASTION_ACCOUNT_ID", platform_account_env.account),
+    region=os.getenv("AWS_DEFAULT_REGION", platform_account_env.region),
+)
+
+app = AmiBuilder(platform_account_env=platform_account_env, users_account_env=users_account_env)
+for file_path in app.write_build_definitions(os.path.join(os.path.dirname(__file__), '..', 'ami')):
+    print(file_path)
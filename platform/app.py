@@ -4,6 +4,9 @@ import os
 from aws_cdk.core import Environment
 
 from apps.platform import Platform
+from cdk_stacks.synth_profiler import SynthProfiler
+
+profiler = SynthProfiler.from_env()
 
 platform_account_env = Environment(
     account=os.getenv("AWS_ACCOUNT_ID", "360064003702"),
@@ -15,5 +18,8 @@ users_account_env = Environment(
     region=os.getenv("AWS_DEFAULT_REGION", platform_account_env.region),
 )
 
-app = Platform(platform_account_env=platform_account_env, users_account_env=users_account_env)
-app.synth()
+with profiler.span('Platform'):
+    app = Platform(platform_account_env=platform_account_env, users_account_env=users_account_env)
+with profiler.span('synth'):
+    app.synth()
+profiler.write()
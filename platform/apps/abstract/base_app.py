@@ -1,5 +1,7 @@
+import copy
 import os
 import typing
+from contextlib import contextmanager
 
 import yaml
 from aws_cdk.core import App, Environment
@@ -9,6 +11,7 @@ from deepmerge import Merger
 class BaseApp(App):
     ENV_BRANCH_PREFIX = 'env-'
     environment_name: str = None
+    target_name: typing.Optional[str] = None
 
     _config_path = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'config')
     _default_config_path = os.path.join(os.path.dirname(__file__), '..', 'default_config')
@@ -18,8 +21,6 @@ class BaseApp(App):
                  context: typing.Optional[typing.Mapping[str, str]] = None, outdir: typing.Optional[str] = None,
                  runtime_info: typing.Optional[bool] = None, stack_traces: typing.Optional[bool] = None,
                  tree_metadata: typing.Optional[bool] = None) -> None:
-        super().__init__(auto_synth=auto_synth, context=context, outdir=outdir, runtime_info=runtime_info,
-                         stack_traces=stack_traces, tree_metadata=tree_metadata)
         self.environment_config = {}
 
         self.stacks = {}
@@ -29,6 +30,20 @@ class BaseApp(App):
         self._parse_default_config()
         self._parse_custom_config_files()
 
+        # Context can't be set anymore once the app has children (e.g. the tree metadata), hence it's built first
+        super().__init__(auto_synth=auto_synth, context=self._app_context(context), outdir=outdir,
+                         runtime_info=runtime_info, stack_traces=stack_traces, tree_metadata=tree_metadata)
+
+    def _app_context(self, context: typing.Optional[typing.Mapping[str, str]]) -> typing.Mapping[str, object]:
+        """
+        Context the app gets created with, the configuration is already parsed.
+        Context given by the CDK CLI takes precedence.
+
+        :param context: The app `context` argument
+        :return:
+        """
+        return dict(context or {})
+
     def _set_environment(self, branch: str) -> None:
         """
         Calculates environment name from branch name
@@ -77,5 +92,28 @@ class BaseApp(App):
             ["override"]
         )
 
+    @contextmanager
+    def use_target(self, target: dict):
+        """
+        Stacks created in the block belong to the target: they get its account and region, its name in the stacks
+        and resources names, and its configuration overrides merged on the environment configuration
+
+        :param target: An item of the `targets` configuration
+        :return:
+        """
+        previous = self.target_name, self.platform_account_env, self.environment_config
+        self.target_name = target.get('name')
+        self.platform_account_env = Environment(
+            account=target.get('account') or self.platform_account_env.account,
+            region=target.get('region') or self.platform_account_env.region,
+        )
+        self.environment_config = copy.deepcopy(self.environment_config)
+        self._config_merger().merge(self.environment_config, target.get('config') or {})
+        try:
+            yield
+        finally:
+            self.target_name, self.platform_account_env, self.environment_config = previous
+
     def prefixed_str(self, value: str) -> str:
-        return f"{self.environment_name}-{self.environment_config.get('projectName')}-{value}"
+        target = f"{self.target_name}-" if self.target_name else ''
+        return f"{self.environment_name}-{self.environment_config.get('projectName')}-{target}{value}"
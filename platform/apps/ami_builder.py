@@ -0,0 +1,120 @@
+import json
+import os
+import typing
+
+from aws_cdk.core import Environment
+
+from apps.abstract.base_app import BaseApp
+from cdk_stacks.environment.vpc.eks.image_cache import ImageCache
+from cdk_stacks.environment.vpc.eks.node_tweaks import NodeTweaks
+
+
+class AmiBuilder(BaseApp):
+    """
+    Generates the Packer build definitions of the worker nodes AMIs for the fleets with `bakedAmi` enabled.
+    The AMIs are built on top of the EKS optimized AMI and have the node tweaks and the pre-pulled images baked in.
+
+    https://www.packer.io/docs/builders/amazon/ebs
+    """
+    EKS_AMI_OWNER = '602401143452'
+
+    def __init__(self, *, platform_account_env: Environment, users_account_env: Environment,
+                 auto_synth: typing.Optional[bool] = None,
+                 context: typing.Optional[typing.Mapping[str, str]] = None, outdir: typing.Optional[str] = None,
+                 runtime_info: typing.Optional[bool] = None, stack_traces: typing.Optional[bool] = None,
+                 tree_metadata: typing.Optional[bool] = None) -> None:
+        super().__init__(platform_account_env=platform_account_env, users_account_env=users_account_env,
+                         auto_synth=auto_synth, context=context, outdir=outdir, runtime_info=runtime_info,
+                         stack_traces=stack_traces, tree_metadata=tree_metadata)
+
+        self.image_cache = ImageCache(
+            self.environment_config.get('eks', {}).get('imageCache', {}),
+            prefix=self.prefixed_str('cache'),
+            account=self.platform_account_env.account,
+            region=self.platform_account_env.region,
+        )
+
+    def write_build_definitions(self, output_path: str) -> typing.List[str]:
+        """
+        Writes a Packer template for each fleet with `bakedAmi` enabled
+
+        :param output_path: Directory where the templates get written
+        :return: The written files
+        """
+        os.makedirs(output_path, exist_ok=True)
+
+        written_files = []
+        for fleet in self.environment_config.get('eks', {}).get('workerNodesFleets', []):
+            if not fleet.get('bakedAmi', {}).get('enabled'):
+                continue
+
+            file_path = os.path.join(output_path, f"{fleet.get('name')}.packer.json")
+            with open(file_path, mode="w") as f:
+                json.dump(self.build_definition(fleet), f, indent=2)
+            written_files.append(file_path)
+
+        return written_files
+
+    def build_definition(self, fleet: dict) -> dict:
+        """
+        Packer template for a fleet AMI
+
+        :param fleet: The `workerNodesFleets` entry
+        :return:
+        """
+        kubernetes_version = self.environment_config.get('eks', {}).get('kubernetesVersion')
+        ami_build_config = self.environment_config.get('eks', {}).get('amiBuild', {})
+
+        builder = {
+            "type": "amazon-ebs",
+            "region": self.platform_account_env.region,
+            "instance_type": fleet.get('instanceType'),
+            "source_ami_filter": {
+                "filters": {
+                    "name": f"amazon-eks-node-{kubernetes_version}-v*",
+                    "virtualization-type": "hvm",
+                    "root-device-type": "ebs",
+                },
+                "owners": [self.EKS_AMI_OWNER],
+                "most_recent": True,
+            },
+            "ssh_username": "ec2-user",
+            "ami_name": f"{self.prefixed_str(fleet.get('name'))}-{{{{timestamp}}}}",
+            "tags": {
+                "app-name": f'{self.environment_config.get("projectName")}-project',
+                "app-environment": self.environment_name,
+                "fleet-name": fleet.get('name'),
+                "kubernetes-version": kubernetes_version,
+            },
+        }
+        if ami_build_config.get('iamInstanceProfile'):
+            # Needed to pull images from the pull-through cache
+            builder["iam_instance_profile"] = ami_build_config.get('iamInstanceProfile')
+        if ami_build_config.get('subnetId'):
+            builder["subnet_id"] = ami_build_config.get('subnetId')
+
+        return {
+            "builders": [builder],
+            "provisioners": [
+                {
+                    "type": "shell",
+                    "execute_command": "sudo -S bash -c '{{ .Vars }} {{ .Path }}'",
+                    "inline": [
+                        *NodeTweaks.sysctl_commands(),
+                        "systemctl start docker",
+                        *NodeTweaks.pre_pull_commands(
+                            [self.image_cache.repository(image) for image in self.image_cache.pre_pulled_images],
+                            ecr_registry=self.image_cache.ecr_registry,
+                            region=self.platform_account_env.region,
+                            background=False,
+                        ),
+                    ],
+                },
+            ],
+            "post-processors": [
+                {
+                    "type": "manifest",
+                    "output": f"ami/{fleet.get('name')}-manifest.json",
+                },
+            ],
+        }
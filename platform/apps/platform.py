@@ -1,12 +1,16 @@
+import os
 import typing
 
 from aws_cdk.core import Environment
 
 from apps.abstract.base_app import BaseApp
 from cdk_stacks.environment.vpc import VPCStack
+from cdk_stacks.environment.vpc.lookup_context import LookupContext
 
 
 class Platform(BaseApp):
+    _lookup_context_path = os.path.join(os.path.dirname(__file__), '..', '..', 'cdk.context.json')
+
     def __init__(self, *, platform_account_env: Environment, users_account_env: Environment,
                  auto_synth: typing.Optional[bool] = None,
                  context: typing.Optional[typing.Mapping[str, str]] = None, outdir: typing.Optional[str] = None,
@@ -18,8 +22,54 @@ class Platform(BaseApp):
 
         self.generate_platform_stacks()
 
+    def _app_context(self, context: typing.Optional[typing.Mapping[str, str]]) -> typing.Mapping[str, object]:
+        return {**self.lookup_context(), **(context or {})}
+
+    def lookup_context(self) -> typing.Dict[str, object]:
+        """
+        Serves the synth-time lookups from the version-controlled `cdk.context.json` (as the CDK CLI does), or from
+        the stand-in provider when `CDK_LOOKUP_PROVIDER=stand-in`, for every target.
+
+        :return:
+        """
+        lookup_context = LookupContext.load(self._lookup_context_path)
+        if os.getenv('CDK_LOOKUP_PROVIDER') == LookupContext.STAND_IN_PROVIDER:
+            self.validate_targets()
+            lookup_context.update(self._stand_in_context())
+            for target in self.environment_config.get('targets') or []:
+                with self.use_target(target):
+                    lookup_context.update(self._stand_in_context())
+
+        return lookup_context
+
+    def _stand_in_context(self) -> typing.Dict[str, object]:
+        return LookupContext(self.platform_account_env.account, self.platform_account_env.region) \
+            .stand_in(self.environment_config)
+
     def generate_platform_stacks(self):
+        self.validate_targets()
         VPCStack(
             self,
             'VPC',
         )
+
+        # Every target gets its own VPC, EKS and route53 stacks, from the same resolved configuration
+        for target in self.environment_config.get('targets') or []:
+            with self.use_target(target):
+                VPCStack(
+                    self,
+                    'VPC',
+                )
+
+    def validate_targets(self) -> None:
+        """
+        Targets names end up in the stacks and resources names, hence they must be set and unique
+
+        :return:
+        """
+        names = [target.get('name') for target in self.environment_config.get('targets') or []]
+        if not all(names):
+            raise ValueError("Every item of `targets` needs a `name`")
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        if duplicates:
+            raise ValueError(f"Duplicate `targets` names: {duplicates}")
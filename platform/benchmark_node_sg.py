@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+import os
+import tempfile
+import time
+from typing import List, Tuple
+
+from aws_cdk.aws_autoscaling import AutoScalingGroup
+from aws_cdk.aws_ec2 import Port
+from aws_cdk.aws_eks import Cluster
+from aws_cdk.core import Environment
+
+from apps.platform import Platform
+from cdk_stacks.environment.vpc.eks import EKSStack
+
+platform_account_env = Environment(
+    account=os.getenv("AWS_ACCOUNT_ID", "360064003702"),
+    region=os.getenv("AWS_DEFAULT_REGION", "eu-west-1"),
+)
+
+users_account_env = Environment(
+    account=os.getenv("AWS_BASTION_ACCOUNT_ID", platform_account_env.account),
+    region=os.getenv("AWS_DEFAULT_REGION", platform_account_env.region),
+)
+
+# Lookups are served from `vpcSelectionFilter.standIn` (3 AZs), no AWS access needed
+os.environ["CDK_LOOKUP_PROVIDER"] = "stand-in"
+
+AZS = 3
+MAX_FLEETS = 20
+
+
+class BenchmarkPlatform(Platform):
+    """
+    Platform with `fleets` copies of the first configured fleet, as ASG fleets
+    """
+    fleets = 1
+
+    def _parse_custom_config_files(self) -> None:
+        super()._parse_custom_config_files()
+        template = self.environment_config.get('eks', {}).get('workerNodesFleets')[0]
+        self.environment_config['vpc']['maxAZs'] = AZS
+        self.environment_config['eks']['workerNodesFleets'] = [
+            {**template, 'name': f'Fleet{counter}', 'type': 'ASG', 'bakedAmi': {'enabled': False}}
+            for counter in range(self.fleets)
+        ]
+
+
+def count_ingress_rules(template: dict) -> int:
+    """
+    Ingress rules of the security groups, standalone and inline
+    """
+    rules = 0
+    for resource in template.get('Resources', {}).values():
+        if resource.get('Type') == 'AWS::EC2::SecurityGroupIngress':
+            rules += 1
+        if resource.get('Type') == 'AWS::EC2::SecurityGroup':
+            rules += len(resource.get('Properties', {}).get('SecurityGroupIngress', []))
+    return rules
+
+
+def pairwise_cross_fleet_communication(stack: EKSStack, cluster: Cluster, fleets: List[AutoScalingGroup]) -> None:
+    """
+    Former design: traffic allowed between each pair of ASG security groups
+    """
+    security_groups = [fleet.connections.security_groups[0] for fleet in fleets]
+    for target in security_groups:
+        for source in security_groups:
+            target.connections.allow_from(source, Port.all_traffic())
+
+
+DESIGNS = {
+    'shared': EKSStack._enable_cross_fleet_communication,
+    'pairwise': pairwise_cross_fleet_communication,
+}
+
+
+def synth(fleets: int) -> Tuple[float, int]:
+    """
+    :return: Synth time and ingress rules of the platform with `fleets` ASG fleets
+    """
+    BenchmarkPlatform.fleets = fleets
+    with tempfile.TemporaryDirectory() as outdir:
+        started_at = time.perf_counter()
+        app = BenchmarkPlatform(platform_account_env=platform_account_env, users_account_env=users_account_env,
+                                outdir=outdir)
+        assembly = app.synth()
+        synth_seconds = time.perf_counter() - started_at
+        return synth_seconds, sum(count_ingress_rules(stack.template) for stack in assembly.stacks)
+
+
+# Synth time and security group rules for 1 to 20 fleets, every fleet has an ASG per AZ, for the shared node
+# security group and for the former design. Every ASG also gets 4 rules from the cluster (control plane and self).
+print(f"{'fleets':>6} {'ASGs':>5} " +
+      ' '.join(f"{f'{design} synth (s)':>18} {f'{design} rules':>14}" for design in DESIGNS))
+for fleets in range(1, MAX_FLEETS + 1):
+    results = []
+    for design in DESIGNS.values():
+        EKSStack._enable_cross_fleet_communication = design
+        results.append(synth(fleets))
+
+    print(f"{fleets:>6} {fleets * AZS:>5} " +
+          ' '.join(f"{synth_seconds:>18.2f} {rules:>14}" for synth_seconds, rules in results))
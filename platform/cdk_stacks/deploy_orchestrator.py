@@ -0,0 +1,226 @@
+import abc
+import json
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, Future
+from typing import Dict, List, Optional
+
+
+class DeployStep:
+    def __init__(self, name: str, dependencies: List[str], stack: Optional[str] = None,
+                 command: Optional[str] = None) -> None:
+        """
+        :param name:
+        :param dependencies: Names of the steps to complete first
+        :param stack: Stack deployed by the step
+        :param command: Shell command run by the step
+        """
+        self.name = name
+        self.dependencies = dependencies
+        self.stack = stack
+        self.command = command
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+
+class DeployBackend(abc.ABC):
+    """
+    Runs the deploy steps, implementations must be thread safe
+    """
+
+    @abc.abstractmethod
+    def deploy_stack(self, stack: str) -> None:
+        pass
+
+    @abc.abstractmethod
+    def run_command(self, command: str) -> None:
+        pass
+
+
+class CdkDeployBackend(DeployBackend):
+    """
+    Deploys the stacks from the synthesized cloud assembly with the CDK CLI. Stacks outputs are merged
+    in `outputs.json`, as `cdk deploy -O outputs.json` does.
+    """
+
+    def __init__(self, assembly_path: str, outputs_file: str, cdk_command: str = 'cdk') -> None:
+        self.assembly_path = assembly_path
+        self.outputs_file = outputs_file
+        self.cdk_command = cdk_command
+        self._outputs_lock = threading.Lock()
+
+    def deploy_stack(self, stack: str) -> None:
+        stack_outputs_file = f"{self.outputs_file}.{stack}"
+        subprocess.run(
+            f"{self.cdk_command} deploy {stack} --app {self.assembly_path} --exclusively "
+            f"--require-approval never -O {stack_outputs_file}",
+            shell=True,
+            check=True,
+        )
+        with self._outputs_lock:
+            outputs = {}
+            if os.path.exists(self.outputs_file):
+                with open(self.outputs_file) as f:
+                    outputs = json.load(f)
+            with open(stack_outputs_file) as f:
+                outputs.update(json.load(f))
+            with open(self.outputs_file, 'w') as f:
+                json.dump(outputs, f, indent=2)
+            os.remove(stack_outputs_file)
+
+    def run_command(self, command: str) -> None:
+        subprocess.run(command, shell=True, check=True)
+
+
+class DryRunDeployBackend(DeployBackend):
+    """
+    Stand-in backend: steps take the given (or default) duration, nothing gets deployed
+    """
+
+    def __init__(self, durations: Optional[Dict[str, float]] = None, default_duration: float = 0.1) -> None:
+        """
+        :param durations: Seconds taken by each stack or command
+        :param default_duration:
+        """
+        self.durations = durations or {}
+        self.default_duration = default_duration
+        self.calls: List[str] = []
+        self._lock = threading.Lock()
+
+    def deploy_stack(self, stack: str) -> None:
+        self._run(stack)
+
+    def run_command(self, command: str) -> None:
+        self._run(command)
+
+    def _run(self, name: str) -> None:
+        with self._lock:
+            self.calls.append(name)
+        time.sleep(self.durations.get(name, self.default_duration))
+
+
+class DeployOrchestrator:
+    """
+    Deploys the stacks of the cloud assembly following their dependency graph: every step starts as soon as its
+    dependencies complete, up to `concurrency` steps at the same time.
+    Istio gets installed in every cluster as soon as the stack of the cluster is deployed.
+    """
+    EKS_CLUSTER_RESOURCE_TYPE = 'Custom::AWSCDK-EKS-Cluster'
+    ISTIO_STEP = 'istio'
+    # Every cluster gets its own kubeconfig, installs in different clusters run at the same time
+    ISTIO_COMMAND = 'KUBECONFIG=.kubeconfig/{stack} make deploy-apps CLUSTER_STACK={stack}'
+
+    def __init__(self, assembly_path: str, backend: DeployBackend, concurrency: int = 4) -> None:
+        """
+        :param assembly_path: The cloud assembly directory (`cdk.out`)
+        :param backend:
+        :param concurrency: Maximum steps running at the same time
+        """
+        self.assembly_path = assembly_path
+        self.backend = backend
+        self.concurrency = concurrency
+
+    def steps(self) -> Dict[str, DeployStep]:
+        """
+        A step per stack, plus the Istio install of every cluster
+
+        :return:
+        """
+        with open(os.path.join(self.assembly_path, 'manifest.json')) as f:
+            artifacts = json.load(f).get('artifacts', {})
+
+        stacks = {name: artifact for name, artifact in artifacts.items()
+                  if artifact.get('type') == 'aws:cloudformation:stack'}
+        steps = {
+            name: DeployStep(
+                name,
+                dependencies=[dependency for dependency in artifact.get('dependencies', []) if dependency in stacks],
+                stack=name,
+            )
+            for name, artifact in stacks.items()
+        }
+
+        for name, artifact in stacks.items():
+            if self._has_eks_cluster(artifact):
+                steps[self.istio_step(name)] = DeployStep(
+                    self.istio_step(name),
+                    dependencies=[name],
+                    command=self.ISTIO_COMMAND.format(stack=name),
+                )
+
+        return steps
+
+    @classmethod
+    def istio_step(cls, cluster_stack: str) -> str:
+        return f"{cls.ISTIO_STEP}-{cluster_stack}"
+
+    def deploy(self) -> List[DeployStep]:
+        """
+        Runs all the steps, stops scheduling new ones at the first failure
+
+        :return: The completed steps, with their timings
+        """
+        steps = self.steps()
+        self._validate(steps)
+        pending = dict(steps)
+        completed: List[DeployStep] = []
+        running: Dict[Future, DeployStep] = {}
+        failure: Optional[BaseException] = None
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            while pending or running:
+                if not failure:
+                    done_names = {step.name for step in completed}
+                    for name, step in list(pending.items()):
+                        if len(running) < self.concurrency and all(d in done_names for d in step.dependencies):
+                            del pending[name]
+                            running[executor.submit(self._run_step, step)] = step
+                if not running:
+                    break
+
+                finished, _ = wait(running.keys(), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    step = running.pop(future)
+                    if future.exception():
+                        failure = failure or future.exception()
+                    else:
+                        completed.append(step)
+
+        if failure:
+            raise failure
+
+        return completed
+
+    def _run_step(self, step: DeployStep) -> None:
+        step.started_at = time.perf_counter()
+        if step.stack:
+            self.backend.deploy_stack(step.stack)
+        if step.command:
+            self.backend.run_command(step.command)
+        step.finished_at = time.perf_counter()
+
+    @staticmethod
+    def _validate(steps: Dict[str, DeployStep]) -> None:
+        """
+        Fails on dependency cycles, as the deploy would never complete
+
+        :param steps:
+        :return:
+        """
+        resolved = set()
+        while len(resolved) < len(steps):
+            ready = {name for name, step in steps.items()
+                     if name not in resolved and all(d in resolved for d in step.dependencies)}
+            if not ready:
+                raise ValueError(f"Dependency cycle between the steps {sorted(set(steps) - resolved)}")
+            resolved |= ready
+
+    def _has_eks_cluster(self, artifact: dict) -> bool:
+        with open(os.path.join(self.assembly_path, artifact.get('properties', {}).get('templateFile'))) as f:
+            template = json.load(f)
+
+        return any(
+            resource.get('Type') == self.EKS_CLUSTER_RESOURCE_TYPE
+            for resource in template.get('Resources', {}).values()
+        )
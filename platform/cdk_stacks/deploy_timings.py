@@ -0,0 +1,188 @@
+import json
+import sqlite3
+import statistics
+import subprocess
+from datetime import datetime
+from typing import List, Optional
+
+
+class StackEvents:
+    """
+    Resources timings of the last operation of a stack, from its CloudFormation events
+    (`aws cloudformation describe-stack-events` output, newest event first).
+    """
+    OPERATIONS = ['CREATE', 'UPDATE', 'DELETE']
+
+    def __init__(self, stack_name: str, events: List[dict]) -> None:
+        self.stack_name = stack_name
+        self.events = events
+
+    @classmethod
+    def from_aws(cls, stack_name: str, region: Optional[str] = None) -> 'StackEvents':
+        """
+        Events of a deployed stack
+
+        :param stack_name:
+        :param region: The stack region, the AWS CLI default one when missing
+        :return:
+        """
+        output = subprocess.run(
+            ['aws', 'cloudformation', 'describe-stack-events', '--stack-name', stack_name, '--output', 'json'] +
+            (['--region', region] if region else []),
+            check=True,
+            capture_output=True,
+        ).stdout
+
+        return cls(stack_name, json.loads(output).get('StackEvents', []))
+
+    @classmethod
+    def from_file(cls, stack_name: str, file_path: str) -> 'StackEvents':
+        """
+        Recorded `describe-stack-events` output
+
+        :param stack_name:
+        :param file_path:
+        :return:
+        """
+        with open(file_path) as f:
+            return cls(stack_name, json.load(f).get('StackEvents', []))
+
+    def last_operation(self) -> List[dict]:
+        """
+        Events of the last stack operation, oldest first
+
+        :return:
+        """
+        events = sorted(self.events, key=lambda event: self._timestamp(event))
+        for index in range(len(events) - 1, -1, -1):
+            event = events[index]
+            if event.get('LogicalResourceId') == self.stack_name and event.get('ResourceType') == \
+                    'AWS::CloudFormation::Stack' and event.get('ResourceStatus') in \
+                    [f'{operation}_IN_PROGRESS' for operation in self.OPERATIONS]:
+                return events[index:]
+
+        return events
+
+    def resource_timings(self) -> List[dict]:
+        """
+        Time taken by every resource (and the stack itself) in the last operation
+
+        :return:
+        """
+        started = {}
+        timings = []
+        for event in self.last_operation():
+            operation, _, state = event.get('ResourceStatus', '').partition('_')
+            key = (event.get('LogicalResourceId'), operation)
+            if state == 'IN_PROGRESS' and key not in started:
+                started[key] = event
+            elif state in ['COMPLETE', 'FAILED'] and key in started:
+                started_at = self._timestamp(started.pop(key))
+                finished_at = self._timestamp(event)
+                timings.append({
+                    'stack': self.stack_name,
+                    'logical_id': event.get('LogicalResourceId'),
+                    'resource_type': event.get('ResourceType'),
+                    'operation': operation,
+                    'status': event.get('ResourceStatus'),
+                    'started_at': started_at.isoformat(),
+                    'duration': (finished_at - started_at).total_seconds(),
+                })
+
+        return timings
+
+    @staticmethod
+    def _timestamp(event: dict) -> datetime:
+        return datetime.fromisoformat(event.get('Timestamp').replace('Z', '+00:00'))
+
+
+class DeployTimingsStore:
+    """
+    History of the resources deploy timings, keyed by environment and git SHA
+    """
+    SCHEMA = """
+CREATE TABLE IF NOT EXISTS resource_timings (
+    environment TEXT NOT NULL,
+    git_sha TEXT NOT NULL,
+    stack TEXT NOT NULL,
+    logical_id TEXT NOT NULL,
+    resource_type TEXT,
+    operation TEXT NOT NULL,
+    status TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    duration REAL NOT NULL,
+    PRIMARY KEY (environment, stack, logical_id, operation, started_at)
+)"""
+
+    def __init__(self, database_path: str) -> None:
+        self.connection = sqlite3.connect(database_path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute(self.SCHEMA)
+
+    def record(self, environment: str, git_sha: str, timings: List[dict]) -> int:
+        """
+        Stores the timings, already recorded ones are ignored
+
+        :param environment:
+        :param git_sha:
+        :param timings: `StackEvents.resource_timings` output
+        :return: Timings stored
+        """
+        with self.connection:
+            cursor = self.connection.executemany(
+                "INSERT OR IGNORE INTO resource_timings VALUES "
+                "(:environment, :git_sha, :stack, :logical_id, :resource_type, :operation, :status, :started_at, "
+                ":duration)",
+                [{**timing, 'environment': environment, 'git_sha': git_sha} for timing in timings],
+            )
+        return cursor.rowcount
+
+    def slowest(self, environment: str, git_sha: Optional[str] = None, limit: int = 10) -> List[dict]:
+        """
+        Slowest resources of the last deploy (or of the given git SHA)
+
+        :param environment:
+        :param git_sha:
+        :param limit:
+        :return:
+        """
+        git_sha = git_sha or self._last_git_sha(environment)
+        rows = self.connection.execute(
+            "SELECT * FROM resource_timings WHERE environment = ? AND git_sha = ? AND logical_id != stack "
+            "ORDER BY duration DESC LIMIT ?",
+            (environment, git_sha, limit),
+        )
+        return [dict(row) for row in rows]
+
+    def regressions(self, environment: str, ratio: float = 1.5, min_delta: float = 30,
+                    history: int = 10) -> List[dict]:
+        """
+        Resources of the last deploy slower than the median of their previous deploys
+
+        :param environment:
+        :param ratio: Minimum ratio between the last duration and the median
+        :param min_delta: Minimum difference, in seconds, between the last duration and the median
+        :param history: Previous deploys taken into account
+        :return:
+        """
+        regressions = []
+        for last in self.slowest(environment, limit=-1):
+            previous = [row['duration'] for row in self.connection.execute(
+                "SELECT duration FROM resource_timings WHERE environment = ? AND stack = ? AND logical_id = ? "
+                "AND operation = ? AND started_at < ? ORDER BY started_at DESC LIMIT ?",
+                (environment, last['stack'], last['logical_id'], last['operation'], last['started_at'], history),
+            )]
+            if not previous:
+                continue
+            median = statistics.median(previous)
+            if last['duration'] >= ratio * median and last['duration'] - median >= min_delta:
+                regressions.append({**last, 'median': median})
+
+        return regressions
+
+    def _last_git_sha(self, environment: str) -> Optional[str]:
+        row = self.connection.execute(
+            "SELECT git_sha FROM resource_timings WHERE environment = ? ORDER BY started_at DESC LIMIT 1",
+            (environment,),
+        ).fetchone()
+        return row['git_sha'] if row else None
@@ -1,12 +1,15 @@
-from typing import List
+from typing import Optional
 
-from aws_cdk.aws_ec2 import SubnetConfiguration, SubnetType, BastionHostLinux, InstanceType, Vpc
+from aws_cdk.aws_ec2 import BastionHostLinux, InstanceType, Vpc, IVpc, SecurityGroup, Peer, Port, GatewayVpcEndpoint, \
+    GatewayVpcEndpointAwsService, InterfaceVpcEndpoint, InterfaceVpcEndpointAwsService, CfnRoute
 from aws_cdk.core import Tag
 
 from apps.abstract.base_app import BaseApp
 from cdk_stacks.abstract.base_stack import BaseStack
 from cdk_stacks.environment.vpc.eks import EKSStack
+from cdk_stacks.environment.vpc.ip_capacity import IpCapacityPlanner
 from cdk_stacks.environment.vpc.route53 import Route53Stack
+from cdk_stacks.environment.vpc.subnet_layout import SubnetLayout
 
 
 class VPCStack(BaseStack):
@@ -19,14 +22,49 @@ class VPCStack(BaseStack):
         if not vpc_creation_enabled ^ vpc_selection_enabled:
             raise ValueError("One option between `vpc` and `vpcSelectionFilter` must be enabled (not both)")
 
-        vpc = self.create_vpc(scope) if vpc_creation_enabled else self.select_vpc(scope)
+        eks_enabled = bool(scope.environment_config.get('eks', {}).get('enabled'))
+        if vpc_creation_enabled:
+            subnet_layout = SubnetLayout(scope.environment_config.get('vpc', {}))
+            subnet_layout.validate(eks_enabled)
+            if eks_enabled:
+                ip_capacity_planner = IpCapacityPlanner(scope.environment_config)
+                for instance_type in ip_capacity_planner.unknown_instance_types():
+                    self.node.add_warning(
+                        f"ENI limits of `{instance_type}` are unknown, its fleets are left out of the private subnets "
+                        f"IP capacity check: add them to `eks.cni.instanceLimits`"
+                    )
+                ip_capacity_planner.validate()
+            vpc = self.create_vpc(scope, subnet_layout, eks_enabled)
+            endpoints_sg = self.create_vpc_endpoints(scope, vpc, subnet_layout, allow_from_vpc=not eks_enabled)
+        else:
+            subnet_layout = SubnetLayout({})  # Selected VPCs are expected to have the default tiers
+            vpc = self.select_vpc(scope)
+            # Selected VPCs are managed elsewhere, with their own endpoints: an S3 gateway endpoint would clash with
+            # theirs and their route tables can't be updated from this stack
+            endpoints_sg = None
 
         eks_stack = None
         env_fqdn = Route53Stack.get_zone_fqdn(scope, scope.environment_config.get('dns', {}).get("domainName"))
-        if scope.environment_config.get('eks', {}).get('enabled'):
-            eks_stack = EKSStack(scope, 'EKS', vpc=vpc, env_fqdn=env_fqdn)
+        if eks_enabled:
+            eks_stack = EKSStack(
+                scope,
+                'EKS',
+                vpc=vpc,
+                env_fqdn=env_fqdn,
+                subnet_layout=subnet_layout,
+                vpc_endpoints_security_group=endpoints_sg,
+            )
 
-        Route53Stack(scope, 'route53', vpc=vpc, eks_cluster=eks_stack.cluster if eks_stack else None)
+        Route53Stack(
+            scope,
+            'route53',
+            vpc=vpc,
+            eks_cluster=eks_stack.cluster if eks_stack else None,
+            image_cache=eks_stack.image_cache if eks_stack else None,
+            monitoring=eks_stack.monitoring if eks_stack else None,
+            chart_renderer=eks_stack.chart_renderer if eks_stack else None,
+            chart_archives=eks_stack.chart_archives if eks_stack else None,
+        )
 
     def select_vpc(self, scope: BaseApp) -> Vpc:
         vpc_filters = scope.environment_config.get("vpcSelectionFilter", {})
@@ -40,7 +78,7 @@ class VPCStack(BaseStack):
             tags=vpc_filters.get("tags"),
         )
 
-    def create_vpc(self, scope: BaseApp, eks_enabled: bool = True) -> Vpc:
+    def create_vpc(self, scope: BaseApp, subnet_layout: SubnetLayout, eks_enabled: bool = True) -> Vpc:
         vpc = Vpc(
             self,
             scope.prefixed_str(scope.environment_config.get('vpc', {}).get('name')),
@@ -48,16 +86,26 @@ class VPCStack(BaseStack):
             max_azs=scope.environment_config.get('vpc', {}).get('maxAZs'),
             enable_dns_hostnames=True,
             enable_dns_support=True,
-            subnet_configuration=self._get_subnet_configuration(scope),
+            subnet_configuration=subnet_layout.subnet_configuration(),
+            nat_gateways=subnet_layout.nat_gateways(),
         )
 
+        if subnet_layout.private_only:
+            for subnet in subnet_layout.select_workload_subnets(vpc):
+                CfnRoute(
+                    subnet,
+                    'DefaultRoute',
+                    route_table_id=subnet.route_table.route_table_id,
+                    **subnet_layout.default_route_properties(),
+                )
+
         if eks_enabled:
             for subnet in vpc.public_subnets:
                 Tag.add(subnet, "kubernetes.io/role/elb", "1")
                 Tag.add(subnet,
                         f"kubernetes.io/cluster/{scope.prefixed_str(scope.environment_config.get('eks', {}).get('clusterName'))}",
                         "shared")
-            for subnet in vpc.private_subnets:
+            for subnet in subnet_layout.select_workload_subnets(vpc):
                 Tag.add(subnet, "kubernetes.io/role/internal-elb", "1")
                 Tag.add(subnet,
                         f"kubernetes.io/cluster/{scope.prefixed_str(scope.environment_config.get('eks', {}).get('clusterName'))}",
@@ -75,48 +123,53 @@ class VPCStack(BaseStack):
             )
         return vpc
 
-    def _get_subnet_configuration(self, scope) -> List[SubnetConfiguration]:
+    def create_vpc_endpoints(self, scope: BaseApp, vpc: IVpc, subnet_layout: SubnetLayout,
+                             allow_from_vpc: bool) -> Optional[SecurityGroup]:
         """
-        Get VPC subnets based on desired configuration.
+        Creates in the new VPC the endpoints for the AWS services used by the cluster (ECR, S3, STS, SSM, ...),
+        removing the NAT gateways from those network paths.
+
         :param scope:
-        :return:
+        :param vpc:
+        :param subnet_layout:
+        :param allow_from_vpc: If False the endpoints security group has no ingress rule,
+                               they need to be added by the endpoints clients (e.g. the EKS cluster)
+        :return: The interface endpoints security group, if any interface endpoint is created
         """
-        subnet_configuration = []
+        endpoints_config = scope.environment_config.get('vpc', {}).get('endpoints', {})
 
-        """
-        To generate a Private-only configuration we need one of [
-          NatGatewayId,
-          NetworkInterfaceId,
-          GatewayId,
-          EgressOnlyInternetGatewayId,
-          VpcPeeringConnectionId,
-          TransitGatewayId,
-          InstanceId
-        ] to specify the default route.
-        For now we stick to use the default (NatGateway in the public subnets)
-        """
-        if True:
-            subnet_configuration.append(
-                SubnetConfiguration(
-                    subnet_type=SubnetType.PUBLIC,
-                    cidr_mask=scope.environment_config.get('vpc', {}).get('subnetsCIDRSuffixes', {}).get('public'),
-                    name='Public'
-                )
-            )
-        if True:
-            subnet_configuration.append(
-                SubnetConfiguration(
-                    subnet_type=SubnetType.PRIVATE,
-                    cidr_mask=scope.environment_config.get('vpc', {}).get('subnetsCIDRSuffixes', {}).get('private'),
-                    name='Private',
-                )
+        for service in endpoints_config.get('gateway', []):
+            GatewayVpcEndpoint(
+                self,
+                scope.prefixed_str(f'{service}-gateway-endpoint'),
+                vpc=vpc,
+                service=GatewayVpcEndpointAwsService(service),
+                subnets=[subnet_layout.workload_subnets()],
             )
-        if True:
-            subnet_configuration.append(
-                SubnetConfiguration(
-                    subnet_type=SubnetType.ISOLATED,
-                    cidr_mask=scope.environment_config.get('vpc', {}).get('subnetsCIDRSuffixes', {}).get('isolated'),
-                    name='Isolated'
-                )
+
+        interface_config = endpoints_config.get('interface', {})
+        if not interface_config.get('enabled') or not interface_config.get('services'):
+            return None
+
+        endpoints_sg = SecurityGroup(
+            self,
+            scope.prefixed_str('vpc-endpoints-sg'),
+            vpc=vpc,
+            description="VPC interface endpoints",
+            allow_all_outbound=False,
+        )
+        if allow_from_vpc:
+            endpoints_sg.add_ingress_rule(Peer.ipv4(vpc.vpc_cidr_block), Port.tcp(443))
+
+        for service in interface_config.get('services'):
+            InterfaceVpcEndpoint(
+                self,
+                scope.prefixed_str(f'{service}-interface-endpoint'),
+                vpc=vpc,
+                service=InterfaceVpcEndpointAwsService(service),
+                private_dns_enabled=interface_config.get('privateDnsEnabled'),
+                security_groups=[endpoints_sg],
+                subnets=subnet_layout.workload_subnets(),
             )
-        return subnet_configuration
+
+        return endpoints_sg
@@ -1,33 +1,65 @@
-from typing import List
+from typing import List, Optional
 
-from aws_cdk.aws_autoscaling import AutoScalingGroup
-from aws_cdk.aws_ec2 import Vpc, SubnetSelection, SubnetType, InstanceType, SecurityGroup, Port
-from aws_cdk.aws_eks import Cluster, Selector, KubernetesVersion, BootstrapOptions
-from aws_cdk.aws_iam import Role, AccountRootPrincipal
-from aws_cdk.core import Tag
+from aws_cdk.aws_autoscaling import AutoScalingGroup, UpdateType
+from aws_cdk.aws_ec2 import Vpc, SubnetSelection, InstanceType, SecurityGroup, Port, MachineImage, CfnLaunchTemplate
+from aws_cdk.aws_eks import Cluster, Selector, KubernetesVersion, BootstrapOptions, KubernetesPatch, CfnNodegroup
+from aws_cdk.aws_iam import Role, AccountRootPrincipal, ServicePrincipal, ManagedPolicy, PolicyStatement, Effect
+from aws_cdk.aws_logs import CfnLogGroup
+from aws_cdk.core import Tag, Fn
 
 from apps.abstract.base_app import BaseApp
 from cdk_stacks.abstract.base_stack import BaseStack
+from cdk_stacks.environment.vpc.subnet_layout import SubnetLayout
+from cdk_stacks.environment.vpc.eks.addons_stack import AddonsStack
+from cdk_stacks.environment.vpc.eks.chart_archives import ChartArchives
+from cdk_stacks.environment.vpc.eks.chart_renderer import ChartRenderer
 from cdk_stacks.environment.vpc.eks.eks_resources.cert_manager import CertManager
 from cdk_stacks.environment.vpc.eks.eks_resources.cluster_autoscaler import ClusterAutoscaler
 from cdk_stacks.environment.vpc.eks.eks_resources.external_dns import ExternalDns
 from cdk_stacks.environment.vpc.eks.eks_resources.external_secrets import ExternalSecrets
+from cdk_stacks.environment.vpc.eks.eks_resources.external_secrets.sync_planner import SecretSyncPlanner
 from cdk_stacks.environment.vpc.eks.eks_resources.fluentd import Fluentd
 from cdk_stacks.environment.vpc.eks.eks_resources.grafana import Grafana
 from cdk_stacks.environment.vpc.eks.eks_resources.loki import Loki
 from cdk_stacks.environment.vpc.eks.eks_resources.metrics_server import MetricsServer
 from cdk_stacks.environment.vpc.eks.eks_resources.prometheus_operator import PrometheusOperator
+from cdk_stacks.environment.vpc.eks.fargate import Fargate
+from cdk_stacks.environment.vpc.eks.image_cache import ImageCache
+from cdk_stacks.environment.vpc.eks.monitoring import Monitoring
+from cdk_stacks.environment.vpc.eks.node_tweaks import NodeTweaks
 
 
 class EKSStack(BaseStack):
     __cluster: Cluster
+    __image_cache: ImageCache
+    __monitoring: Monitoring
+    __chart_renderer: ChartRenderer
+    __chart_archives: ChartArchives
 
     @property
     def cluster(self):
         return self.__cluster
 
-    def __init__(self, scope: BaseApp, id: str, vpc: Vpc, env_fqdn: str, **kwargs) -> None:
+    @property
+    def image_cache(self):
+        return self.__image_cache
+
+    @property
+    def monitoring(self):
+        return self.__monitoring
+
+    @property
+    def chart_renderer(self):
+        return self.__chart_renderer
+
+    @property
+    def chart_archives(self):
+        return self.__chart_archives
+
+    def __init__(self, scope: BaseApp, id: str, vpc: Vpc, env_fqdn: str, subnet_layout: SubnetLayout,
+                 vpc_endpoints_security_group: SecurityGroup = None, **kwargs) -> None:
         super().__init__(scope, id, **kwargs)
+        self.subnet_layout = subnet_layout
 
         kubernetes_version = scope.environment_config.get('eks', {}).get('kubernetesVersion')
         cluster_name = scope.prefixed_str(scope.environment_config.get('eks', {}).get('clusterName'))
@@ -50,16 +82,25 @@ class EKSStack(BaseStack):
             vpc_subnets=self._get_control_plane_subnets(scope),  # Control plane subnets
         )
 
-        for profile in scope.environment_config.get('eks', {}).get('fargateProfiles', []):
-            eks_cluster.add_fargate_profile(
-                profile.get('name'),
-                selectors=[
-                    Selector(
-                        namespace=profile.get('namespace'),
-                        labels=profile.get('labels')
-                    )
-                ]
-            )
+        self._configure_cni(eks_cluster, scope.environment_config.get('eks', {}).get('cni', {}))
+
+        self.__image_cache = image_cache = ImageCache(
+            scope.environment_config.get('eks', {}).get('imageCache', {}),
+            prefix=scope.prefixed_str('cache'),
+            account=self.account,
+            region=self.region,
+        )
+        image_cache.add_pull_through_cache_rules(self)
+        self.__monitoring = monitoring = Monitoring(scope.environment_config.get('eks', {}).get('monitoring', {}))
+        self.__chart_archives = ChartArchives(scope.environment_config.get('eks', {}).get('vendoredCharts', {}))
+        self.__chart_renderer = ChartRenderer(
+            scope.environment_config.get('eks', {}).get('chartRendering', {}),
+            kubernetes_version,
+            self.chart_archives,
+        )
+
+        if scope.environment_config.get('eks', {}).get('fargateProfiles'):
+            self._add_fargate_profiles(scope, eks_cluster)
 
         asg_fleets = []
         for fleet in scope.environment_config.get('eks', {}).get('workerNodesFleets'):
@@ -68,23 +109,59 @@ class EKSStack(BaseStack):
             if fleet.get('type') == 'ASG':
                 asg_fleets += self.add_asg_fleet(scope, eks_cluster, fleet)
 
-        self._enable_cross_fleet_communication(asg_fleets)
+        nodes_sg = self._enable_cross_fleet_communication(eks_cluster, asg_fleets)
+        if vpc_endpoints_security_group:
+            self._enable_vpc_endpoints_access(eks_cluster, nodes_sg, vpc_endpoints_security_group)
 
         # Base cluster applications
-        MetricsServer.add_to_cluster(eks_cluster)
-        ClusterAutoscaler.add_to_cluster(eks_cluster, kubernetes_version)
-        ExternalSecrets.add_to_cluster(eks_cluster)
-        CertManager.add_to_cluster(eks_cluster)
+        base_cluster = self._addons_cluster(scope, eks_cluster, AddonsStack.BASE)
+        MetricsServer.add_to_cluster(
+            base_cluster,
+            scope.environment_config.get('eks', {}).get('metricsServer', {}),
+            self._max_nodes(scope, vpc),
+            image_cache,
+        )
+        ClusterAutoscaler.add_to_cluster(base_cluster, kubernetes_version, image_cache, monitoring)
+        external_secrets_config = scope.environment_config.get('eks', {}).get('externalSecrets', {})
+        SecretSyncPlanner(external_secrets_config).validate()
+        ExternalSecrets.add_to_cluster(base_cluster, external_secrets_config, image_cache, monitoring)
+        CertManager.add_to_cluster(
+            base_cluster,
+            scope.environment_config.get('eks', {}).get('certManager', {}),
+            image_cache,
+            monitoring,
+        )
 
         # Monitoring applications
-        PrometheusOperator.add_to_cluster(eks_cluster)
-        Grafana.add_to_cluster(eks_cluster, env_fqdn)
+        monitoring_cluster = self._addons_cluster(scope, eks_cluster, AddonsStack.MONITORING)
+        PrometheusOperator.add_to_cluster(monitoring_cluster, image_cache, monitoring)
+        Grafana.add_to_cluster(monitoring_cluster, image_cache, monitoring, env_fqdn)
 
         # Logging & tracing applications
-        Fluentd.add_to_cluster(eks_cluster)
-        Loki.add_to_cluster(eks_cluster)
+        logging_cluster = self._addons_cluster(scope, eks_cluster, AddonsStack.LOGGING)
+        Fluentd.add_to_cluster(logging_cluster, image_cache, monitoring)
+        Loki.add_to_cluster(logging_cluster, image_cache, monitoring)
         # Jaeger
 
+        self.chart_archives.attach(self)
+
+    def _addons_cluster(self, scope: BaseApp, cluster: Cluster, group: str) -> Cluster:
+        return AddonsStack.addons_cluster(scope, cluster, group, self.chart_renderer, self.chart_archives)
+
+    @staticmethod
+    def _max_nodes(scope: BaseApp, vpc: Vpc) -> int:
+        """
+        Nodes in the cluster when all the fleets are at maximum size, every fleet scales in each AZ
+
+        :param scope:
+        :param vpc:
+        :return:
+        """
+        return len(vpc.availability_zones) * sum(
+            fleet.get('autoscaling', {}).get('maxInstances')
+            for fleet in scope.environment_config.get('eks', {}).get('workerNodesFleets')
+        )
+
     def _get_control_plane_subnets(self, scope: BaseApp) -> List[SubnetSelection]:
         """
         This method selects the allowed Subnets only for the control plane, on which will load balancers be allowed.
@@ -93,54 +170,211 @@ class EKSStack(BaseStack):
         :param scope:
         :return:
         """
-        eks_subnets = [SubnetSelection(subnet_type=SubnetType.PRIVATE)]
-        if scope.environment_config.get('eks', {}).get('usePublicSubnets'):
-            eks_subnets += [SubnetSelection(subnet_type=SubnetType.PUBLIC)]
+        eks_subnets = [self.subnet_layout.workload_subnets()]
+        if scope.environment_config.get('eks', {}).get('usePublicSubnets') and self.subnet_layout.public_subnets():
+            eks_subnets += [self.subnet_layout.public_subnets()]
         return eks_subnets
 
+    def _configure_cni(self, cluster: Cluster, cni_config: dict):
+        """
+        Applies the warm pool settings to the VPC CNI (`aws-node` daemonset), the same settings
+        are used to plan the subnets IP capacity
+
+        :param cluster:
+        :param cni_config:
+        :return:
+        """
+        settings = {
+            'WARM_ENI_TARGET': cni_config.get('warmEniTarget'),
+            'WARM_IP_TARGET': cni_config.get('warmIpTarget'),
+            'MINIMUM_IP_TARGET': cni_config.get('minimumIpTarget'),
+        }
+
+        def aws_node_patch(env: dict) -> dict:
+            return {
+                "spec": {"template": {"spec": {"containers": [{
+                    "name": "aws-node",
+                    "env": [{"name": name, "value": str(value)} for name, value in env.items()],
+                }]}}},
+            }
+
+        KubernetesPatch(
+            self,
+            'aws-node-warm-pool',
+            cluster=cluster,
+            resource_name="daemonset/aws-node",
+            resource_namespace="kube-system",
+            apply_patch=aws_node_patch({name: value for name, value in settings.items() if value is not None}),
+            restore_patch=aws_node_patch({'WARM_ENI_TARGET': 1}),
+        )
+
+    def _add_fargate_profiles(self, scope: BaseApp, cluster: Cluster):
+        """
+        Adds the Fargate profiles, each one with its own pod execution role, pods sizing defaults
+        and the log router configuration
+
+        :param scope:
+        :param cluster:
+        :return:
+        """
+        fargate = Fargate(
+            scope.environment_config.get('eks', {}).get('fargateLogging', {}),
+            log_group_name=f"/aws/eks/{cluster.cluster_name}/fargate",
+            region=self.region,
+        )
+        if fargate.logging_enabled:
+            log_group = CfnLogGroup(
+                self,
+                'fargate-logs',
+                log_group_name=fargate.log_group_name,
+                retention_in_days=scope.environment_config.get('eks', {}).get('fargateLogging', {}).get('retentionDays'),
+            )
+            for resource in fargate.log_router_resources():
+                cluster.add_resource(
+                    f"{resource.get('kind')}-{resource.get('metadata', {}).get('name')}",
+                    resource
+                )
+
+        sized_namespaces = {}
+        for profile in scope.environment_config.get('eks', {}).get('fargateProfiles', []):
+            pod_execution_role = Role(
+                self,
+                f"fargate-{profile.get('name')}-pod-execution-role",
+                assumed_by=ServicePrincipal('eks-fargate-pods.amazonaws.com'),
+                managed_policies=[ManagedPolicy.from_aws_managed_policy_name('AmazonEKSFargatePodExecutionRolePolicy')],
+            )
+            self.image_cache.grant_pull_through(pod_execution_role)
+            if fargate.logging_enabled:
+                pod_execution_role.add_to_policy(PolicyStatement(
+                    resources=[log_group.attr_arn],
+                    effect=Effect.ALLOW,
+                    actions=[
+                        "logs:CreateLogStream",
+                        "logs:DescribeLogStreams",
+                        "logs:PutLogEvents",
+                    ],
+                ))
+
+            subnets = self.subnet_layout.workload_subnets()
+            if profile.get('availabilityZones'):
+                subnets = SubnetSelection(
+                    subnets=[
+                        subnet for subnet in self.subnet_layout.select_workload_subnets(cluster.vpc)
+                        if subnet.availability_zone in profile.get('availabilityZones')
+                    ]
+                )
+
+            cluster.add_fargate_profile(
+                profile.get('name'),
+                selectors=[
+                    Selector(
+                        namespace=profile.get('namespace'),
+                        labels=profile.get('labels')
+                    )
+                ],
+                subnet_selection=subnets,
+                pod_execution_role=pod_execution_role,
+            )
+
+            if profile.get('podSize'):
+                if profile.get('namespace') in sized_namespaces:
+                    raise ValueError(
+                        f"Fargate profiles `{sized_namespaces[profile.get('namespace')]}` and `{profile.get('name')}` "
+                        f"both set a `podSize` for the `{profile.get('namespace')}` namespace"
+                    )
+                sized_namespaces[profile.get('namespace')] = profile.get('name')
+                resource = Fargate.limit_range_resource(
+                    f"fargate-{profile.get('name')}-defaults",
+                    profile.get('namespace'),
+                    profile.get('podSize'),
+                )
+                cluster.add_resource(
+                    f"{resource.get('kind')}-{resource.get('metadata', {}).get('name')}",
+                    resource
+                )
+
     def add_managed_fleet(self, cluster: Cluster, fleet: dict):
+        if fleet.get('bakedAmi', {}).get('enabled'):
+            # A custom AMI in the launch template makes EKS skip the bootstrap merged into the user data
+            raise ValueError(
+                f"Fleet `{fleet.get('name')}`: `bakedAmi` is only supported by ASG fleets, not by `managed` ones"
+            )
+
+        # Managed node groups get the same tweaks of the ASG fleets through a launch template
+        launch_template = CfnLaunchTemplate(self, f'{fleet.get("name")}-launch-template')
+        launch_template.add_property_override('LaunchTemplateData', {
+            "UserData": Fn.base64(NodeTweaks.managed_node_group_user_data(
+                self._node_commands(fleet, bootstrapped=False),
+                NodeTweaks.kubelet_extra_args({}, self._images_volume_size(fleet)),
+            )),
+            "BlockDeviceMappings": [self._root_volume_mapping(fleet.get('rootVolume', {}))],
+        })
+        instance_types = fleet.get('instanceTypes') or [fleet.get('instanceType')]
+
         # To correctly scale the cluster we need our node groups to not span across AZs
         # to avoid the automatic AZ re-balance, hence we create a node group per subnet
-
-        for counter, subnet in enumerate(cluster.vpc.private_subnets):
+        for counter, subnet in enumerate(self.subnet_layout.select_workload_subnets(cluster.vpc)):
             fleet_id = f'{fleet.get("name")}-{counter}'
-            cluster.add_nodegroup(
+            nodegroup = cluster.add_nodegroup(
                 id=fleet_id,
-                instance_type=InstanceType(fleet.get('instanceType')),
+                instance_type=InstanceType(instance_types[0]),
                 min_size=fleet.get('autoscaling', {}).get('minInstances'),
                 max_size=fleet.get('autoscaling', {}).get('maxInstances'),
                 labels=dict(**fleet.get('nodeLabels', {}), fleetName=fleet.get('name')),
                 nodegroup_name=f'{fleet.get("name")}-{subnet.availability_zone}',
                 subnets=SubnetSelection(subnets=[subnet]),
             )
+            # Launch templates, capacity type and multiple instance types aren't supported by the construct yet
+            cfn_nodegroup: CfnNodegroup = nodegroup.node.default_child
+            cfn_nodegroup.add_property_override('LaunchTemplate', {
+                "Id": launch_template.ref,
+                "Version": launch_template.attr_latest_version_number,
+            })
+            cfn_nodegroup.add_property_override('InstanceTypes', instance_types)
+            cfn_nodegroup.add_property_override('CapacityType', fleet.get('capacityType') or 'ON_DEMAND')
+            self.image_cache.grant_pull_through(nodegroup.role)
+
+    @staticmethod
+    def _storage_commands(fleet: dict) -> List[str]:
+        return NodeTweaks.instance_store_commands() if fleet.get('instanceStore', {}).get('enabled') else []
+
+    @staticmethod
+    def _images_volume_size(fleet: dict) -> int:
+        if fleet.get('instanceStore', {}).get('enabled'):
+            return fleet.get('instanceStore', {}).get('sizeGiB')
+
+        return fleet.get('rootVolume', {}).get('sizeGiB')
+
+    @staticmethod
+    def _root_volume_mapping(config: dict) -> dict:
+        """
+        Root EBS volume of the nodes, gp3 volumes have IOPS and throughput independent of their size
+
+        :param config: The fleet `rootVolume` configuration
+        :return:
+        """
+        ebs = {
+            "VolumeSize": config.get('sizeGiB'),
+            "VolumeType": config.get('type'),
+            "DeleteOnTermination": True,
+            "Encrypted": True,
+        }
+        if config.get('type') in ['gp3', 'io1', 'io2']:
+            ebs["Iops"] = config.get('iops')
+        if config.get('type') == 'gp3':
+            ebs["Throughput"] = config.get('throughputMiBps')
+
+        return {
+            "DeviceName": "/dev/xvda",
+            "Ebs": ebs,
+        }
 
     def add_asg_fleet(self, scope: BaseApp, cluster: Cluster, fleet) -> List[AutoScalingGroup]:
         created_fleets: List[AutoScalingGroup] = []
 
-        node_labels = fleet.get('nodeLabels', {})
-        node_labels["fleetName"] = fleet.get('name')
-        node_labels_as_str = ','.join(map('='.join, node_labels.items()))
-
-        # Source of tweaks: https://kubedex.com/90-days-of-aws-eks-in-production/
-        kubelet_extra_args = ' '.join([
-            # Add node labels
-            f'--node-labels {node_labels_as_str}' if len(node_labels_as_str) else '',
-
-            # Capture resource reservation for kubernetes system daemons like the kubelet, container runtime,
-            # node problem detector, etc.
-            '--kube-reserved cpu=250m,memory=1Gi,ephemeral-storage=1Gi',
-
-            # Capture resources for vital system functions, such as sshd, udev.
-            '--system-reserved cpu=250m,memory=0.2Gi,ephemeral-storage=1Gi',
-
-            # Start evicting pods from this node once these thresholds are crossed.
-            '--eviction-hard memory.available<0.2Gi,nodefs.available<10%',
-        ])
-
-        cluster_sg = SecurityGroup.from_security_group_id(
-            self,
-            'eks-cluster-sg',
-            security_group_id=cluster.cluster_security_group_id
+        kubelet_extra_args = NodeTweaks.kubelet_extra_args(
+            dict(**fleet.get('nodeLabels', {}), fleetName=fleet.get('name')),
+            self._images_volume_size(fleet),
         )
 
         asg_tags = {
@@ -150,95 +384,139 @@ class EKSStack(BaseStack):
 
         # For correctly autoscaling the cluster we need our autoscaling groups to not span across AZs
         # to avoid the AZ Rebalance, hence we create an ASG per subnet
-        for counter, subnet in enumerate(cluster.vpc.private_subnets):
-            asg: AutoScalingGroup = cluster.add_capacity(
-                id=scope.prefixed_str(f'{fleet.get("name")}-{counter}'),
-                instance_type=InstanceType(fleet.get('instanceType')),
-                min_capacity=fleet.get('autoscaling', {}).get('minInstances'),
-                max_capacity=fleet.get('autoscaling', {}).get('maxInstances'),
-                bootstrap_options=BootstrapOptions(
-                    kubelet_extra_args=kubelet_extra_args,
-                ),
-                spot_price=str(fleet.get('spotPrice')) if fleet.get('spotPrice') else None,
-                vpc_subnets=SubnetSelection(subnets=[subnet]),
-            )
+        baked_ami_id = fleet.get('bakedAmi', {}).get('amiId') if fleet.get('bakedAmi', {}).get('enabled') else None
+        for counter, subnet in enumerate(self.subnet_layout.select_workload_subnets(cluster.vpc)):
+            if baked_ami_id:
+                # `add_capacity` only supports the stock EKS optimized AMIs, hence we create the ASG ourselves
+                asg = AutoScalingGroup(
+                    cluster,
+                    scope.prefixed_str(f'{fleet.get("name")}-{counter}'),
+                    vpc=cluster.vpc,
+                    instance_type=InstanceType(fleet.get('instanceType')),
+                    machine_image=MachineImage.generic_linux({self.region: baked_ami_id}),
+                    min_capacity=fleet.get('autoscaling', {}).get('minInstances'),
+                    max_capacity=fleet.get('autoscaling', {}).get('maxInstances'),
+                    spot_price=str(fleet.get('spotPrice')) if fleet.get('spotPrice') else None,
+                    vpc_subnets=SubnetSelection(subnets=[subnet]),
+                    update_type=UpdateType.ROLLING_UPDATE,
+                )
+                cluster.add_auto_scaling_group(
+                    asg,
+                    bootstrap_options=BootstrapOptions(
+                        kubelet_extra_args=kubelet_extra_args,
+                    ),
+                )
+            else:
+                asg: AutoScalingGroup = cluster.add_capacity(
+                    id=scope.prefixed_str(f'{fleet.get("name")}-{counter}'),
+                    instance_type=InstanceType(fleet.get('instanceType')),
+                    min_capacity=fleet.get('autoscaling', {}).get('minInstances'),
+                    max_capacity=fleet.get('autoscaling', {}).get('maxInstances'),
+                    bootstrap_options=BootstrapOptions(
+                        kubelet_extra_args=kubelet_extra_args,
+                    ),
+                    spot_price=str(fleet.get('spotPrice')) if fleet.get('spotPrice') else None,
+                    vpc_subnets=SubnetSelection(subnets=[subnet]),
+                )
             created_fleets.append(asg)
-            self._add_userdata_production_tweaks(asg)
+            # Not supported by the construct yet: gp3 volumes and throughput
+            asg.node.find_child('LaunchConfig').add_property_override(
+                'BlockDeviceMappings',
+                [self._root_volume_mapping(fleet.get('rootVolume', {}))],
+            )
+            # Baked AMIs already ship the tweaks and the pre-pulled images
+            asg.user_data.add_commands(
+                *self._node_commands(fleet, bootstrapped=True, production_tweaks=not baked_ami_id)
+            )
+            self.image_cache.grant_pull_through(asg.role)
 
             for key, value in asg_tags.items():
                 Tag.add(asg, key, value)
 
         return created_fleets
 
-    def _enable_cross_fleet_communication(self, fleets: List[AutoScalingGroup]):
-        security_groups: List[SecurityGroup] = [fleet.node.find_child("InstanceSecurityGroup") for fleet in fleets]
-        security_groups = list(set(security_groups))  # deduplication
-
-        """
-        This is horrible but we can't actually specify a common security group for all the ASGs, like managed nodes.
-        We could add an additional common security group but this would breaks services of type `LoadBalancer`
-        """
-        for sg_target in security_groups:
-            for sg_source in security_groups:
-                rule_found = False
-                for rule, value in sg_target.to_ingress_rule_config().items():
-                    if rule == "sourceSecurityGroupId" and value == sg_source.security_group_id:
-                        rule_found = True
-
-                if not rule_found:
-                    sg_target.connections.allow_from(sg_source, Port.all_traffic())
-
-    def _add_userdata_production_tweaks(self, fleet: AutoScalingGroup):
-        # Source of tweaks: https://kubedex.com/90-days-of-aws-eks-in-production
-        fleet.user_data.add_commands(
-            """
-# Sysctl changes
-## Disable IPv6
-cat <<EOF > /etc/sysctl.d/10-disable-ipv6.conf
-# disable ipv6 config
-net.ipv6.conf.all.disable_ipv6 = 1
-net.ipv6.conf.default.disable_ipv6 = 1
-net.ipv6.conf.lo.disable_ipv6 = 1
-EOF""",
-            """
-## Kube network optimisation.
-## Stolen from this guy: https://blog.codeship.com/running-1000-containers-in-docker-swarm/
-cat <<EOF > /etc/sysctl.d/99-kube-net.conf
-# Have a larger connection range available
-net.ipv4.ip_local_port_range=1024 65000
-
-# Reuse closed sockets faster
-net.ipv4.tcp_tw_reuse=1
-net.ipv4.tcp_fin_timeout=15
-
-# The maximum number of "backlogged sockets".  Default is 128.
-net.core.somaxconn=4096
-net.core.netdev_max_backlog=4096
-
-# 16MB per socket - which sounds like a lot,
-# but will virtually never consume that much.
-net.core.rmem_max=16777216
-net.core.wmem_max=16777216
-
-# Various network tunables
-net.ipv4.tcp_max_syn_backlog=20480
-net.ipv4.tcp_max_tw_buckets=400000
-net.ipv4.tcp_no_metrics_save=1
-net.ipv4.tcp_rmem=4096 87380 16777216
-net.ipv4.tcp_syn_retries=2
-net.ipv4.tcp_synack_retries=2
-net.ipv4.tcp_wmem=4096 65536 16777216
-#vm.min_free_kbytes=65536
-
-# Connection tracking to prevent dropped connections (usually issue on LBs)
-net.netfilter.nf_conntrack_max=262144
-net.ipv4.netfilter.ip_conntrack_generic_timeout=120
-net.netfilter.nf_conntrack_tcp_timeout_established=86400
-
-# ARP cache settings for a highly loaded docker swarm
-net.ipv4.neigh.default.gc_thresh1=8096
-net.ipv4.neigh.default.gc_thresh2=12288
-net.ipv4.neigh.default.gc_thresh3=16384
-EOF""",
-            "systemctl restart systemd-sysctl.service"
+    def _enable_cross_fleet_communication(self, cluster: Cluster,
+                                          fleets: List[AutoScalingGroup]) -> Optional[SecurityGroup]:
+        """
+        Every ASG gets an additional security group, shared by all the nodes and allowing traffic between them:
+        a single self-referencing rule, whatever the number of fleets and AZs.
+        The shared security group doesn't have the cluster tag, the cloud provider still finds a single tagged
+        security group per node, hence services of type `LoadBalancer` keep working.
+
+        :param cluster:
+        :param fleets:
+        :return: The shared security group, if there are ASG fleets
+        """
+        if not fleets:
+            return None
+
+        nodes_sg = SecurityGroup(
+            self,
+            'nodes-shared-sg',
+            vpc=cluster.vpc,
+            description='Traffic between the worker nodes of all the fleets',
+            allow_all_outbound=True,
         )
+        nodes_sg.connections.allow_internally(Port.all_traffic())
+        for fleet in fleets:
+            fleet.add_security_group(nodes_sg)
+
+        return nodes_sg
+
+    def _enable_vpc_endpoints_access(self, cluster: Cluster, nodes_sg: Optional[SecurityGroup],
+                                     endpoints_sg: SecurityGroup):
+        """
+        Allows the cluster (managed nodes, fargate pods) and the ASG fleets to reach the VPC interface endpoints.
+        Rules are created from the clients side, so they belong to this stack and the VPC stack doesn't depend on it.
+
+        :param cluster:
+        :param nodes_sg: The security group shared by the ASG fleets
+        :param endpoints_sg:
+        :return:
+        """
+        cluster_sg = SecurityGroup.from_security_group_id(
+            self,
+            'eks-cluster-sg-endpoints',
+            security_group_id=cluster.cluster_security_group_id
+        )
+        for client in [cluster_sg, nodes_sg] if nodes_sg else [cluster_sg]:
+            client.connections.allow_to(endpoints_sg, Port.tcp(443))
+
+    def _node_commands(self, fleet: dict, bootstrapped: bool, production_tweaks: bool = True) -> List[str]:
+        """
+        User data commands of the fleet nodes. With `eks.monitoring.nodeBootstrapTimings` enabled every phase
+        emits its timing, the `kubelet` one measuring the node provisioning latency.
+
+        :param fleet:
+        :param bootstrapped: ASG nodes run the commands after the bootstrap script, managed node groups before it
+        :param production_tweaks:
+        :return:
+        """
+        if not self.monitoring.config.get('nodeBootstrapTimings', {}).get('enabled'):
+            return [
+                *self._storage_commands(fleet),
+                *(self._production_tweaks_commands(wait_for_kubelet=not bootstrapped) if production_tweaks else []),
+            ]
+
+        return [
+            *NodeTweaks.bootstrap_timing_commands(fleet.get('name')),
+            # Boot and bootstrap script, the bootstrap of managed node groups is part of the `kubelet` phase
+            *([f'{NodeTweaks.BOOTSTRAP_TIMING_FUNCTION} bootstrap $node_boot_at'] if bootstrapped else []),
+            *NodeTweaks.timed_commands('instance_store', self._storage_commands(fleet)),
+            *(self._production_tweaks_commands(wait_for_kubelet=not bootstrapped, timed=True)
+              if production_tweaks else []),
+            *NodeTweaks.kubelet_ready_timing_commands(),
+        ]
+
+    def _production_tweaks_commands(self, wait_for_kubelet: bool = False, timed: bool = False) -> List[str]:
+        sysctl_commands = NodeTweaks.sysctl_commands()
+        return [
+            *(NodeTweaks.timed_commands('sysctl', sysctl_commands) if timed else sysctl_commands),
+            *NodeTweaks.pre_pull_commands(
+                [self.image_cache.repository(image) for image in self.image_cache.pre_pulled_images],
+                ecr_registry=self.image_cache.ecr_registry,
+                region=self.region,
+                wait_for_kubelet=wait_for_kubelet,
+                timed=timed,
+            ),
+        ]
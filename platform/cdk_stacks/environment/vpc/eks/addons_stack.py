@@ -0,0 +1,146 @@
+from typing import Optional
+
+from aws_cdk.aws_eks import Cluster, HelmChart, KubernetesResource
+from aws_cdk.aws_iam import Role, OpenIdConnectPrincipal, PolicyStatement
+from aws_cdk.core import Construct, CfnJson
+
+from apps.abstract.base_app import BaseApp
+from cdk_stacks.abstract.base_stack import BaseStack
+from cdk_stacks.environment.vpc.eks.chart_archives import ChartArchives
+from cdk_stacks.environment.vpc.eks.chart_renderer import ChartRenderer
+
+
+class AddonsServiceAccount(Construct):
+    """
+    IAM role and Kubernetes service account of an add-on, both in the add-on scope.
+
+    The EKS `ServiceAccount` construct adds its manifest to the cluster stack, which would then depend on the role
+    in the add-ons stack while the add-ons stack depends on the cluster stack. Construct paths and logical ids are
+    the same of the EKS construct.
+    """
+
+    def __init__(self, scope: Construct, id: str, cluster: 'AddonsCluster', name: Optional[str] = None,
+                 namespace: Optional[str] = None) -> None:
+        super().__init__(scope, id)
+        self.service_account_name = name or self.node.unique_id.lower()
+        self.service_account_namespace = namespace or 'default'
+
+        # Only the service account can assume the role, not the other pods of the namespace
+        conditions = CfnJson(self, 'ConditionJson', value={
+            f"{cluster.cluster_open_id_connect_issuer}:aud": 'sts.amazonaws.com',
+            f"{cluster.cluster_open_id_connect_issuer}:sub":
+                f"system:serviceaccount:{self.service_account_namespace}:{self.service_account_name}",
+        })
+        self.role = Role(
+            self,
+            'Role',
+            assumed_by=OpenIdConnectPrincipal(cluster.open_id_connect_provider).with_conditions({
+                "StringEquals": conditions,
+            }),
+        )
+
+        cluster.add_resource(f"{id}ServiceAccountResource", {
+            "apiVersion": "v1",
+            "kind": "ServiceAccount",
+            "metadata": {
+                "name": self.service_account_name,
+                "namespace": self.service_account_namespace,
+                "labels": {
+                    "app.kubernetes.io/name": self.service_account_name,
+                },
+                "annotations": {
+                    "eks.amazonaws.com/role-arn": self.role.role_arn,
+                },
+            },
+        })
+
+    def add_to_policy(self, statement: PolicyStatement) -> bool:
+        return self.role.add_to_policy(statement)
+
+
+class AddonsCluster:
+    """
+    Stand-in of the EKS `Cluster` given to the add-ons: Kubernetes resources, charts and service accounts get
+    created in the scope (the add-ons stack, or the cluster itself as its own methods do), everything else is
+    the cluster's. Charts are rendered and validated before being added, and installed from the vendored archives.
+    """
+
+    def __init__(self, scope: Construct, cluster: Cluster, chart_renderer: Optional[ChartRenderer] = None,
+                 chart_archives: Optional[ChartArchives] = None) -> None:
+        self.scope = scope
+        self.cluster = cluster
+        self.chart_renderer = chart_renderer
+        self.chart_archives = chart_archives
+
+    def add_resource(self, id: str, *manifest) -> KubernetesResource:
+        return KubernetesResource(self.scope, f"manifest-{id}", cluster=self.cluster, manifest=list(manifest))
+
+    def add_chart(self, id: str, **options) -> HelmChart:
+        if self.chart_renderer:
+            self.chart_renderer.render(
+                options.get('release', id),
+                options.get('chart'),
+                options.get('version'),
+                options.get('namespace', 'default'),
+                options.get('values', {}),
+            )
+        if self.chart_archives:
+            options = self.chart_archives.chart_options(options)
+        return HelmChart(self.scope, f"chart-{id}", cluster=self.cluster, **options)
+
+    def add_service_account(self, id: str, **options) -> AddonsServiceAccount:
+        return AddonsServiceAccount(self.scope, id, cluster=self, **options)
+
+    def __getattr__(self, name: str):
+        return getattr(self.cluster, name)
+
+
+class AddonsStack(BaseStack):
+    """
+    Sibling stack of the EKS stack hosting a group of add-ons, keeping the cluster template small.
+
+    Add-ons stacks depend on the EKS stack (kubectl provider, OIDC provider), charts creating ServiceMonitors also
+    on the monitoring stack (prometheus-operator CRDs, see `Monitoring`) and external-dns on the route53 stack
+    (hosted zones). Nothing depends back on an add-ons stack: service accounts, their roles and the charts
+    using them are all in the add-ons stack.
+    """
+    BASE = 'base'
+    MONITORING = 'monitoring'
+    LOGGING = 'logging'
+    DNS = 'dns'
+
+    def __init__(self, scope: BaseApp, id: str, cluster: Cluster, chart_renderer: Optional[ChartRenderer] = None,
+                 chart_archives: Optional[ChartArchives] = None, **kwargs) -> None:
+        super().__init__(scope, id, **kwargs)
+        self.__cluster = AddonsCluster(self, cluster, chart_renderer, chart_archives)
+
+    @property
+    def cluster(self) -> Cluster:
+        return self.__cluster
+
+    @classmethod
+    def addons_cluster(cls, scope: BaseApp, cluster: Cluster, group: str,
+                       chart_renderer: Optional[ChartRenderer] = None,
+                       chart_archives: Optional[ChartArchives] = None) -> Cluster:
+        """
+        The cluster to add a group of add-ons to: add-ons go in their own stack when `eks.addonsStacks` is enabled,
+        in the cluster otherwise. Either way their charts get rendered and validated at synth, and installed from
+        the vendored archives.
+
+        :param scope:
+        :param cluster:
+        :param group:
+        :param chart_renderer:
+        :param chart_archives:
+        :return:
+        """
+        if not scope.environment_config.get('eks', {}).get('addonsStacks', {}).get('enabled'):
+            return AddonsCluster(cluster, cluster, chart_renderer, chart_archives)
+
+        return cls(
+            scope,
+            f'EKS-{group}',
+            cluster=cluster,
+            chart_renderer=chart_renderer,
+            chart_archives=chart_archives,
+        ).cluster
@@ -0,0 +1,191 @@
+import hashlib
+import json
+import os
+import subprocess
+from typing import Dict, Optional
+
+from aws_cdk.aws_lambda import LayerVersion, Code, CfnFunction
+from aws_cdk.core import Stack
+
+
+class ChartArchives:
+    """
+    Vendored charts archives: `charts.json` lists the charts to vendor with their version and repository,
+    `make vendor-charts` downloads them and pins them by digest in `charts.lock.json`.
+
+    The archives are uploaded as a CDK asset, a Lambda layer of the kubectl handler, and the releases get installed
+    from the layer: deploys don't depend on the remote repositories and always install the same charts.
+    """
+    CHARTS_FILE = 'charts.json'
+    LOCK_FILE = 'charts.lock.json'
+    LAYER_PATH = '/opt'
+    KUBECTL_PROVIDER_ID = '@aws-cdk/aws-eks.KubectlProvider'
+    HELM_COMMAND = 'helm'
+
+    def __init__(self, config: dict) -> None:
+        """
+        :param config: The `eks.vendoredCharts` configuration
+        """
+        self.enabled = bool(config.get('enabled'))
+        self.directory: str = config.get('directory')
+        self._charts: Optional[Dict[str, dict]] = None
+        self._lock: Optional[Dict[str, dict]] = None
+
+    @property
+    def charts(self) -> Dict[str, dict]:
+        """
+        Charts to vendor by name, with their `version` and `repository`
+
+        :return:
+        """
+        if self._charts is None:
+            self._charts = self._load(self.CHARTS_FILE)
+
+        return self._charts
+
+    @property
+    def lock(self) -> Dict[str, dict]:
+        """
+        Vendored charts by name, with their `version`, `repository` and `digest`
+
+        :return:
+        """
+        if self._lock is None:
+            lock = self._load(self.LOCK_FILE)
+            for chart, locked in lock.items():
+                if not locked.get('digest'):
+                    raise ValueError(
+                        f"Chart {chart} {locked.get('version')} has no digest in {self.LOCK_FILE}, "
+                        f"run `make vendor-charts`"
+                    )
+            self._lock = lock
+
+        return self._lock
+
+    def archive_name(self, chart: str, version: str) -> str:
+        """
+        Archive file name, as `helm pull` names it
+
+        :param chart:
+        :param version:
+        :return:
+        """
+        return f"{chart}-{version}.tgz"
+
+    def archive_path(self, chart: str, version: str) -> str:
+        """
+        Verified local archive of the chart
+
+        :param chart:
+        :param version:
+        :return:
+        """
+        listed_version = self.charts.get(chart, {}).get('version')
+        if listed_version != version:
+            raise ValueError(
+                f"Chart {chart} {version} is not in {self.CHARTS_FILE} (listed version: {listed_version}), "
+                f"run `make vendor-charts CHART={chart} VERSION={version} REPOSITORY=<repository>`"
+            )
+
+        locked = self.lock.get(chart, {})
+        path = os.path.join(self.directory, self.archive_name(chart, version))
+        if locked.get('version') != version or not os.path.exists(path):
+            raise ValueError(f"Chart {chart} {version} is not vendored, run `make vendor-charts`")
+        if self.digest(path) != locked.get('digest'):
+            raise ValueError(f"Chart {chart} {version} archive doesn't match the locked digest")
+
+        return path
+
+    def chart_options(self, options: dict) -> dict:
+        """
+        `add_chart` options installing the chart from the kubectl handler layer
+
+        :param options:
+        :return:
+        """
+        if not self.enabled:
+            return options
+
+        self.archive_path(options.get('chart'), options.get('version'))
+        chart_options = {key: value for key, value in options.items() if key not in ['repository', 'version']}
+        chart_options['chart'] = f"{self.LAYER_PATH}/{self.archive_name(options.get('chart'), options.get('version'))}"
+
+        return chart_options
+
+    def attach(self, cluster_stack: Stack) -> None:
+        """
+        Adds the archives layer to the kubectl handler, which the cluster creates in its stack with the first
+        Kubernetes resource or chart
+
+        :param cluster_stack:
+        :return:
+        """
+        if not self.enabled:
+            return
+
+        provider = cluster_stack.node.try_find_child(self.KUBECTL_PROVIDER_ID)
+        if not provider:
+            return
+
+        layer = LayerVersion(
+            provider,
+            'charts-layer',
+            code=Code.from_asset(self.directory, exclude=[self.CHARTS_FILE, self.LOCK_FILE]),
+            description='Vendored Helm charts',
+        )
+        handler: CfnFunction = provider.node.find_child('Handler').node.default_child
+        # Appended to the kubectl layer
+        handler.add_property_override('Layers.1', layer.layer_version_arn)
+
+    def vendor(self, chart: Optional[str] = None, version: Optional[str] = None,
+               repository: Optional[str] = None) -> None:
+        """
+        Downloads the charts missing from the directory and locks them with their digests, a chart given with its
+        version and repository gets added to (or updated in) the charts to vendor first. Digests already locked
+        for the same version and repository are verified.
+
+        :param chart:
+        :param version:
+        :param repository:
+        :return:
+        """
+        if chart:
+            self.charts[chart] = {"version": version, "repository": repository}
+            self._dump(self.CHARTS_FILE, self.charts)
+
+        lock = {}
+        for name, requested in sorted(self.charts.items()):
+            path = os.path.join(self.directory, self.archive_name(name, requested.get('version')))
+            if not os.path.exists(path):
+                subprocess.run(
+                    [self.HELM_COMMAND, 'pull', name, '--repo', requested.get('repository'),
+                     '--version', requested.get('version'), '--destination', self.directory],
+                    check=True,
+                )
+            digest = self.digest(path)
+            locked = self.lock.get(name, {})
+            relocked = [locked.get('version'), locked.get('repository')] != \
+                [requested.get('version'), requested.get('repository')]
+            if not relocked and locked.get('digest') != digest:
+                raise ValueError(f"Chart {name} {requested.get('version')} archive doesn't match the locked digest")
+            lock[name] = {**requested, "digest": digest}
+
+        self._dump(self.LOCK_FILE, lock)
+        self._lock = lock
+
+    def _load(self, file_name: str) -> Dict[str, dict]:
+        try:
+            with open(os.path.join(self.directory, file_name)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _dump(self, file_name: str, content: Dict[str, dict]) -> None:
+        with open(os.path.join(self.directory, file_name), 'w') as f:
+            json.dump(content, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+    @staticmethod
+    def digest(path: str) -> str:
+        with open(path, 'rb') as f:
+            return f"sha256:{hashlib.sha256(f.read()).hexdigest()}"
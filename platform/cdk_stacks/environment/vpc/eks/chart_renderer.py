@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+import subprocess
+from typing import List, Optional
+
+from cdk_stacks.environment.vpc.eks.chart_archives import ChartArchives
+
+
+class ChartRenderer:
+    """
+    Renders the add-ons charts at synth with `helm template`, from the vendored charts, and validates the rendered
+    manifests against the Kubernetes schemas with kubeval: a bad chart configuration fails the synth instead of
+    the kubectl Lambda, after a slow deploy and rollback.
+    Rendered manifests are cached by values hash, unchanged releases aren't rendered nor validated again.
+    """
+    HELM_COMMAND = 'helm'
+    KUBEVAL_COMMAND = 'kubeval'
+
+    def __init__(self, config: dict, kubernetes_version: str, chart_archives: ChartArchives) -> None:
+        """
+        :param config: The `eks.chartRendering` configuration
+        :param kubernetes_version: The cluster version, manifests are validated against its schemas
+        :param chart_archives: The vendored charts
+        """
+        self.enabled = bool(config.get('enabled'))
+        self.chart_archives = chart_archives
+        self.cache_directory: str = config.get('cacheDirectory')
+        self.schema_location: Optional[str] = config.get('schemaLocation')
+        self.strict = bool(config.get('strict'))
+        self.kubernetes_version = kubernetes_version
+
+    def render(self, release: str, chart: str, version: str, namespace: str, values: dict) -> Optional[str]:
+        """
+        Renders and validates a release. Values may contain unresolved tokens (e.g. IAM roles ARNs), they get
+        rendered as placeholder strings.
+
+        :param release:
+        :param chart:
+        :param version:
+        :param namespace:
+        :param values:
+        :return: The rendered manifests, None when rendering is disabled
+        """
+        if not self.enabled:
+            return None
+
+        values_hash = self.values_hash(chart, version, namespace, values)
+        cache_file = os.path.join(self.cache_directory, f"{release}-{values_hash}.yaml")
+        if os.path.exists(cache_file):
+            with open(cache_file) as f:
+                return f.read()
+
+        chart_path = self.chart_archives.archive_path(chart, version)
+        manifests = self._run(
+            [self.HELM_COMMAND, 'template', release, chart_path, '--namespace', namespace, '--values', '-'],
+            json.dumps(values, default=str),
+            f"Release {release} ({chart} {version}) can't be rendered",
+        )
+        self._run(
+            [
+                self.KUBEVAL_COMMAND,
+                '--kubernetes-version', f"{self.kubernetes_version}.0",
+                '--ignore-missing-schemas',  # Custom resources
+                *(['--strict'] if self.strict else []),
+                *(['--schema-location', self.schema_location] if self.schema_location else []),
+            ],
+            manifests,
+            f"Release {release} ({chart} {version}) manifests are invalid",
+        )
+
+        os.makedirs(self.cache_directory, exist_ok=True)
+        with open(cache_file, 'w') as f:
+            f.write(manifests)
+
+        return manifests
+
+    def values_hash(self, chart: str, version: str, namespace: str, values: dict) -> str:
+        """
+        Hash of everything the rendered and validated manifests depend on
+
+        :param chart:
+        :param version:
+        :param namespace:
+        :param values:
+        :return:
+        """
+        return hashlib.sha256(json.dumps(
+            [
+                chart,
+                version,
+                self.chart_archives.lock.get(chart, {}).get('digest'),
+                namespace,
+                values,
+                self.kubernetes_version,
+                self.strict,
+            ],
+            sort_keys=True,
+            default=str,
+        ).encode()).hexdigest()[:16]
+
+    @staticmethod
+    def _run(command: List[str], stdin: str, error: str) -> str:
+        result = subprocess.run(command, input=stdin, capture_output=True, text=True)
+        if result.returncode:
+            raise ValueError(f"{error}:\n{result.stdout}{result.stderr}")
+
+        return result.stdout
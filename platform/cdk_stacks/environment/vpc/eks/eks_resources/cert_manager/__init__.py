@@ -1,6 +1,8 @@
 from aws_cdk.aws_eks import Cluster
 
 from cdk_stacks.environment.vpc.eks.eks_resources.manifest_generator import ManifestGenerator
+from cdk_stacks.environment.vpc.eks.image_cache import ImageCache
+from cdk_stacks.environment.vpc.eks.monitoring import Monitoring
 
 
 class CertManager:
@@ -11,11 +13,14 @@ class CertManager:
     HELM_REPOSITORY = 'https://charts.jetstack.io'
 
     @classmethod
-    def add_to_cluster(cls, cluster: Cluster) -> None:
+    def add_to_cluster(cls, cluster: Cluster, config: dict, image_cache: ImageCache, monitoring: Monitoring) -> None:
         """
         Deploys cert-manager into the EKS cluster
 
         :param cluster:
+        :param config: The `eks.certManager` configuration
+        :param image_cache:
+        :param monitoring:
         :return:
         """
         resource = ManifestGenerator.namespace_resource('cert-manager')
@@ -42,6 +47,7 @@ class CertManager:
             namespace=resource.get('metadata', {}).get('name'),
         )
         webhook_sa.node.add_dependency(namespace)
+        webhook_config = config.get('webhook', {})
 
         chart = cluster.add_chart(
             "helm-chart-cert-manager",
@@ -57,24 +63,80 @@ class CertManager:
                     },
                 },
                 "installCRDs": True,
+                "prometheus": {
+                    "enabled": True,
+                    "servicemonitor": {
+                        "enabled": monitoring.enabled,
+                        "interval": monitoring.interval,
+                    },
+                },
+                "image": {
+                    "repository": image_cache.repository("quay.io/jetstack/cert-manager-controller"),
+                },
+                "extraArgs": [
+                    f"--max-concurrent-challenges={config.get('maxConcurrentChallenges')}",
+                    f"--kube-api-qps={config.get('kubeApiQps')}",
+                    f"--kube-api-burst={config.get('kubeApiBurst')}",
+                ],
+                "resources": config.get('resources'),
                 "serviceAccount": {
                     "create": False,
                     "name": sa.service_account_name,
                 },
                 "cainjector": {
+                    "image": {
+                        "repository": image_cache.repository("quay.io/jetstack/cert-manager-cainjector"),
+                    },
                     "serviceAccount": {
                         "create": False,
                         "name": injector_sa.service_account_name
                     },
                 },
                 "webhook": {
+                    "image": {
+                        "repository": image_cache.repository("quay.io/jetstack/cert-manager-webhook"),
+                    },
                     "serviceAccount": {
                         "create": False,
-                        "name": injector_sa.service_account_name
+                        "name": webhook_sa.service_account_name
                     },
+                    # Every certificate resource goes through the webhook, keep it highly available
+                    "replicaCount": webhook_config.get('replicas'),
+                    "affinity": cls._spread_replicas('webhook'),
+                    "hostNetwork": bool(webhook_config.get('hostNetwork')),
+                    "securePort": webhook_config.get('securePort'),
+                    "resources": webhook_config.get('resources'),
                 },
             },
         )
         chart.node.add_dependency(sa)
         chart.node.add_dependency(injector_sa)
         chart.node.add_dependency(webhook_sa)
+        monitoring.watch(chart)
+
+    @classmethod
+    def _spread_replicas(cls, component: str) -> dict:
+        """
+        Prefers scheduling the component replicas on different nodes
+
+        :param component:
+        :return:
+        """
+        return {
+            "podAntiAffinity": {
+                "preferredDuringSchedulingIgnoredDuringExecution": [
+                    {
+                        "weight": 100,
+                        "podAffinityTerm": {
+                            "topologyKey": "kubernetes.io/hostname",
+                            "labelSelector": {
+                                "matchLabels": {
+                                    "app.kubernetes.io/name": component,
+                                    "app.kubernetes.io/instance": "cert-manager",
+                                },
+                            },
+                        },
+                    },
+                ],
+            },
+        }
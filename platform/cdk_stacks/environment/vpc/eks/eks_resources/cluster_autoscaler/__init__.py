@@ -4,6 +4,8 @@ from aws_cdk.aws_eks import Cluster
 from aws_cdk.aws_iam import Role, PolicyStatement, Effect
 
 from cdk_stacks.environment.vpc.eks.eks_resources.manifest_generator import ManifestGenerator
+from cdk_stacks.environment.vpc.eks.image_cache import ImageCache
+from cdk_stacks.environment.vpc.eks.monitoring import Monitoring
 
 
 class ClusterAutoscaler:
@@ -11,14 +13,20 @@ class ClusterAutoscaler:
     https://github.com/helm/charts/tree/master/stable/cluster-autoscaler
     """
     HELM_REPOSITORY = 'https://kubernetes-charts.storage.googleapis.com/'
+    # Names the chart resources, the metrics Service included, hence the Prometheus `job` label of its metrics
+    # (`<release>-aws-cluster-autoscaler` otherwise)
+    FULLNAME = 'cluster-autoscaler'
 
     @classmethod
-    def add_to_cluster(cls, cluster: Cluster, kubernetes_version: str) -> None:
+    def add_to_cluster(cls, cluster: Cluster, kubernetes_version: str, image_cache: ImageCache,
+                       monitoring: Monitoring) -> None:
         """
         Deploys into the EKS cluster the kubernetes cluster autoscaler
 
         :param cluster:
         :param kubernetes_version:
+        :param image_cache:
+        :param monitoring:
         :return:
         """
         resource = ManifestGenerator.namespace_resource('cluster-autoscaler')
@@ -43,15 +51,16 @@ class ClusterAutoscaler:
             repository=cls.HELM_REPOSITORY,
             version="7.3.3",
             values={
+                "fullnameOverride": cls.FULLNAME,
                 "autoDiscovery": {
                     "clusterName": cluster.cluster_name,
                 },
                 "cloudProvider": "aws",
                 "awsRegion": cluster.vpc.stack.region,
                 "image": {
-                    "repository": "eu.gcr.io/k8s-artifacts-prod/autoscaling/cluster-autoscaler",
+                    "repository": image_cache.repository("registry.k8s.io/autoscaling/cluster-autoscaler"),
                     "tag": cls._get_cluster_autoscaler_version(kubernetes_version),
-                    "pullPolicy": "Always",
+                    "pullPolicy": "IfNotPresent",
                 },
                 "extraArgs": {
                     "balance-similar-node-groups": "true"
@@ -64,9 +73,11 @@ class ClusterAutoscaler:
                     },
                     "pspEnabled": True,
                 },
+                "serviceMonitor": monitoring.service_monitor(sa.service_account_namespace),
             },
         )
         chart.node.add_dependency(sa)
+        monitoring.watch(chart)
 
     @classmethod
     def _get_cluster_autoscaler_version(cls, kubernetes_version: str) -> str:
@@ -2,28 +2,47 @@ from enum import Enum
 
 from aws_cdk.aws_eks import Cluster, ServiceAccount
 from aws_cdk.aws_iam import Role, PolicyStatement, Effect
+from aws_cdk.aws_route53 import IHostedZone
 
 from cdk_stacks.environment.vpc.eks.eks_resources.manifest_generator import ManifestGenerator
+from cdk_stacks.environment.vpc.eks.image_cache import ImageCache
+from cdk_stacks.environment.vpc.eks.monitoring import Monitoring
 
 
 class ExternalDns:
     """
     https://github.com/bitnami/charts/tree/master/bitnami/external-dns
     https://github.com/kubernetes-sigs/external-dns/blob/master/docs/tutorials/istio.md
+
+    Every sync lists the records of the managed zones, Route53 API is throttled at 5 requests per second per account:
+    https://github.com/kubernetes-sigs/external-dns/blob/master/docs/tutorials/aws.md#throttling
     """
     HELM_REPOSITORY = 'https://charts.bitnami.com/bitnami'
+    CHART_VERSION = '3.2.3'
+
+    # Settings whose flags are newer than the external-dns release of the chart: they need `imageTag`, or the pod
+    # crash-loops on the unknown flag
+    NEWER_RELEASE_ARGS = {
+        'zonesCacheDuration': 'aws-zones-cache-duration',
+        'minEventSyncInterval': 'min-event-sync-interval',
+    }
 
     class ZoneType(Enum):
         PUBLIC = 'public'
         PRIVATE = 'private'
 
     @classmethod
-    def add_to_cluster(cls, cluster: Cluster, zone_type: ZoneType) -> None:
+    def add_to_cluster(cls, cluster: Cluster, zone_type: ZoneType, zone: IHostedZone, config: dict,
+                       image_cache: ImageCache, monitoring: Monitoring) -> None:
         """
         Deploys into the EKS cluster the external secrets manager
 
         :param cluster:
         :param zone_type:
+        :param zone: The only hosted zone managed by this instance
+        :param config: The `dns.externalDns` configuration
+        :param image_cache:
+        :param monitoring:
         :return:
         """
         namespace = f"external-dns-{zone_type.value}"
@@ -39,20 +58,38 @@ class ExternalDns:
             namespace=resource.get('metadata', {}).get('name'),
         )
         sa.node.add_dependency(ns)
-        cls.attach_iam_policies_to_role(sa.role)
+        cls.attach_iam_policies_to_role(sa.role, zone)
 
-        cls._create_chart_release(cluster, sa, zone_type)
+        cls._create_chart_release(cluster, sa, zone_type, zone, config, image_cache, monitoring)
 
     @classmethod
-    def _create_chart_release(cls, cluster: Cluster, service_account: ServiceAccount, zone_type: ZoneType) -> None:
+    def _create_chart_release(cls, cluster: Cluster, service_account: ServiceAccount, zone_type: ZoneType,
+                              zone: IHostedZone, config: dict, image_cache: ImageCache,
+                              monitoring: Monitoring) -> None:
+        extra_args = {"aws-batch-change-size": config.get('batchChangeSize')}
+        for setting, arg in cls.NEWER_RELEASE_ARGS.items():
+            if config.get(setting) is None:
+                continue
+            if not config.get('imageTag'):
+                raise ValueError(
+                    f"`dns.externalDns.{setting}` needs an external-dns release newer than the one of the chart "
+                    f"{cls.CHART_VERSION}: set `dns.externalDns.imageTag`"
+                )
+            extra_args[arg] = config.get(setting)
+
+        image = {"tag": config.get('imageTag')} if config.get('imageTag') else {}
         chart = cluster.add_chart(
             f"helm-chart-external-dns-{zone_type.value}",
             release=f"ext-dns-{zone_type.value}",
             chart="external-dns",
             namespace=service_account.service_account_namespace,
             repository=cls.HELM_REPOSITORY,
-            version="3.2.3",
+            version=cls.CHART_VERSION,
             values={
+                "global": {
+                    "imageRegistry": image_cache.registry("docker.io"),
+                },
+                "image": image,
                 "aws": {
                     "region": cluster.vpc.stack.region,
                     "zoneType": zone_type.value,
@@ -61,6 +98,10 @@ class ExternalDns:
                     # ],
                 },
                 "policy": "sync",
+                "interval": config.get('interval'),
+                "triggerLoopOnEvent": bool(config.get('triggerLoopOnEvent')),
+                "zoneIdFilters": [zone.hosted_zone_id],
+                "extraArgs": extra_args,
                 "serviceAccount": {
                     "name": service_account.service_account_name,
                     "create": False,
@@ -79,19 +120,21 @@ class ExternalDns:
                 "replicas": 1,
                 "metrics": {
                     "enabled": True,
+                    "serviceMonitor": monitoring.service_monitor(service_account.service_account_namespace),
                 },
                 "annotationFilter": f"external-dns-route53-{zone_type.value}=true",
             },
         )
         chart.node.add_dependency(service_account)
+        monitoring.watch(chart)
 
     @classmethod
-    def attach_iam_policies_to_role(cls, role: Role):
+    def attach_iam_policies_to_role(cls, role: Role, zone: IHostedZone):
         """
-        Attach the necessary policies to read secrets from SSM and SecretsManager
+        Attach the necessary policies to manage the records of the zone
 
         :param role:
-        :param zone_id:
+        :param zone:
         :return:
         """
         # TODO: Extract this in a managed policy
@@ -104,7 +147,7 @@ class ExternalDns:
             ],
         )
         route53_recordset_policy = PolicyStatement(
-            resources=["arn:aws:route53:::hostedzone/*"],  # To be restricted to interested zone
+            resources=[f"arn:aws:route53:::hostedzone/{zone.hosted_zone_id}"],
             effect=Effect.ALLOW,
             actions=[
                 "route53:ChangeResourceRecordSets",
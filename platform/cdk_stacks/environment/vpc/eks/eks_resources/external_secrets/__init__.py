@@ -2,6 +2,8 @@ from aws_cdk.aws_eks import Cluster
 from aws_cdk.aws_iam import Role, PolicyStatement, Effect, ManagedPolicy
 
 from cdk_stacks.environment.vpc.eks.eks_resources.manifest_generator import ManifestGenerator
+from cdk_stacks.environment.vpc.eks.image_cache import ImageCache
+from cdk_stacks.environment.vpc.eks.monitoring import Monitoring
 
 
 class ExternalSecrets:
@@ -12,11 +14,14 @@ class ExternalSecrets:
     HELM_REPOSITORY = 'https://godaddy.github.io/kubernetes-external-secrets/'
 
     @classmethod
-    def add_to_cluster(cls, cluster: Cluster) -> None:
+    def add_to_cluster(cls, cluster: Cluster, config: dict, image_cache: ImageCache, monitoring: Monitoring) -> None:
         """
         Deploys into the EKS cluster the external secrets manager
 
         :param cluster:
+        :param config: The `eks.externalSecrets` configuration
+        :param image_cache:
+        :param monitoring:
         :return:
         """
         resource = ManifestGenerator.namespace_resource('external-secrets')
@@ -41,9 +46,19 @@ class ExternalSecrets:
             repository=cls.HELM_REPOSITORY,
             version="4.0.0",
             values={
+                "image": {
+                    "repository": image_cache.repository("godaddy/kubernetes-external-secrets"),
+                },
                 "customResourceManagerDisabled": True,
                 "env": {
                     "AWS_REGION": cluster.vpc.stack.region,
+                    # Use the regional STS endpoint, reachable through the VPC endpoint
+                    "AWS_STS_REGIONAL_ENDPOINTS": "regional",
+                    # Every poll calls the backend API once per secret key
+                    "POLLER_INTERVAL_MILLISECONDS": config.get('pollerIntervalSeconds') * 1000,
+                    "WATCH_TIMEOUT": config.get('watchTimeoutSeconds') * 1000,
+                    **({"WATCHED_NAMESPACES": ",".join(config.get('watchedNamespaces'))}
+                       if config.get('watchedNamespaces') else {}),
                 },
                 "rbac": {
                     "create": True,
@@ -52,9 +67,11 @@ class ExternalSecrets:
                         "create": False,
                     },
                 },
+                "serviceMonitor": monitoring.service_monitor(sa.service_account_namespace),
             },
         )
         chart.node.add_dependency(sa)
+        monitoring.watch(chart)
 
     @classmethod
     def attach_iam_policies_to_role(cls, role: Role):
@@ -0,0 +1,164 @@
+import heapq
+import math
+from typing import Dict, List
+
+
+class StandInBackend:
+    """
+    Local stand-in of a secrets backend API: requests are throttled with a token bucket, as AWS APIs do.
+    """
+
+    def __init__(self, rate_limit: float, burst: int) -> None:
+        """
+        :param rate_limit: Requests per second
+        :param burst: Bucket size
+        """
+        self.rate_limit = rate_limit
+        self.burst = burst
+        self.tokens = float(burst)
+        self.last_request_at = 0.0
+        self.requests = 0
+        self.throttled = 0
+
+    def get_secret_value(self, at: float) -> bool:
+        """
+        Serves a request at the given (simulated) time
+
+        :param at: Seconds from the simulation start
+        :return: False if the request got throttled
+        """
+        self.tokens = min(self.burst, self.tokens + (at - self.last_request_at) * self.rate_limit)
+        self.last_request_at = at
+        self.requests += 1
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+
+        self.throttled += 1
+        return False
+
+
+class SecretSyncPlanner:
+    """
+    Simulates kubernetes-external-secrets polling against the backends API rate limits.
+
+    Every ExternalSecret has its own poller, fetching all its keys every `pollerIntervalSeconds`. Pollers start
+    together when the controller starts, a throttled request is retried by the AWS SDK with exponential backoff,
+    and a failed poll is only retried at the next interval.
+    https://github.com/godaddy/kubernetes-external-secrets#backends
+    """
+    BACKENDS = ['secretsManager', 'systemManager']
+
+    # AWS JavaScript SDK default retries: 3, with a 100ms exponential backoff base
+    SDK_RETRY_DELAYS = [0.1, 0.2, 0.4]
+
+    def __init__(self, config: dict) -> None:
+        """
+        :param config: The `eks.externalSecrets` configuration
+        """
+        self.config = config
+        self._validate_config()
+
+    def _validate_config(self) -> None:
+        """
+        Fails on settings the simulation can't run with: pollers that never wait would never let the clock advance
+
+        :return:
+        """
+        for setting in ['pollerIntervalSeconds', 'maxSyncDelaySeconds']:
+            if not self.config.get(setting) or self.config.get(setting) <= 0:
+                raise ValueError(f"`eks.externalSecrets.{setting}` must be positive")
+        for backend_name in self.BACKENDS:
+            backend_config = self.config.get('backends', {}).get(backend_name, {})
+            if not backend_config.get('externalSecrets'):
+                continue
+            for setting in ['rateLimit', 'burst']:
+                if not backend_config.get(setting) or backend_config.get(setting) <= 0:
+                    raise ValueError(f"`eks.externalSecrets.backends.{backend_name}.{setting}` must be positive")
+
+    def simulate(self, backend_name: str) -> Dict[str, float]:
+        """
+        Polls the stand-in backend for the simulation duration
+
+        :param backend_name:
+        :return: Backend requests, throttled requests and the longest time a secret went without a successful poll
+        """
+        backend_config = self.config.get('backends', {}).get(backend_name, {})
+        backend = StandInBackend(backend_config.get('rateLimit'), backend_config.get('burst'))
+        secrets = backend_config.get('externalSecrets') or 0
+        keys = backend_config.get('keysPerSecret') or 1
+        interval = self.config.get('pollerIntervalSeconds')
+        duration = self.simulation_seconds()
+
+        events = []
+        for secret in range(secrets):
+            poll_at = self.config.get('startupSpreadSeconds', 0) * secret / secrets
+            while poll_at < duration:
+                for key in range(keys):
+                    heapq.heappush(events, (poll_at, secret, key, poll_at, 0))
+                poll_at += interval
+
+        resolved_keys: Dict[tuple, int] = {}
+        failed_polls = set()
+        synced_at: Dict[int, List[float]] = {secret: [] for secret in range(secrets)}
+        while events:
+            at, secret, key, poll_at, attempt = heapq.heappop(events)
+            poll = (secret, poll_at)
+            if not backend.get_secret_value(at):
+                if attempt < len(self.SDK_RETRY_DELAYS):
+                    heapq.heappush(events, (at + self.SDK_RETRY_DELAYS[attempt], secret, key, poll_at, attempt + 1))
+                    continue
+                failed_polls.add(poll)
+
+            resolved_keys[poll] = resolved_keys.get(poll, 0) + 1
+            if resolved_keys[poll] == keys and poll not in failed_polls:
+                synced_at[secret].append(at)
+
+        max_sync_gap = 0.0
+        for sync_times in synced_at.values():
+            checkpoints = [0.0] + sorted(sync_times) + [duration]
+            max_sync_gap = max([max_sync_gap] + [end - start for start, end in zip(checkpoints, checkpoints[1:])])
+
+        return {
+            'requests': backend.requests,
+            'throttled': backend.throttled,
+            'max_sync_gap': max_sync_gap,
+        }
+
+    def simulation_seconds(self) -> float:
+        return max(3 * self.config.get('maxSyncDelaySeconds'), 4 * self.config.get('pollerIntervalSeconds'))
+
+    def plan(self) -> List[dict]:
+        """
+        Average load and simulated sync delay of every backend
+
+        :return:
+        """
+        report = []
+        for backend_name in self.BACKENDS:
+            backend_config = self.config.get('backends', {}).get(backend_name, {})
+            keys = (backend_config.get('externalSecrets') or 0) * (backend_config.get('keysPerSecret') or 1)
+            report.append({
+                'backend': backend_name,
+                'keys': keys,
+                'average_rate': keys / self.config.get('pollerIntervalSeconds'),
+                'rate_limit': backend_config.get('rateLimit'),
+                **self.simulate(backend_name),
+            })
+
+        return report
+
+    def validate(self) -> None:
+        """
+        Fails when a secret rotation could take longer than `maxSyncDelaySeconds` to reach the cluster
+
+        :return:
+        """
+        for backend in self.plan():
+            if backend['max_sync_gap'] > self.config.get('maxSyncDelaySeconds'):
+                raise ValueError(
+                    f"external-secrets would take up to {math.ceil(backend['max_sync_gap'])}s to sync "
+                    f"{backend['backend']} secrets ({backend['throttled']} of {backend['requests']} requests throttled), "
+                    f"the maximum is {self.config.get('maxSyncDelaySeconds')}s: review "
+                    f"`eks.externalSecrets.pollerIntervalSeconds`, `startupSpreadSeconds` or the backend `rateLimit`"
+                )
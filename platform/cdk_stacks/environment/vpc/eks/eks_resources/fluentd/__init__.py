@@ -1,5 +1,8 @@
 from aws_cdk.aws_eks import Cluster
 
+from cdk_stacks.environment.vpc.eks.image_cache import ImageCache
+from cdk_stacks.environment.vpc.eks.monitoring import Monitoring
+
 
 class Fluentd:
     """
@@ -8,11 +11,13 @@ class Fluentd:
     HELM_REPOSITORY = 'https://charts.bitnami.com/bitnami'
 
     @classmethod
-    def add_to_cluster(cls, cluster: Cluster) -> None:
+    def add_to_cluster(cls, cluster: Cluster, image_cache: ImageCache, monitoring: Monitoring) -> None:
         """
         Deploys into the EKS cluster the external secrets manager
 
         :param cluster:
+        :param image_cache:
+        :param monitoring:
         :return:
         """
         # namespace = "fluentd"
@@ -28,14 +33,16 @@ class Fluentd:
         #     namespace=resource.get('metadata', {}).get('name'),
         # )
         # sa.node.add_dependency(ns)
-        cls._create_chart_release(cluster)
+        cls._create_chart_release(cluster, image_cache, monitoring)
 
     @classmethod
     def _create_chart_release(
             cls,
             cluster: Cluster,
+            image_cache: ImageCache,
+            monitoring: Monitoring,
     ) -> None:
-        cluster.add_chart(
+        chart = cluster.add_chart(
             "helm-chart-fluentd",
             release="fluentd",
             chart="fluentd",
@@ -43,6 +50,9 @@ class Fluentd:
             repository=cls.HELM_REPOSITORY,
             version="1.2.7",
             values={
+                "global": {
+                    "imageRegistry": image_cache.registry("docker.io"),
+                },
                 "aggregator": {
                     "replicaCount": 1,
                 },
@@ -51,6 +61,8 @@ class Fluentd:
                 },
                 "metrics": {
                     "enabled": True,
+                    "serviceMonitor": monitoring.service_monitor("fluentd"),
                 },
             },
         )
+        monitoring.watch(chart)
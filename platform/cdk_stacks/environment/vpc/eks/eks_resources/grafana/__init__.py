@@ -1,6 +1,15 @@
-from aws_cdk.aws_eks import Cluster, ServiceAccount
+import json
+from typing import List
 
+import yaml
+from aws_cdk.aws_eks import Cluster, ServiceAccount, KubernetesResource, HelmChart
+
+from cdk_stacks.environment.vpc.eks.eks_resources.grafana.dashboards import PlatformDashboards
+from cdk_stacks.environment.vpc.eks.eks_resources.loki import Loki
 from cdk_stacks.environment.vpc.eks.eks_resources.manifest_generator import ManifestGenerator
+from cdk_stacks.environment.vpc.eks.eks_resources.prometheus_operator import PrometheusOperator
+from cdk_stacks.environment.vpc.eks.image_cache import ImageCache
+from cdk_stacks.environment.vpc.eks.monitoring import Monitoring
 
 
 class Grafana:
@@ -8,14 +17,19 @@ class Grafana:
     https://github.com/bitnami/charts/tree/master/bitnami/grafana
     """
     HELM_REPOSITORY = 'https://charts.bitnami.com/bitnami'
+    DATASOURCES_SECRET = 'grafana-datasources'
+    DASHBOARDS_CONFIG_MAP = 'grafana-platform-dashboards'
 
     @classmethod
-    def add_to_cluster(cls, cluster: Cluster, env_domain: str = 'example.com') -> None:
+    def add_to_cluster(cls, cluster: Cluster, image_cache: ImageCache, monitoring: Monitoring,
+                       env_domain: str = 'example.com') -> None:
         """
         Deploys into the EKS cluster the external secrets manager
 
         :param env_domain:
         :param cluster:
+        :param image_cache:
+        :param monitoring:
         :return:
         """
         namespace = "grafana"
@@ -31,15 +45,69 @@ class Grafana:
             namespace=resource.get('metadata', {}).get('name'),
         )
         sa.node.add_dependency(ns)
-        cls._create_chart_release(cluster, sa, env_domain)
+
+        provisioning = cls._add_provisioning_resources(cluster, namespace)
+        for provisioning_resource in provisioning:
+            provisioning_resource.node.add_dependency(ns)
+
+        chart = cls._create_chart_release(cluster, sa, image_cache, monitoring, env_domain)
+        for provisioning_resource in provisioning:
+            chart.node.add_dependency(provisioning_resource)
+
+    @classmethod
+    def _add_provisioning_resources(cls, cluster: Cluster, namespace: str) -> List[KubernetesResource]:
+        """
+        Creates the datasources pointing to the platform releases and the platform dashboards
+
+        :param cluster:
+        :param namespace:
+        :return:
+        """
+        datasources = {
+            "apiVersion": 1,
+            "datasources": [
+                {
+                    "name": PlatformDashboards.PROMETHEUS_DATASOURCE,
+                    "type": "prometheus",
+                    "access": "proxy",
+                    "url": PrometheusOperator.prometheus_url(),
+                    "isDefault": True,
+                    "editable": False,
+                },
+                {
+                    "name": PlatformDashboards.LOKI_DATASOURCE,
+                    "type": "loki",
+                    "access": "proxy",
+                    "url": Loki.loki_url(),
+                    "editable": False,
+                },
+            ],
+        }
+        datasources_resource = ManifestGenerator.secret_resource(
+            cls.DATASOURCES_SECRET,
+            namespace,
+            {"datasources.yaml": yaml.safe_dump(datasources)},
+        )
+        dashboards_resource = ManifestGenerator.config_map_resource(
+            cls.DASHBOARDS_CONFIG_MAP,
+            namespace,
+            {file_name: json.dumps(dashboard) for file_name, dashboard in PlatformDashboards.all().items()},
+        )
+
+        return [
+            cluster.add_resource(f"{resource.get('kind')}-{resource.get('metadata', {}).get('name')}", resource)
+            for resource in [datasources_resource, dashboards_resource]
+        ]
 
     @classmethod
     def _create_chart_release(
             cls,
             cluster: Cluster,
             service_account: ServiceAccount,
+            image_cache: ImageCache,
+            monitoring: Monitoring,
             env_domain: str,
-    ) -> None:
+    ) -> HelmChart:
         chart = cluster.add_chart(
             "helm-chart-grafana",
             release="grafana",
@@ -48,10 +116,30 @@ class Grafana:
             repository=cls.HELM_REPOSITORY,
             version="3.1.1",
             values={
+                "global": {
+                    "imageRegistry": image_cache.registry("docker.io"),
+                },
                 "serviceAccount": {
                     "create": False,
                     "name": service_account.service_account_name,
                 },
+                "datasources": {
+                    "secretName": cls.DATASOURCES_SECRET,
+                },
+                "dashboardsProvider": {
+                    "enabled": True,
+                },
+                "dashboardsConfigMaps": [
+                    {
+                        "configMapName": cls.DASHBOARDS_CONFIG_MAP,
+                        "fileName": file_name,
+                    }
+                    for file_name in PlatformDashboards.all().keys()
+                ],
+                "metrics": {
+                    "enabled": True,
+                    "serviceMonitor": monitoring.service_monitor(service_account.service_account_namespace),
+                },
                 "ingress": {
                     "enabled": True,
                     "annotations": {
@@ -80,3 +168,6 @@ class Grafana:
             },
         )
         chart.node.add_dependency(service_account)
+        monitoring.watch(chart)
+
+        return chart
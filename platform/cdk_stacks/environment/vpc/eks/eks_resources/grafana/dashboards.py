@@ -0,0 +1,197 @@
+from typing import Dict, List
+
+
+class PlatformDashboards:
+    """
+    Platform performance dashboards, provisioned in Grafana for every environment.
+
+    Dashboards are versioned: bump `VERSION` every time a dashboard changes, Grafana will replace the
+    provisioned dashboard with the new version.
+    https://grafana.com/docs/grafana/latest/reference/dashboard/
+    """
+    VERSION = 1
+    SCHEMA_VERSION = 25
+    PROMETHEUS_DATASOURCE = 'Prometheus'
+    LOKI_DATASOURCE = 'Loki'
+
+    @classmethod
+    def all(cls) -> Dict[str, dict]:
+        """
+        All the platform dashboards, keyed by file name
+
+        :return:
+        """
+        dashboards = [
+            cls.node_saturation(),
+            cls.autoscaler_reaction_time(),
+            cls.pod_start_latency(),
+            cls.dns_latency(),
+            cls.ingress_latency(),
+        ]
+        for dashboard in dashboards:
+            cls.validate(dashboard)
+
+        return {f"{dashboard['uid']}.json": dashboard for dashboard in dashboards}
+
+    @classmethod
+    def node_saturation(cls) -> dict:
+        return cls._dashboard('platform-node-saturation', 'Platform / Node saturation', [
+            cls._panel('CPU utilisation', 'percentunit', {
+                '{{instance}}': '1 - avg by (instance) (rate(node_cpu_seconds_total{mode="idle"}[5m]))',
+            }),
+            cls._panel('Memory utilisation', 'percentunit', {
+                '{{instance}}': '1 - node_memory_MemAvailable_bytes / node_memory_MemTotal_bytes',
+            }),
+            cls._panel('Conntrack table usage', 'percentunit', {
+                '{{instance}}': 'node_nf_conntrack_entries / node_nf_conntrack_entries_limit',
+            }),
+            cls._panel('Root filesystem usage', 'percentunit', {
+                '{{instance}}': '1 - node_filesystem_avail_bytes{mountpoint="/"} '
+                                '/ node_filesystem_size_bytes{mountpoint="/"}',
+            }),
+            cls._panel('Nodes under pressure', 'short', {
+                '{{condition}}': 'sum by (condition) (kube_node_status_condition'
+                                 '{condition=~"DiskPressure|MemoryPressure|PIDPressure",status="true"})',
+            }),
+            cls._panel('Containers CPU throttling', 'percentunit', {
+                '{{namespace}}/{{pod}}': 'sum by (namespace, pod) (rate(container_cpu_cfs_throttled_periods_total[5m])) '
+                                         '/ sum by (namespace, pod) (rate(container_cpu_cfs_periods_total[5m]))',
+            }),
+        ])
+
+    @classmethod
+    def autoscaler_reaction_time(cls) -> dict:
+        return cls._dashboard('platform-autoscaler', 'Platform / Cluster autoscaler reaction time', [
+            cls._panel('Scale up duration (p50/p99)', 's', {
+                'p50': 'histogram_quantile(0.5, sum by (le) '
+                       '(rate(cluster_autoscaler_function_duration_seconds_bucket{function="scaleUp"}[5m])))',
+                'p99': 'histogram_quantile(0.99, sum by (le) '
+                       '(rate(cluster_autoscaler_function_duration_seconds_bucket{function="scaleUp"}[5m])))',
+            }),
+            cls._panel('Unschedulable pods', 'short', {
+                'unschedulable': 'cluster_autoscaler_unschedulable_pods_count',
+            }),
+            cls._panel('Nodes', 'short', {
+                '{{state}}': 'cluster_autoscaler_nodes_count',
+            }),
+            cls._panel('Scale events', 'short', {
+                'scaled up': 'increase(cluster_autoscaler_scaled_up_nodes_total[5m])',
+                'scaled down': 'increase(cluster_autoscaler_scaled_down_nodes_total[5m])',
+                'failed scale ups': 'increase(cluster_autoscaler_failed_scale_ups_total[5m])',
+            }),
+        ])
+
+    @classmethod
+    def pod_start_latency(cls) -> dict:
+        return cls._dashboard('platform-pod-start', 'Platform / Pod start latency', [
+            cls._panel('Pod start duration (p50/p99)', 's', {
+                'p50': 'histogram_quantile(0.5, sum by (le) (rate(kubelet_pod_start_duration_seconds_bucket[5m])))',
+                'p99': 'histogram_quantile(0.99, sum by (le) (rate(kubelet_pod_start_duration_seconds_bucket[5m])))',
+            }),
+            cls._panel('Image pull duration (p99)', 's', {
+                '{{instance}}': 'histogram_quantile(0.99, sum by (le, instance) '
+                                '(rate(kubelet_runtime_operations_duration_seconds_bucket{operation_type="pull_image"}[5m])))',
+            }),
+            cls._panel('Pending pods', 'short', {
+                '{{namespace}}': 'sum by (namespace) (kube_pod_status_phase{phase="Pending"})',
+            }),
+        ])
+
+    @classmethod
+    def dns_latency(cls) -> dict:
+        return cls._dashboard('platform-dns', 'Platform / DNS latency', [
+            cls._panel('CoreDNS request duration (p99)', 's', {
+                '{{server}}': 'histogram_quantile(0.99, sum by (le, server) '
+                              '(rate(coredns_dns_request_duration_seconds_bucket[5m])))',
+            }),
+            cls._panel('CoreDNS responses by rcode', 'reqps', {
+                '{{rcode}}': 'sum by (rcode) (rate(coredns_dns_response_rcode_count_total[5m]))',
+            }),
+            cls._panel('external-dns last sync age', 's', {
+                '{{namespace}}': 'time() - external_dns_controller_last_sync_timestamp_seconds',
+            }),
+        ])
+
+    @classmethod
+    def ingress_latency(cls) -> dict:
+        return cls._dashboard('platform-ingress', 'Platform / Ingress latency', [
+            cls._panel('Ingress gateway request duration (p99)', 'ms', {
+                '{{destination_service}}': 'histogram_quantile(0.99, sum by (le, destination_service) '
+                                           '(rate(istio_request_duration_milliseconds_bucket'
+                                           '{source_workload="istio-ingressgateway"}[5m])))',
+            }),
+            cls._panel('Ingress gateway requests by response code', 'reqps', {
+                '{{response_code}}': 'sum by (response_code) '
+                                     '(rate(istio_requests_total{source_workload="istio-ingressgateway"}[5m]))',
+            }),
+        ])
+
+    @classmethod
+    def validate(cls, dashboard: dict) -> None:
+        """
+        Checks a dashboard model offline, raises ValueError on the first problem found
+
+        :param dashboard:
+        :return:
+        """
+        for key in ['uid', 'title', 'panels', 'schemaVersion', 'version']:
+            if key not in dashboard:
+                raise ValueError(f"Dashboard `{dashboard.get('title')}` misses the `{key}` key")
+
+        if len(dashboard['uid']) > 40:
+            raise ValueError(f"Dashboard uid `{dashboard['uid']}` is longer than 40 characters")
+
+        panel_ids = [panel.get('id') for panel in dashboard['panels']]
+        if len(panel_ids) != len(set(panel_ids)):
+            raise ValueError(f"Dashboard `{dashboard['title']}` has duplicated panel ids")
+
+        for panel in dashboard['panels']:
+            if panel.get('datasource') not in [cls.PROMETHEUS_DATASOURCE, cls.LOKI_DATASOURCE]:
+                raise ValueError(f"Panel `{panel.get('title')}` uses an unknown datasource")
+            if not panel.get('targets'):
+                raise ValueError(f"Panel `{panel.get('title')}` has no targets")
+            for target in panel['targets']:
+                expr = target.get('expr', '')
+                if not expr or expr.count('(') != expr.count(')') or expr.count('{') != expr.count('}'):
+                    raise ValueError(f"Panel `{panel.get('title')}` has an invalid expression: `{expr}`")
+
+    @classmethod
+    def _dashboard(cls, uid: str, title: str, panels: List[dict]) -> dict:
+        for counter, panel in enumerate(panels):
+            panel['id'] = counter + 1
+            panel['gridPos'] = {'h': 8, 'w': 12, 'x': (counter % 2) * 12, 'y': (counter // 2) * 8}
+
+        return {
+            'uid': uid,
+            'title': title,
+            'tags': ['platform'],
+            'editable': False,
+            'schemaVersion': cls.SCHEMA_VERSION,
+            'version': cls.VERSION,
+            'refresh': '30s',
+            'time': {'from': 'now-6h', 'to': 'now'},
+            'panels': panels,
+        }
+
+    @classmethod
+    def _panel(cls, title: str, unit: str, queries: Dict[str, str]) -> dict:
+        """
+        Graph panel
+
+        :param title:
+        :param unit: Grafana unit of the y axis
+        :param queries: PromQL expressions keyed by legend format
+        :return:
+        """
+        return {
+            'type': 'graph',
+            'title': title,
+            'datasource': cls.PROMETHEUS_DATASOURCE,
+            'targets': [
+                {'expr': expr, 'legendFormat': legend, 'refId': chr(ord('A') + counter)}
+                for counter, (legend, expr) in enumerate(queries.items())
+            ],
+            'yaxes': [{'format': unit}, {'format': 'short'}],
+            'lines': True,
+            'linewidth': 1,
+        }
@@ -1,18 +1,36 @@
 from aws_cdk.aws_eks import Cluster
 
+from cdk_stacks.environment.vpc.eks.image_cache import ImageCache
+from cdk_stacks.environment.vpc.eks.monitoring import Monitoring
+from cdk_stacks.environment.vpc.eks.node_tweaks import NodeTweaks
+
 
 class Loki:
     """
     https://github.com/grafana/loki/tree/master/production/helm/loki-stack
     """
     HELM_REPOSITORY = 'https://grafana.github.io/loki/charts'
+    NAMESPACE = 'loki'
+    # Promtail exposes it as `promtail_custom_node_bootstrap_phase_seconds`, with `fleet` and `phase` labels
+    NODE_BOOTSTRAP_METRIC = 'node_bootstrap_phase_seconds'
+
+    @classmethod
+    def loki_url(cls) -> str:
+        """
+        In-cluster URL of the Loki instance created by the release
+
+        :return:
+        """
+        return f"http://loki.{cls.NAMESPACE}.svc.cluster.local:3100"
 
     @classmethod
-    def add_to_cluster(cls, cluster: Cluster) -> None:
+    def add_to_cluster(cls, cluster: Cluster, image_cache: ImageCache, monitoring: Monitoring) -> None:
         """
         Deploys into the EKS cluster Loki stack
 
         :param cluster:
+        :param image_cache:
+        :param monitoring:
         :return:
         """
         # namespace = "loki"
@@ -28,19 +46,86 @@ class Loki:
         #     namespace=resource.get('metadata', {}).get('name'),
         # )
         # sa.node.add_dependency(ns)
-        cls._create_chart_release(cluster)
+        cls._create_chart_release(cluster, image_cache, monitoring)
 
     @classmethod
     def _create_chart_release(
             cls,
             cluster: Cluster,
+            image_cache: ImageCache,
+            monitoring: Monitoring,
     ) -> None:
         chart = cluster.add_chart(
             "helm-chart-loki",
             release="loki",
             chart="loki-stack",
-            namespace="loki",
+            namespace=cls.NAMESPACE,
             repository=cls.HELM_REPOSITORY,
             version="0.38.2",
-            values=None,
+            values={
+                "loki": {
+                    "image": {
+                        "repository": image_cache.repository("grafana/loki"),
+                    },
+                    "serviceMonitor": monitoring.service_monitor(cls.NAMESPACE),
+                },
+                "promtail": {
+                    "image": {
+                        "repository": image_cache.repository("grafana/promtail"),
+                    },
+                    "serviceMonitor": monitoring.service_monitor(cls.NAMESPACE),
+                    **cls._node_bootstrap_values(monitoring.config.get('nodeBootstrapTimings', {})),
+                },
+            },
         )
+        monitoring.watch(chart)
+
+    @classmethod
+    def _node_bootstrap_values(cls, config: dict) -> dict:
+        """
+        Promtail ships the nodes bootstrap timings to Loki and turns them into a histogram: the time elapsed since
+        the instance boot at the end of each phase (the `kubelet` one being the node provisioning latency)
+
+        :param config: The `eks.monitoring.nodeBootstrapTimings` configuration
+        :return:
+        """
+        if not config.get('enabled'):
+            return {}
+
+        return {
+            # The chart defaults, plus the timings directory
+            "volumes": [
+                {"name": "docker", "hostPath": {"path": "/var/lib/docker/containers"}},
+                {"name": "pods", "hostPath": {"path": "/var/log/pods"}},
+                {"name": "node-bootstrap", "hostPath": {"path": NodeTweaks.BOOTSTRAP_TIMINGS_DIRECTORY}},
+            ],
+            "volumeMounts": [
+                {"name": "docker", "mountPath": "/var/lib/docker/containers", "readOnly": True},
+                {"name": "pods", "mountPath": "/var/log/pods", "readOnly": True},
+                {"name": "node-bootstrap", "mountPath": NodeTweaks.BOOTSTRAP_TIMINGS_DIRECTORY, "readOnly": True},
+            ],
+            "extraScrapeConfigs": [
+                {
+                    "job_name": "node-bootstrap",
+                    "static_configs": [{
+                        "targets": ["localhost"],
+                        "labels": {
+                            "job": "node-bootstrap",
+                            "__path__": f"{NodeTweaks.BOOTSTRAP_TIMINGS_DIRECTORY}/*.log",
+                        },
+                    }],
+                    "pipeline_stages": [
+                        {"json": {"expressions": {"fleet": "fleet", "phase": "phase", "since_boot": "since_boot"}}},
+                        {"labels": {"fleet": None, "phase": None}},
+                        {"metrics": {
+                            cls.NODE_BOOTSTRAP_METRIC: {
+                                "type": "Histogram",
+                                "description": "Seconds from the instance boot to the end of the bootstrap phase",
+                                "source": "since_boot",
+                                "config": {"buckets": config.get('buckets')},
+                            },
+                        }},
+                    ],
+                },
+            ],
+        }
@@ -1,3 +1,5 @@
+from typing import Dict
+
 import yaml
 
 
@@ -12,3 +14,32 @@ metadata:
   name: {name}
 ...
 """)
+
+    @classmethod
+    def config_map_resource(cls, name: str, namespace: str, data: Dict[str, str]):
+        resource = yaml.safe_load(f"""
+---
+apiVersion: v1
+kind: ConfigMap
+metadata:
+  name: {name}
+  namespace: {namespace}
+...
+""")
+        resource["data"] = data
+        return resource
+
+    @classmethod
+    def secret_resource(cls, name: str, namespace: str, string_data: Dict[str, str]):
+        resource = yaml.safe_load(f"""
+---
+apiVersion: v1
+kind: Secret
+type: Opaque
+metadata:
+  name: {name}
+  namespace: {namespace}
+...
+""")
+        resource["stringData"] = string_data
+        return resource
@@ -1,20 +1,29 @@
+import math
+
 from aws_cdk.aws_eks import Cluster
 
 from cdk_stacks.environment.vpc.eks.eks_resources.manifest_generator import ManifestGenerator
+from cdk_stacks.environment.vpc.eks.image_cache import ImageCache
 
 
 class MetricsServer:
     """
     https://github.com/bitnami/charts/tree/master/bitnami/metrics-server
+
+    Resources grow linearly with the nodes count, as the addon-resizer does:
+    https://github.com/kubernetes/autoscaler/tree/master/addon-resizer
     """
     HELM_REPOSITORY = 'https://charts.bitnami.com/bitnami'
 
     @classmethod
-    def add_to_cluster(cls, cluster: Cluster) -> None:
+    def add_to_cluster(cls, cluster: Cluster, config: dict, max_nodes: int, image_cache: ImageCache) -> None:
         """
         Deploys into the EKS cluster the kubernetes metrics server
 
         :param cluster:
+        :param config: The `eks.metricsServer` configuration
+        :param max_nodes: Nodes in the cluster when all the fleets are at maximum size
+        :param image_cache:
         :return:
         """
         resource = ManifestGenerator.namespace_resource('metrics-server')
@@ -31,12 +40,59 @@ class MetricsServer:
             repository=cls.HELM_REPOSITORY,
             version="4.2.1",
             values={
+                "global": {
+                    "imageRegistry": image_cache.registry("docker.io"),
+                },
                 "extraArgs": {
                     "kubelet-preferred-address-types": "InternalIP",
+                    # HPAs can't react faster than the metrics resolution
+                    "metric-resolution": config.get('metricResolution'),
+                },
+                "replicas": config.get('replicas'),
+                "affinity": {
+                    "podAntiAffinity": {
+                        "preferredDuringSchedulingIgnoredDuringExecution": [
+                            {
+                                "weight": 100,
+                                "podAffinityTerm": {
+                                    "topologyKey": "kubernetes.io/hostname",
+                                    "labelSelector": {
+                                        "matchLabels": {
+                                            "app.kubernetes.io/name": "metrics-server",
+                                            "app.kubernetes.io/instance": "metrics-server",
+                                        },
+                                    },
+                                },
+                            },
+                        ],
+                    },
                 },
+                "resources": cls.resources(config.get('resources', {}), max_nodes),
                 "apiService": {
                     "create": True,
                 },
             },
         )
         chart.node.add_dependency(namespace)
+
+    @classmethod
+    def resources(cls, config: dict, max_nodes: int) -> dict:
+        """
+        Resources needed to scrape the maximum nodes count
+
+        :param config: The `eks.metricsServer.resources` configuration
+        :param max_nodes:
+        :return:
+        """
+        cpu = math.ceil(config.get('baseCpuMillicores') + config.get('cpuMillicoresPerNode') * max_nodes)
+        memory = math.ceil(config.get('baseMemoryMebibytes') + config.get('memoryMebibytesPerNode') * max_nodes)
+
+        return {
+            "requests": {
+                "cpu": f"{cpu}m",
+                "memory": f"{memory}Mi",
+            },
+            "limits": {
+                "memory": f"{memory}Mi",
+            },
+        }
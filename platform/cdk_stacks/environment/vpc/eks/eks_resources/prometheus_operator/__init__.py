@@ -1,6 +1,9 @@
 from aws_cdk.aws_eks import Cluster, ServiceAccount
 
 from cdk_stacks.environment.vpc.eks.eks_resources.manifest_generator import ManifestGenerator
+from cdk_stacks.environment.vpc.eks.eks_resources.prometheus_operator.alert_rules import PlatformAlertRules
+from cdk_stacks.environment.vpc.eks.image_cache import ImageCache
+from cdk_stacks.environment.vpc.eks.monitoring import Monitoring
 
 
 class PrometheusOperator:
@@ -8,16 +11,29 @@ class PrometheusOperator:
     https://github.com/bitnami/charts/tree/master/bitnami/prometheus-operator
     """
     HELM_REPOSITORY = 'https://charts.bitnami.com/bitnami'
+    NAMESPACE = 'prometheus'
+    FULLNAME = 'prometheus-operator'
 
     @classmethod
-    def add_to_cluster(cls, cluster: Cluster) -> None:
+    def prometheus_url(cls) -> str:
+        """
+        In-cluster URL of the Prometheus instance created by the release
+
+        :return:
+        """
+        return f"http://{cls.FULLNAME}-prometheus.{cls.NAMESPACE}.svc.cluster.local:9090"
+
+    @classmethod
+    def add_to_cluster(cls, cluster: Cluster, image_cache: ImageCache, monitoring: Monitoring) -> None:
         """
         Deploys into the EKS cluster the external secrets manager
 
         :param cluster:
+        :param image_cache:
+        :param monitoring:
         :return:
         """
-        namespace = "prometheus"
+        namespace = cls.NAMESPACE
         resource = ManifestGenerator.namespace_resource(namespace)
         ns = cluster.add_resource(
             f"{resource.get('kind')}-{resource.get('metadata', {}).get('name')}",
@@ -43,7 +59,7 @@ class PrometheusOperator:
         )
         alertmanager_sa.node.add_dependency(ns)
 
-        cls._create_chart_release(cluster, operator_sa, prometheus_sa, alertmanager_sa)
+        cls._create_chart_release(cluster, operator_sa, prometheus_sa, alertmanager_sa, image_cache, monitoring)
 
     @classmethod
     def _create_chart_release(
@@ -52,6 +68,8 @@ class PrometheusOperator:
             operator_service_account: ServiceAccount,
             prometheus_service_account: ServiceAccount,
             alertmanager_service_account: ServiceAccount,
+            image_cache: ImageCache,
+            monitoring: Monitoring,
     ) -> None:
         chart = cluster.add_chart(
             "helm-chart-prometheus",
@@ -61,27 +79,121 @@ class PrometheusOperator:
             repository=cls.HELM_REPOSITORY,
             version="0.22.3",
             values={
+                "fullnameOverride": cls.FULLNAME,
+                "global": {
+                    "imageRegistry": image_cache.registry("docker.io"),
+                },
                 "operator": {
                     "serviceAccount": {
                         "create": False,
                         "name": operator_service_account.service_account_name,
                     },
+                    "serviceMonitor": monitoring.service_monitor(operator_service_account.service_account_namespace),
+                    "kubeletService": {
+                        "enabled": monitoring.config.get('kubelet'),
+                        "namespace": "kube-system",
+                    },
                 },
                 "prometheus": {
                     "serviceAccount": {
                         "create": False,
                         "name": prometheus_service_account.service_account_name,
                     },
+                    "serviceMonitor": monitoring.service_monitor(operator_service_account.service_account_namespace),
+                    # Select the ServiceMonitors created by every add-on, whatever namespace they live in
+                    "serviceMonitorSelector": {},
+                    "serviceMonitorNamespaceSelector": {},
+                    "ruleSelector": {},
+                    "ruleNamespaceSelector": {},
                 },
                 "alertmanager": {
                     "serviceAccount": {
                         "create": False,
                         "name": alertmanager_service_account.service_account_name,
                     },
+                    "serviceMonitor": monitoring.service_monitor(operator_service_account.service_account_namespace),
+                },
+                "exporters": {
+                    "node-exporter": {
+                        "enabled": monitoring.config.get('nodeExporter'),
+                    },
+                    "kube-state-metrics": {
+                        "enabled": monitoring.config.get('kubeStateMetrics'),
+                    },
+                },
+                "node-exporter": {
+                    "serviceMonitor": monitoring.service_monitor(operator_service_account.service_account_namespace),
+                },
+                "kube-state-metrics": {
+                    "serviceMonitor": monitoring.service_monitor(operator_service_account.service_account_namespace),
+                },
+                # Kubelet and cAdvisor (`/metrics/cadvisor`) endpoints
+                "kubelet": {
+                    "enabled": monitoring.config.get('kubelet'),
+                    "namespace": "kube-system",
+                    "serviceMonitor": {
+                        "https": True,
+                        "interval": monitoring.interval,
+                    },
+                },
+                "coreDns": {
+                    "enabled": True,
+                },
+                # Control plane components are managed by EKS and can't be scraped
+                "kubeControllerManager": {
+                    "enabled": False,
+                },
+                "kubeScheduler": {
+                    "enabled": False,
                 },
-
             },
         )
         chart.node.add_dependency(operator_service_account)
         chart.node.add_dependency(prometheus_service_account)
         chart.node.add_dependency(alertmanager_service_account)
+        monitoring.register_operator(chart)
+
+        if monitoring.enabled:
+            # Envoy sidecars and gateways installed by istio
+            istio_pod_monitor = cluster.add_resource(
+                "PodMonitor-envoy-stats",
+                {
+                    "apiVersion": "monitoring.coreos.com/v1",
+                    "kind": "PodMonitor",
+                    "metadata": {
+                        "name": "envoy-stats",
+                        "namespace": operator_service_account.service_account_namespace,
+                    },
+                    "spec": {
+                        "selector": {
+                            "matchExpressions": [
+                                {"key": "istio-prometheus-ignore", "operator": "DoesNotExist"},
+                            ],
+                        },
+                        "namespaceSelector": {
+                            "any": True,
+                        },
+                        "jobLabel": "envoy-stats",
+                        "podMetricsEndpoints": [
+                            {
+                                "path": "/stats/prometheus",
+                                "port": "http-envoy-prom",
+                                "interval": monitoring.interval,
+                            },
+                        ],
+                    },
+                },
+            )
+            istio_pod_monitor.node.add_dependency(chart)
+
+        alerts_config = monitoring.config.get('alerts', {})
+        if alerts_config.get('enabled'):
+            rules = cluster.add_resource(
+                "PrometheusRule-platform",
+                PlatformAlertRules.prometheus_rule_resource(
+                    "platform",
+                    operator_service_account.service_account_namespace,
+                    alerts_config,
+                ),
+            )
+            rules.node.add_dependency(chart)
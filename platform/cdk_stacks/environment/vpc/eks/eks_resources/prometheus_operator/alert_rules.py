@@ -0,0 +1,203 @@
+from typing import List
+
+from cdk_stacks.environment.vpc.eks.eks_resources.cluster_autoscaler import ClusterAutoscaler
+
+
+class PlatformAlertRules:
+    """
+    Platform alerting rules, generated from the `eks.monitoring.alerts` configuration.
+
+    Ingress latency alerts follow the multiwindow, multi-burn-rate approach:
+    https://sre.google/workbook/alerting-on-slos/
+    """
+    # (severity, burn rate, long window, short window)
+    BURN_RATE_WINDOWS = [
+        ('critical', 14.4, '1h', '5m'),
+        ('critical', 6, '6h', '30m'),
+        ('warning', 3, '1d', '2h'),
+    ]
+
+    @classmethod
+    def groups(cls, config: dict) -> List[dict]:
+        """
+        Prometheus rule groups
+
+        :param config: The `eks.monitoring.alerts` configuration
+        :return:
+        """
+        return [
+            cls._capacity_group(config),
+            cls._autoscaler_group(config),
+            cls._dns_group(config),
+            cls._ingress_slo_group(config.get('ingressLatency', {})),
+        ]
+
+    @classmethod
+    def prometheus_rule_resource(cls, name: str, namespace: str, config: dict) -> dict:
+        """
+        PrometheusRule manifest containing all the platform rules
+
+        :param name:
+        :param namespace:
+        :param config: The `eks.monitoring.alerts` configuration
+        :return:
+        """
+        return {
+            "apiVersion": "monitoring.coreos.com/v1",
+            "kind": "PrometheusRule",
+            "metadata": {
+                "name": name,
+                "namespace": namespace,
+            },
+            "spec": {
+                "groups": cls.groups(config),
+            },
+        }
+
+    @classmethod
+    def _capacity_group(cls, config: dict) -> dict:
+        return {
+            "name": "platform.capacity",
+            "rules": [
+                cls._alert(
+                    "NodeCPUSaturated",
+                    f'1 - avg by (instance) (rate(node_cpu_seconds_total{{mode="idle"}}[5m])) '
+                    f'> {config.get("nodeCpuSaturation")}',
+                    config.get('saturationFor'),
+                    'warning',
+                    'Node {{ $labels.instance }} CPU utilisation is {{ $value | humanizePercentage }}',
+                ),
+                cls._alert(
+                    "NodeMemorySaturated",
+                    f'1 - node_memory_MemAvailable_bytes / node_memory_MemTotal_bytes '
+                    f'> {config.get("nodeMemorySaturation")}',
+                    config.get('saturationFor'),
+                    'warning',
+                    'Node {{ $labels.instance }} memory utilisation is {{ $value | humanizePercentage }}',
+                ),
+                cls._alert(
+                    "NodeConntrackTableFilling",
+                    f'node_nf_conntrack_entries / node_nf_conntrack_entries_limit '
+                    f'> {config.get("nodeConntrackSaturation")}',
+                    config.get('saturationFor'),
+                    'warning',
+                    'Node {{ $labels.instance }} conntrack table is {{ $value | humanizePercentage }} full',
+                ),
+                cls._alert(
+                    "PodsPending",
+                    f'sum(kube_pod_status_phase{{phase="Pending"}}) > {config.get("pendingPods")}',
+                    config.get('pendingPodsFor'),
+                    'critical',
+                    '{{ $value }} pods are pending, the cluster is running out of capacity',
+                ),
+            ],
+        }
+
+    @classmethod
+    def _autoscaler_group(cls, config: dict) -> dict:
+        return {
+            "name": "platform.autoscaler",
+            "rules": [
+                cls._alert(
+                    "ClusterAutoscalerScaleUpFailing",
+                    f'increase(cluster_autoscaler_failed_scale_ups_total[15m]) '
+                    f'>= {config.get("autoscalerFailedScaleUps")}',
+                    '0m',
+                    'critical',
+                    'cluster-autoscaler failed {{ $value }} scale ups in the last 15 minutes',
+                ),
+                cls._alert(
+                    "ClusterAutoscalerErrors",
+                    'increase(cluster_autoscaler_errors_total[15m]) > 0',
+                    '15m',
+                    'warning',
+                    'cluster-autoscaler is reporting {{ $labels.type }} errors',
+                ),
+                cls._alert(
+                    "ClusterAutoscalerDown",
+                    f'absent(up{{job="{ClusterAutoscaler.FULLNAME}"}} == 1)',
+                    '10m',
+                    'critical',
+                    'cluster-autoscaler is not running, the cluster will not scale',
+                ),
+            ],
+        }
+
+    @classmethod
+    def _dns_group(cls, config: dict) -> dict:
+        return {
+            "name": "platform.dns",
+            "rules": [
+                cls._alert(
+                    "CoreDNSErrorRateHigh",
+                    f'sum(rate(coredns_dns_response_rcode_count_total{{rcode="SERVFAIL"}}[5m])) '
+                    f'/ sum(rate(coredns_dns_response_rcode_count_total[5m])) > {config.get("dnsErrorRate")}',
+                    '10m',
+                    'critical',
+                    'CoreDNS is failing {{ $value | humanizePercentage }} of the requests',
+                ),
+                cls._alert(
+                    "CoreDNSLatencyHigh",
+                    f'histogram_quantile(0.99, sum by (le) (rate(coredns_dns_request_duration_seconds_bucket[5m]))) '
+                    f'> {config.get("dnsLatencySeconds")}',
+                    '10m',
+                    'warning',
+                    'CoreDNS p99 latency is {{ $value | humanizeDuration }}',
+                ),
+            ],
+        }
+
+    @classmethod
+    def _ingress_slo_group(cls, config: dict) -> dict:
+        """
+        Ingress latency SLO: `objective` of the requests must be served in less than `thresholdMilliseconds`.
+        `thresholdMilliseconds` must match one of the istio request duration histogram buckets.
+
+        :param config: The `eks.monitoring.alerts.ingressLatency` configuration
+        :return:
+        """
+        error_budget = round(1 - float(config.get('objective')), 6)
+        selector = 'source_workload="istio-ingressgateway",reporter="source"'
+        windows = sorted({window for _, _, long, short in cls.BURN_RATE_WINDOWS for window in [long, short]})
+
+        rules = [
+            {
+                "record": f"platform:ingress_slow_requests:ratio_rate{window}",
+                "expr": f'1 - ('
+                        f'sum(rate(istio_request_duration_milliseconds_bucket'
+                        f'{{{selector},le="{config.get("thresholdMilliseconds")}"}}[{window}])) '
+                        f'/ sum(rate(istio_request_duration_milliseconds_count{{{selector}}}[{window}]))'
+                        f')',
+            }
+            for window in windows
+        ]
+        for severity, burn_rate, long_window, short_window in cls.BURN_RATE_WINDOWS:
+            rules.append(cls._alert(
+                "IngressLatencySLOBudgetBurn",
+                f'platform:ingress_slow_requests:ratio_rate{long_window} > ({burn_rate} * {error_budget}) '
+                f'and platform:ingress_slow_requests:ratio_rate{short_window} > ({burn_rate} * {error_budget})',
+                '2m',
+                severity,
+                f'Ingress latency error budget is burning {burn_rate}x faster than allowed '
+                f'(over {long_window} and {short_window})',
+            ))
+
+        return {
+            "name": "platform.ingress-slo",
+            "rules": rules,
+        }
+
+    @classmethod
+    def _alert(cls, name: str, expr: str, duration: str, severity: str, summary: str) -> dict:
+        return {
+            "alert": name,
+            "expr": expr,
+            "for": duration,
+            "labels": {
+                "severity": severity,
+                "team": "platform",
+            },
+            "annotations": {
+                "summary": summary,
+            },
+        }
@@ -0,0 +1,110 @@
+from typing import Dict, List
+
+from cdk_stacks.environment.vpc.eks.eks_resources.manifest_generator import ManifestGenerator
+
+
+class Fargate:
+    """
+    Fargate pods sizing and log routing.
+
+    Every pod runs in its own micro VM, sized on the pod requests plus 256MiB for the Kubernetes components and
+    rounded up to the closest vCPU/memory configuration: containers without requests get the smallest configuration.
+    https://docs.aws.amazon.com/eks/latest/userguide/fargate-pod-configuration.html
+    https://docs.aws.amazon.com/eks/latest/userguide/fargate-logging.html
+    """
+    MEMORY_OVERHEAD_MIB = 256
+    LOGGING_NAMESPACE = 'aws-observability'
+
+    # Supported memory (GiB) for each vCPU value
+    CONFIGURATIONS: Dict[float, List[float]] = {
+        0.25: [0.5, 1, 2],
+        0.5: [1, 2, 3, 4],
+        1: list(range(2, 9)),
+        2: list(range(4, 17)),
+        4: list(range(8, 31)),
+    }
+
+    def __init__(self, logging_config: dict, log_group_name: str, region: str) -> None:
+        """
+        :param logging_config: The `eks.fargateLogging` configuration
+        :param log_group_name:
+        :param region:
+        """
+        self.logging_enabled = bool(logging_config.get('enabled'))
+        self.log_group_name = log_group_name
+        self.region = region
+
+    @classmethod
+    def validate_pod_size(cls, pod_size: dict) -> None:
+        if pod_size.get('memoryGiB') not in cls.CONFIGURATIONS.get(pod_size.get('vCpu'), []):
+            raise ValueError(
+                f"Fargate has no {pod_size.get('vCpu')} vCPU / {pod_size.get('memoryGiB')} GiB configuration, "
+                f"supported ones are {cls.CONFIGURATIONS}"
+            )
+
+    @classmethod
+    def limit_range_resource(cls, name: str, namespace: str, pod_size: dict) -> dict:
+        """
+        Container defaults making single container pods fit exactly the `podSize` configuration, once Fargate
+        adds its memory overhead. Requests equal limits, pods can't use more than the micro VM anyway.
+
+        :param name:
+        :param namespace:
+        :param pod_size: The profile `podSize` configuration
+        :return:
+        """
+        cls.validate_pod_size(pod_size)
+        resources = {
+            "cpu": f"{int(pod_size.get('vCpu') * 1000)}m",
+            "memory": f"{int(pod_size.get('memoryGiB') * 1024) - cls.MEMORY_OVERHEAD_MIB}Mi",
+        }
+
+        return {
+            "apiVersion": "v1",
+            "kind": "LimitRange",
+            "metadata": {
+                "name": name,
+                "namespace": namespace,
+            },
+            "spec": {
+                "limits": [
+                    {
+                        "type": "Container",
+                        "default": resources,
+                        "defaultRequest": resources,
+                    },
+                ],
+            },
+        }
+
+    def log_router_resources(self) -> List[dict]:
+        """
+        Namespace and configuration of the Fluent Bit log router built into Fargate, shipping the pods logs
+        to CloudWatch with the Kubernetes metadata
+
+        :return:
+        """
+        namespace = ManifestGenerator.namespace_resource(self.LOGGING_NAMESPACE)
+        namespace['metadata']['labels'] = {'aws-observability': 'enabled'}
+        config_map = ManifestGenerator.config_map_resource('aws-logging', self.LOGGING_NAMESPACE, {
+            "filters.conf": "\n".join([
+                "[FILTER]",
+                "    Name kubernetes",
+                "    Match kube.*",
+                "    Merge_Log On",
+                "    Keep_Log Off",
+                "    Buffer_Size 0",
+                "    Kube_Meta_Cache_TTL 300s",
+            ]),
+            "output.conf": "\n".join([
+                "[OUTPUT]",
+                "    Name cloudwatch_logs",
+                "    Match *",
+                f"    region {self.region}",
+                f"    log_group_name {self.log_group_name}",
+                "    log_stream_prefix fargate-",
+                "    auto_create_group false",
+            ]),
+        })
+
+        return [namespace, config_map]
@@ -0,0 +1,140 @@
+import hashlib
+import re
+from typing import Dict, List
+
+from aws_cdk.aws_iam import IRole, PolicyStatement, Effect
+from aws_cdk.core import CfnResource, Stack
+
+
+class ImageCache:
+    """
+    ECR pull-through cache for the images used by the cluster add-ons.
+
+    Every upstream registry configured in `eks.imageCache.upstreamRegistries` gets an ECR pull-through cache rule
+    and every image coming from that registry gets served by `<account>.dkr.ecr.<region>.amazonaws.com/<prefix>`.
+    Images from registries without a rule (or with the cache disabled) are left untouched.
+
+    https://docs.aws.amazon.com/AmazonECR/latest/userguide/pull-through-cache.html
+    """
+    DOCKER_HUB_REGISTRY = 'docker.io'
+    # ECR only creates Docker Hub rules with the credentials of a Docker Hub account
+    DOCKER_HUB_UPSTREAM_URL = 'registry-1.docker.io'
+    # ECR `EcrRepositoryPrefix` constraints
+    REPOSITORY_PREFIX_MAX_LENGTH = 30
+    REPOSITORY_PREFIX_PATTERN = r'(?:[a-z0-9]+(?:[._-][a-z0-9]+)*/)*[a-z0-9]+(?:[._-][a-z0-9]+)*'
+
+    def __init__(self, config: dict, prefix: str, account: str, region: str) -> None:
+        """
+        :param config: The `eks.imageCache` configuration
+        :param prefix: Prefix used to keep the repositories of multiple environments apart in the same account
+        :param account: Account hosting the cache repositories
+        :param region: Region hosting the cache repositories
+        """
+        self.enabled = bool(config.get('enabled'))
+        self.pre_pulled_images: List[str] = config.get('prePulledImages', []) if self.enabled else []
+        self.ecr_registry = f"{account}.dkr.ecr.{region}.amazonaws.com"
+        self._rules: Dict[str, dict] = {}
+        self._mirrors: Dict[str, str] = {}
+
+        if not self.enabled:
+            return
+
+        for registry, rule in config.get('upstreamRegistries', {}).items():
+            if rule.get('upstreamRegistryUrl') == self.DOCKER_HUB_UPSTREAM_URL and not rule.get('credentialArn'):
+                raise ValueError(
+                    f"Docker Hub pull-through cache rule of `{registry}` needs a `credentialArn`: the ARN of a "
+                    f"Secrets Manager secret (prefixed with `ecr-pullthroughcache/`) holding Docker Hub credentials"
+                )
+            repository_prefix = self.repository_prefix(prefix, rule.get('prefix'))
+            self._rules[rule.get('prefix')] = {
+                "EcrRepositoryPrefix": repository_prefix,
+                "UpstreamRegistryUrl": rule.get('upstreamRegistryUrl'),
+                **({"CredentialArn": rule.get('credentialArn')} if rule.get('credentialArn') else {}),
+            }
+            self._mirrors[registry] = f"{self.ecr_registry}/{repository_prefix}"
+
+    @classmethod
+    def repository_prefix(cls, prefix: str, rule_prefix: str) -> str:
+        """
+        ECR repositories prefix of a pull-through cache rule. When the environment prefix makes it too long for ECR,
+        a hash of the environment prefix is used instead, still unique per environment.
+
+        :param prefix:
+        :param rule_prefix: The upstream registry `prefix`
+        :return:
+        """
+        repository_prefix = f"{prefix}-{rule_prefix}".lower()
+        if len(repository_prefix) > cls.REPOSITORY_PREFIX_MAX_LENGTH:
+            repository_prefix = f"{hashlib.sha256(prefix.lower().encode()).hexdigest()[:8]}-{rule_prefix}".lower()
+
+        if len(repository_prefix) > cls.REPOSITORY_PREFIX_MAX_LENGTH \
+                or not re.fullmatch(cls.REPOSITORY_PREFIX_PATTERN, repository_prefix):
+            raise ValueError(
+                f"Upstream registry prefix `{rule_prefix}` can't be used as ECR repositories prefix "
+                f"(`{repository_prefix}`): at most {cls.REPOSITORY_PREFIX_MAX_LENGTH - 9} lowercase letters, "
+                f"digits and separators"
+            )
+
+        return repository_prefix
+
+    def add_pull_through_cache_rules(self, stack: Stack) -> None:
+        """
+        Creates the ECR pull-through cache rules in the stack (its account and region must match the cache ones)
+
+        :param stack:
+        :return:
+        """
+        for rule_id, properties in self._rules.items():
+            CfnResource(
+                stack,
+                f"pull-through-cache-{rule_id}",
+                type="AWS::ECR::PullThroughCacheRule",
+                properties=properties,
+            )
+
+    def registry(self, upstream_registry: str) -> str:
+        """
+        Returns the registry to be used in place of the upstream one (e.g. for bitnami charts `image.registry` value)
+
+        :param upstream_registry:
+        :return:
+        """
+        return self._mirrors.get(upstream_registry, upstream_registry)
+
+    def repository(self, upstream_repository: str) -> str:
+        """
+        Returns the repository to be used in place of the upstream one. Repositories without an explicit
+        registry (e.g. `godaddy/kubernetes-external-secrets`) are considered to be on Docker Hub.
+
+        :param upstream_repository:
+        :return:
+        """
+        registry, _, path = upstream_repository.partition('/')
+        if '.' not in registry and ':' not in registry and registry != 'localhost':
+            registry, path = self.DOCKER_HUB_REGISTRY, upstream_repository
+
+        if registry not in self._mirrors:
+            return upstream_repository
+        if registry == self.DOCKER_HUB_REGISTRY and '/' not in path:
+            path = f"library/{path}"  # Docker Hub official images
+
+        return f"{self._mirrors[registry]}/{path}"
+
+    def grant_pull_through(self, role: IRole) -> None:
+        """
+        Allows the nodes to populate the cache on the first pull of an image
+
+        :param role:
+        :return:
+        """
+        if not self.enabled:
+            return
+
+        role.add_to_policy(PolicyStatement(
+            resources=["*"],
+            effect=Effect.ALLOW,
+            actions=[
+                "ecr:BatchImportUpstreamImage",
+                "ecr:CreateRepository",
+            ],
+        ))
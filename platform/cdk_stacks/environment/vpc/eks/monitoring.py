@@ -0,0 +1,61 @@
+from typing import List, Optional
+
+from aws_cdk.aws_eks import HelmChart
+
+
+class Monitoring:
+    """
+    Scrape configuration shared by the add-ons exposing metrics.
+
+    Add-ons create their ServiceMonitors through their own chart, those resources need the prometheus-operator CRDs,
+    hence the charts get a dependency on the prometheus-operator release (whatever order they are added in).
+    """
+
+    def __init__(self, config: dict) -> None:
+        """
+        :param config: The `eks.monitoring` configuration
+        """
+        self.config = config
+        self.enabled = bool(config.get('serviceMonitors', {}).get('enabled'))
+        self.interval: str = config.get('serviceMonitors', {}).get('interval')
+        self._operator: Optional[HelmChart] = None
+        self._charts: List[HelmChart] = []
+
+    def service_monitor(self, namespace: str) -> dict:
+        """
+        ServiceMonitor values, in the format used by most of the charts (`enabled`, `interval`, `namespace`)
+
+        :param namespace: Namespace where the ServiceMonitor gets created
+        :return:
+        """
+        return {
+            "enabled": self.enabled,
+            "interval": self.interval,
+            "namespace": namespace,
+        }
+
+    def watch(self, chart: HelmChart) -> HelmChart:
+        """
+        Registers a chart creating ServiceMonitors
+
+        :param chart:
+        :return:
+        """
+        if not self.enabled:
+            return chart
+
+        self._charts.append(chart)
+        if self._operator:
+            chart.node.add_dependency(self._operator)
+        return chart
+
+    def register_operator(self, chart: HelmChart) -> None:
+        """
+        Registers the chart installing the prometheus-operator CRDs
+
+        :param chart:
+        :return:
+        """
+        self._operator = chart
+        for watched_chart in self._charts:
+            watched_chart.node.add_dependency(chart)
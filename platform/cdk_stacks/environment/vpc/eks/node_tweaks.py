@@ -0,0 +1,292 @@
+import math
+from typing import Dict, List, Optional
+
+
+class NodeTweaks:
+    """
+    Worker nodes tweaks, shared by the fleets user data and by the baked AMIs build definition.
+
+    Source of tweaks: https://kubedex.com/90-days-of-aws-eks-in-production
+    """
+    SYSCTL_PROFILES: Dict[str, str] = {
+        "10-disable-ipv6.conf": """# disable ipv6 config
+net.ipv6.conf.all.disable_ipv6 = 1
+net.ipv6.conf.default.disable_ipv6 = 1
+net.ipv6.conf.lo.disable_ipv6 = 1""",
+
+        # Kube network optimisation.
+        # Stolen from this guy: https://blog.codeship.com/running-1000-containers-in-docker-swarm/
+        "99-kube-net.conf": """# Have a larger connection range available
+net.ipv4.ip_local_port_range=1024 65000
+
+# Reuse closed sockets faster
+net.ipv4.tcp_tw_reuse=1
+net.ipv4.tcp_fin_timeout=15
+
+# The maximum number of "backlogged sockets".  Default is 128.
+net.core.somaxconn=4096
+net.core.netdev_max_backlog=4096
+
+# 16MB per socket - which sounds like a lot,
+# but will virtually never consume that much.
+net.core.rmem_max=16777216
+net.core.wmem_max=16777216
+
+# Various network tunables
+net.ipv4.tcp_max_syn_backlog=20480
+net.ipv4.tcp_max_tw_buckets=400000
+net.ipv4.tcp_no_metrics_save=1
+net.ipv4.tcp_rmem=4096 87380 16777216
+net.ipv4.tcp_syn_retries=2
+net.ipv4.tcp_synack_retries=2
+net.ipv4.tcp_wmem=4096 65536 16777216
+#vm.min_free_kbytes=65536
+
+# Connection tracking to prevent dropped connections (usually issue on LBs)
+net.netfilter.nf_conntrack_max=262144
+net.ipv4.netfilter.ip_conntrack_generic_timeout=120
+net.netfilter.nf_conntrack_tcp_timeout_established=86400
+
+# ARP cache settings for a highly loaded docker swarm
+net.ipv4.neigh.default.gc_thresh1=8096
+net.ipv4.neigh.default.gc_thresh2=12288
+net.ipv4.neigh.default.gc_thresh3=16384""",
+    }
+
+    @classmethod
+    def sysctl_commands(cls) -> List[str]:
+        """
+        Commands writing the sysctl profiles and applying them
+
+        :return:
+        """
+        commands = [
+            f"""
+cat <<EOF > /etc/sysctl.d/{file_name}
+{content}
+EOF"""
+            for file_name, content in cls.SYSCTL_PROFILES.items()
+        ]
+        commands.append("systemctl restart systemd-sysctl.service")
+
+        return commands
+
+    # Free space image garbage collection keeps on the images volume, above the `nodefs.available` eviction threshold
+    IMAGE_GC_MIN_FREE_GIB = 10
+    IMAGE_GC_MIN_FREE_PERCENT = 15
+
+    # Data directories moved to the instance store
+    INSTANCE_STORE_MOUNT_POINT = '/mnt/k8s-disks'
+    INSTANCE_STORE_DIRECTORIES = ['/var/lib/kubelet', '/var/lib/docker', '/var/lib/containerd']
+
+    @classmethod
+    def kubelet_extra_args(cls, node_labels: Dict[str, str], images_volume_gib: Optional[int] = None) -> str:
+        """
+        Kubelet arguments reserving resources for the system and the Kubernetes daemons
+
+        :param node_labels: Labels to add to the node, if not set by other means (e.g. managed node groups)
+        :param images_volume_gib: Size of the volume hosting the images, tunes the image garbage collection
+        :return:
+        """
+        node_labels_as_str = ','.join(map('='.join, node_labels.items()))
+        image_gc_args = ''
+        if images_volume_gib:
+            high_threshold, low_threshold = cls.image_gc_thresholds(images_volume_gib)
+            image_gc_args = f'--image-gc-high-threshold={high_threshold} --image-gc-low-threshold={low_threshold}'
+
+        return ' '.join([
+            # Add node labels
+            f'--node-labels {node_labels_as_str}' if len(node_labels_as_str) else '',
+
+            # Capture resource reservation for kubernetes system daemons like the kubelet, container runtime,
+            # node problem detector, etc.
+            '--kube-reserved cpu=250m,memory=1Gi,ephemeral-storage=1Gi',
+
+            # Capture resources for vital system functions, such as sshd, udev.
+            '--system-reserved cpu=250m,memory=0.2Gi,ephemeral-storage=1Gi',
+
+            # Start evicting pods from this node once these thresholds are crossed.
+            '--eviction-hard memory.available<0.2Gi,nodefs.available<10%',
+
+            # Remove unused images before reaching the eviction threshold
+            image_gc_args,
+        ]).strip()
+
+    @classmethod
+    def image_gc_thresholds(cls, volume_gib: int) -> tuple:
+        """
+        Disk usage percentages starting (high) and stopping (low) the image garbage collection. Small volumes
+        start collecting earlier, big ones keep more images cached (the kubelet defaults are 85 and 80).
+
+        :param volume_gib:
+        :return:
+        """
+        free_percent = max(math.ceil(100 * cls.IMAGE_GC_MIN_FREE_GIB / volume_gib), cls.IMAGE_GC_MIN_FREE_PERCENT)
+        high_threshold = 100 - free_percent
+        if high_threshold < 50:
+            raise ValueError(
+                f"A {volume_gib}GiB volume is too small to cache images, it needs at least "
+                f"{2 * cls.IMAGE_GC_MIN_FREE_GIB}GiB"
+            )
+
+        return high_threshold, high_threshold - 10
+
+    @classmethod
+    def instance_store_commands(cls) -> List[str]:
+        """
+        Commands moving the container runtime and kubelet data to the NVMe instance store volumes, in RAID0 when
+        more than one. Running services are stopped and restarted, so it works both before and after the bootstrap.
+        Instance store data doesn't survive a stop, the node must be replaced.
+
+        :return:
+        """
+        return [
+            f"""
+## Instance store for the container runtime and kubelet
+devices=$(ls /dev/disk/by-id/nvme-Amazon_EC2_NVMe_Instance_Storage_* 2>/dev/null | xargs -r -n1 readlink -f | sort -u)
+if [ -n "$devices" ]; then
+  count=$(echo "$devices" | wc -l)
+  device=$devices
+  if [ "$count" -gt 1 ]; then
+    yum install -y mdadm
+    mdadm --create /dev/md0 --run --level=0 --raid-devices=$count $devices
+    device=/dev/md0
+  fi
+  mkfs.xfs -f $device
+  mkdir -p {cls.INSTANCE_STORE_MOUNT_POINT}
+  mount -o defaults,noatime $device {cls.INSTANCE_STORE_MOUNT_POINT}
+  services=$(systemctl list-units --state=active --plain --no-legend kubelet.service docker.service containerd.service | awk '{{print $1}}')
+  [ -n "$services" ] && systemctl stop $services
+  for directory in {' '.join(cls.INSTANCE_STORE_DIRECTORIES)}; do
+    mkdir -p $directory {cls.INSTANCE_STORE_MOUNT_POINT}$directory
+    cp -a $directory/. {cls.INSTANCE_STORE_MOUNT_POINT}$directory/
+    mount --bind {cls.INSTANCE_STORE_MOUNT_POINT}$directory $directory
+  done
+  [ -n "$services" ] && systemctl start $services
+fi"""
+        ]
+
+    @classmethod
+    def managed_node_group_user_data(cls, commands: List[str], kubelet_extra_args: str) -> str:
+        """
+        Launch template user data of managed node groups: EKS merges it with its own bootstrap, hence it must be
+        a MIME multi-part archive and it runs before the node bootstrap. Kubelet arguments can't be passed to
+        the bootstrap, they get appended to the ones the bootstrap script sets.
+        https://docs.aws.amazon.com/eks/latest/userguide/launch-templates.html
+
+        :param commands:
+        :param kubelet_extra_args:
+        :return:
+        """
+        script = '\n'.join([
+            '#!/bin/bash',
+            *commands,
+            f"sed -i '/^KUBELET_EXTRA_ARGS=/a KUBELET_EXTRA_ARGS+=\" {kubelet_extra_args}\"' /etc/eks/bootstrap.sh",
+        ])
+
+        return '\n'.join([
+            'MIME-Version: 1.0',
+            'Content-Type: multipart/mixed; boundary="==BOUNDARY=="',
+            '',
+            '--==BOUNDARY==',
+            'Content-Type: text/x-shellscript; charset="us-ascii"',
+            '',
+            script,
+            '',
+            '--==BOUNDARY==--',
+            '',
+        ])
+
+    @classmethod
+    def pre_pull_commands(cls, images: List[str], ecr_registry: str, region: str, background: bool = True,
+                          wait_for_kubelet: bool = False, timed: bool = False) -> List[str]:
+        """
+        Commands pulling the images in the node container runtime
+
+        :param images: Full images references
+        :param ecr_registry: ECR registry to login into before pulling (images can be served by the pull-through cache)
+        :param region:
+        :param background: If True the pulls won't block the following commands (e.g. kubelet registration)
+        :param wait_for_kubelet: If True the pulls start once the node is bootstrapped (the container runtime
+            gets restarted by the bootstrap)
+        :param timed: If True the pulls emit the `image_pulls` phase timing (see `bootstrap_timing_commands`)
+        :return:
+        """
+        if not images:
+            return []
+
+        return [
+            f"""
+## Pre-pull images
+(
+{'until systemctl is-active --quiet kubelet; do sleep 5; done' + chr(10) if wait_for_kubelet else ''}{'image_pulls_started_at=$(date +%s.%N)' + chr(10) if timed else ''}aws ecr get-login-password --region {region} | docker login --username AWS --password-stdin {ecr_registry}
+for image in {' '.join(images)}; do
+  docker pull "$image" &
+done
+wait
+{cls.BOOTSTRAP_TIMING_FUNCTION + ' image_pulls $image_pulls_started_at' + chr(10) if timed else ''}){' &' if background else ''}"""
+        ]
+
+    # Bootstrap phases timings, a JSON line per phase collected by promtail (see `Loki`)
+    BOOTSTRAP_TIMINGS_DIRECTORY = '/var/log/node-bootstrap'
+    BOOTSTRAP_TIMING_FUNCTION = 'node_bootstrap_timing'
+    KUBELET_HEALTHZ_URL = 'http://localhost:10248/healthz'
+
+    @classmethod
+    def bootstrap_timing_commands(cls, fleet_name: str) -> List[str]:
+        """
+        Commands defining `node_bootstrap_timing <phase> <started_at>`, which appends the phase duration and the
+        time elapsed since the instance boot to the timings log. Must come first in the user data.
+
+        :param fleet_name:
+        :return:
+        """
+        awk_program = (
+            'BEGIN { printf "{\\"fleet\\":\\"%s\\",\\"phase\\":\\"%s\\",\\"duration\\":%.3f,'
+            '\\"since_boot\\":%.3f}\\n", fleet, phase, now - started, now - boot }'
+        )
+        return [
+            f"""
+## Bootstrap phases timings
+mkdir -p {cls.BOOTSTRAP_TIMINGS_DIRECTORY}
+node_boot_at=$(awk -v now="$(date +%s.%N)" '{{ printf "%.3f", now - $1 }}' /proc/uptime)
+{cls.BOOTSTRAP_TIMING_FUNCTION}() {{
+  awk -v fleet="{fleet_name}" -v phase="$1" -v started="$2" -v now="$(date +%s.%N)" -v boot="$node_boot_at" \\
+    '{awk_program}' >> {cls.BOOTSTRAP_TIMINGS_DIRECTORY}/timings.log
+}}"""
+        ]
+
+    @classmethod
+    def timed_commands(cls, phase: str, commands: List[str]) -> List[str]:
+        """
+        Commands emitting the timing of the phase they run
+
+        :param phase:
+        :param commands:
+        :return:
+        """
+        if not commands:
+            return []
+
+        return [
+            f'{phase}_started_at=$(date +%s.%N)',
+            *commands,
+            f'{cls.BOOTSTRAP_TIMING_FUNCTION} {phase} ${phase}_started_at',
+        ]
+
+    @classmethod
+    def kubelet_ready_timing_commands(cls) -> List[str]:
+        """
+        Commands emitting the `kubelet` phase timing once the kubelet is healthy, without blocking the user data
+        (managed node groups bootstrap runs after it)
+
+        :return:
+        """
+        return [
+            f"""
+## Kubelet readiness timing
+(
+until curl -sf {cls.KUBELET_HEALTHZ_URL} > /dev/null; do sleep 1; done
+{cls.BOOTSTRAP_TIMING_FUNCTION} kubelet $node_boot_at
+) &"""
+        ]
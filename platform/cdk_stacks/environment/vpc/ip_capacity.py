@@ -0,0 +1,165 @@
+import math
+from typing import Dict, List, Optional
+
+from cdk_stacks.environment.vpc.subnet_layout import SubnetLayout
+
+
+class IpCapacityPlanner:
+    """
+    Simulates the pods IP addresses consumption of the workload subnets with the VPC CNI, at maximum fleets size.
+
+    Every node attaches ENIs and pre-allocates their secondary IPs according to the CNI warm pool settings:
+    https://github.com/aws/amazon-vpc-cni-k8s/blob/master/docs/eni-and-ip-target.md
+
+    Fleets of instance types with unknown ENI limits are left out of the demand, `unknown_instance_types` lists them.
+    """
+    # AWS reserves the first four addresses and the last one of every subnet
+    AWS_RESERVED_IPS = 5
+
+    # Maximum ENIs and IPv4 addresses per ENI https://docs.aws.amazon.com/AWSEC2/latest/UserGuide/using-eni.html
+    INSTANCE_LIMITS: Dict[str, Dict[str, int]] = {
+        **{f"{family}.{size}": limits for family in ["t3", "t3a"] for size, limits in {
+            "nano": {"enis": 2, "ipsPerEni": 2},
+            "micro": {"enis": 2, "ipsPerEni": 2},
+            "small": {"enis": 3, "ipsPerEni": 4},
+            "medium": {"enis": 3, "ipsPerEni": 6},
+            "large": {"enis": 3, "ipsPerEni": 12},
+            "xlarge": {"enis": 4, "ipsPerEni": 15},
+            "2xlarge": {"enis": 4, "ipsPerEni": 15},
+        }.items()},
+        # Nitro families sharing the limits by size, including the instance store (`d`) variants
+        **{f"{family}.{size}": limits for family in [
+            "m5", "m5a", "m5d", "m5ad", "m5n", "m5dn",
+            "c5", "c5a", "c5d", "c5ad", "c5n",
+            "r5", "r5a", "r5d", "r5ad", "r5n", "r5dn",
+            "m6i", "m6id", "c6i", "c6id", "r6i", "r6id",
+            "m6g", "m6gd", "c6g", "c6gd", "r6g", "r6gd",
+            "i3", "i3en",
+        ] for size, limits in {
+            "large": {"enis": 3, "ipsPerEni": 10},
+            "xlarge": {"enis": 4, "ipsPerEni": 15},
+            "2xlarge": {"enis": 4, "ipsPerEni": 15},
+            "4xlarge": {"enis": 8, "ipsPerEni": 30},
+            "8xlarge": {"enis": 8, "ipsPerEni": 30},
+            "9xlarge": {"enis": 8, "ipsPerEni": 30},
+            "12xlarge": {"enis": 8, "ipsPerEni": 30},
+            "16xlarge": {"enis": 15, "ipsPerEni": 50},
+            "18xlarge": {"enis": 15, "ipsPerEni": 50},
+            "24xlarge": {"enis": 15, "ipsPerEni": 50},
+            "32xlarge": {"enis": 15, "ipsPerEni": 50},
+            "metal": {"enis": 15, "ipsPerEni": 50},
+        }.items()},
+    }
+
+    def __init__(self, environment_config: dict) -> None:
+        """
+        :param environment_config: The merged environment configuration (`BaseApp.environment_config`)
+        """
+        self.environment_config = environment_config
+        self.cni_config = environment_config.get('eks', {}).get('cni', {})
+        self.subnet_layout = SubnetLayout(environment_config.get('vpc', {}))
+
+    def instance_limits(self, instance_type: str) -> Optional[Dict[str, int]]:
+        """
+        ENI limits of the instance type, `eks.cni.instanceLimits` ones first
+
+        :param instance_type:
+        :return: None when unknown
+        """
+        return {**self.INSTANCE_LIMITS, **(self.cni_config.get('instanceLimits') or {})}.get(instance_type)
+
+    def unknown_instance_types(self) -> List[str]:
+        """
+        Fleets instance types without known ENI limits, their nodes are not part of the plan
+
+        :return:
+        """
+        return sorted({
+            instance_type for fleet in self._fleets() for instance_type in self._instance_types(fleet)
+            if not self.instance_limits(instance_type)
+        })
+
+    def node_ips(self, instance_type: str) -> int:
+        """
+        IPs taken from the subnet by a node running the maximum number of pods
+
+        :param instance_type:
+        :return:
+        """
+        limits = self.instance_limits(instance_type)
+        if not limits:
+            raise ValueError(f"ENI limits of `{instance_type}` are unknown, add them to `eks.cni.instanceLimits`")
+        secondary_ips_per_eni = limits['ipsPerEni'] - 1
+        max_pod_ips = limits['enis'] * secondary_ips_per_eni
+        pods = min(self.cni_config.get('podsPerNode') or max_pod_ips, max_pod_ips)
+
+        if self.cni_config.get('warmIpTarget') or self.cni_config.get('minimumIpTarget'):
+            secondary_ips = min(
+                max_pod_ips,
+                max(pods + (self.cni_config.get('warmIpTarget') or 0), self.cni_config.get('minimumIpTarget') or 0),
+            )
+            return secondary_ips + math.ceil(secondary_ips / secondary_ips_per_eni)  # plus the ENIs primary IPs
+
+        enis = min(
+            limits['enis'],
+            math.ceil(pods / secondary_ips_per_eni) + (self.cni_config.get('warmEniTarget') or 0),
+        )
+        return enis * limits['ipsPerEni']
+
+    def plan(self) -> List[dict]:
+        """
+        IP addresses demand and headroom of every workload subnet. Each fleet has an ASG (or node group) per AZ,
+        hence every subnet must fit the maximum size of every fleet.
+
+        :return:
+        """
+        fleets_demand = 0
+        max_nodes = 0
+        for fleet in self._fleets():
+            known_types = [instance_type for instance_type in self._instance_types(fleet)
+                           if self.instance_limits(instance_type)]
+            if not known_types:
+                continue
+            fleets_demand += fleet.get('autoscaling', {}).get('maxInstances') * max(
+                self.node_ips(instance_type) for instance_type in known_types
+            )
+            max_nodes += fleet.get('autoscaling', {}).get('maxInstances')
+        demand = fleets_demand + (self.cni_config.get('reservedIpsPerSubnet') or 0)
+
+        report = []
+        for subnet in self.subnet_layout.plan():
+            if subnet['name'] != SubnetLayout.PRIVATE:
+                continue
+            usable = subnet['cidr'].num_addresses - self.AWS_RESERVED_IPS
+            report.append({
+                **subnet,
+                'usable': usable,
+                'max_nodes': max_nodes,
+                'demand': demand,
+                'headroom': (usable - demand) / usable,
+            })
+
+        return report
+
+    def validate(self) -> None:
+        """
+        Fails when a workload subnet would run out of IPs (or of the minimum headroom) at maximum fleets size
+
+        :return:
+        """
+        minimum_headroom = self.cni_config.get('minimumHeadroom') or 0
+        for subnet in self.plan():
+            if subnet['headroom'] < minimum_headroom:
+                raise ValueError(
+                    f"{subnet['name']} subnet {subnet['cidr']} (AZ #{subnet['az_index']}) needs {subnet['demand']} IPs "
+                    f"at maximum fleets size, {subnet['usable']} are available and the minimum headroom is "
+                    f"{minimum_headroom:.0%}: review `vpc.subnetsCIDRSuffixes.private`, the fleets `maxInstances` "
+                    f"or `eks.cni`"
+                )
+
+    def _fleets(self) -> List[dict]:
+        return self.environment_config.get('eks', {}).get('workerNodesFleets', [])
+
+    @staticmethod
+    def _instance_types(fleet: dict) -> List[str]:
+        return fleet.get('instanceTypes') or [fleet.get('instanceType')]
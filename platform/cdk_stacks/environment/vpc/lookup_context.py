@@ -0,0 +1,119 @@
+import json
+from typing import Dict, List
+
+from cdk_stacks.environment.vpc.subnet_layout import SubnetLayout
+
+
+class LookupContext:
+    """
+    Context provider values for the lookups done at synth time (`Vpc.from_lookup`, availability zones).
+
+    Lookup results are cached by the CDK CLI in the version-controlled `cdk.context.json`; the stand-in provider
+    computes the same entries from the configuration instead, so synth needs neither network nor AWS credentials.
+    Context keys are built the way the CDK does (`ContextProvider.getKey` in @aws-cdk/core):
+    https://github.com/aws/aws-cdk/blob/v1.53.0/packages/%40aws-cdk/core/lib/context-provider.ts
+    """
+    STAND_IN_PROVIDER = 'stand-in'
+
+    def __init__(self, account: str, region: str) -> None:
+        self.account = account
+        self.region = region
+
+    @classmethod
+    def load(cls, file_path: str) -> Dict[str, object]:
+        """
+        Loads a context file (e.g. `cdk.context.json`), a missing file is an empty context
+
+        :param file_path:
+        :return:
+        """
+        try:
+            with open(file_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def vpc_key(self, vpc_filters: dict) -> str:
+        """
+        Context key of a `Vpc.from_lookup` call with the `vpcSelectionFilter` options
+
+        :param vpc_filters:
+        :return:
+        """
+        lookup_filter = {}
+        if vpc_filters.get('vpcId'):
+            lookup_filter['vpc-id'] = vpc_filters.get('vpcId')
+        if vpc_filters.get('vpcName'):
+            lookup_filter['tag:Name'] = vpc_filters.get('vpcName')
+        for tag, value in (vpc_filters.get('tags') or {}).items():
+            lookup_filter[f'tag:{tag}'] = value
+        if vpc_filters.get('isDefault') is not None:
+            lookup_filter['isDefault'] = 'true' if vpc_filters.get('isDefault') else 'false'
+
+        return self._key('vpc-provider', {'filter': lookup_filter, 'returnAsymmetricSubnets': True})
+
+    def availability_zones_key(self) -> str:
+        return self._key('availability-zones', {})
+
+    def stand_in(self, environment_config: dict) -> Dict[str, object]:
+        """
+        Context entries describing the `vpcSelectionFilter.standIn` VPC, with the subnet tiers of the `vpc` layout.
+        Availability zones given by letter are zones of the lookup region.
+
+        :param environment_config:
+        :return:
+        """
+        stand_in = environment_config.get('vpcSelectionFilter', {}).get('standIn', {})
+        availability_zones: List[str] = [
+            f"{self.region}{zone}" if len(zone) == 1 else zone for zone in stand_in.get('availabilityZones')
+        ]
+        context = {self.availability_zones_key(): availability_zones}
+
+        if not environment_config.get('vpcSelectionFilter', {}).get('enabled'):
+            return context
+
+        layout = SubnetLayout({
+            **environment_config.get('vpc', {}),
+            'cidr': stand_in.get('cidr'),
+            'maxAZs': len(availability_zones),
+        })
+        subnet_groups: Dict[str, dict] = {}
+        for counter, subnet in enumerate(layout.plan()):
+            subnet_groups.setdefault(subnet['name'], {
+                'name': subnet['name'],
+                'type': subnet['name'] if subnet['name'] != SubnetLayout.PRIVATE or not layout.private_only
+                else SubnetLayout.ISOLATED,
+                'subnets': [],
+            })['subnets'].append({
+                'subnetId': f'subnet-{counter:017x}',
+                'cidr': str(subnet['cidr']),
+                'availabilityZone': availability_zones[subnet['az_index']],
+                'routeTableId': f'rtb-{counter:017x}',
+            })
+
+        context[self.vpc_key(environment_config.get('vpcSelectionFilter', {}))] = {
+            'vpcId': stand_in.get('vpcId'),
+            'vpcCidrBlock': stand_in.get('cidr'),
+            'availabilityZones': availability_zones,
+            'subnetGroups': list(subnet_groups.values()),
+        }
+        return context
+
+    def _key(self, provider: str, props: dict) -> str:
+        return f"{provider}:{':'.join(self._props_to_list({'account': self.account, 'region': self.region, **props}))}"
+
+    @classmethod
+    def _props_to_list(cls, props: dict, key_prefix: str = '') -> List[str]:
+        values = []
+        for key, value in props.items():
+            if value is None:
+                continue
+            if isinstance(value, dict):
+                values += cls._props_to_list(value, f"{key_prefix}{key}.")
+            elif isinstance(value, str):
+                # Same quoting of the CDK (only the first occurrence is replaced)
+                values.append(f"{key_prefix}{key}={value.replace('$', '$$', 1).replace(':', '$:', 1)}")
+            else:
+                values.append(f"{key_prefix}{key}={json.dumps(value)}")
+
+        return sorted(values)
@@ -2,19 +2,31 @@ from typing import Union
 
 from aws_cdk.aws_ec2 import Vpc
 from aws_cdk.aws_eks import Cluster
-from aws_cdk.aws_route53 import PublicHostedZone, PrivateHostedZone
+from aws_cdk.aws_route53 import PublicHostedZone, PrivateHostedZone, IHostedZone
 
 from apps.abstract.base_app import BaseApp
 from cdk_stacks.abstract.base_stack import BaseStack
+from cdk_stacks.environment.vpc.eks.addons_stack import AddonsStack
+from cdk_stacks.environment.vpc.eks.chart_archives import ChartArchives
+from cdk_stacks.environment.vpc.eks.chart_renderer import ChartRenderer
 from cdk_stacks.environment.vpc.eks.eks_resources.external_dns import ExternalDns
+from cdk_stacks.environment.vpc.eks.image_cache import ImageCache
+from cdk_stacks.environment.vpc.eks.monitoring import Monitoring
 
 
 class Route53Stack(BaseStack):
     def __init__(self, scope: BaseApp, id: str, vpc: Vpc, eks_cluster: Cluster = None,
-                 **kwargs) -> None:
+                 image_cache: ImageCache = None, monitoring: Monitoring = None, chart_renderer: ChartRenderer = None,
+                 chart_archives: ChartArchives = None, **kwargs) -> None:
 
         super().__init__(scope, id, **kwargs)
         dns_config = scope.environment_config.get('dns', {})
+        dns_cluster = None
+        if dns_config.get('eksExternalDnsSyncEnabled') and isinstance(eks_cluster, Cluster) and (
+                dns_config.get("privateZone", {}).get("enabled") or dns_config.get("publicZone", {}).get("enabled")):
+            # external-dns gets its own add-ons stack, the zones don't depend on the cluster
+            dns_cluster = AddonsStack.addons_cluster(scope, eks_cluster, AddonsStack.DNS, chart_renderer,
+                                                     chart_archives)
         main_zone_domain_name = self.get_zone_fqdn(
             scope,
             dns_config.get('domainName'),
@@ -24,27 +36,39 @@ class Route53Stack(BaseStack):
                 main_zone_domain_name,
                 private_zone=True,
             )
-            self._create_zone(
+            zone = self._create_zone(
                 zone_id,
                 fqdn=main_zone_domain_name,
                 private_zone=True,
                 vpc=vpc
             )
-            # if dns_config.get('eksExternalDnsSyncEnabled') and isinstance(eks_cluster, Cluster):
-            #     ExternalDns.add_to_cluster(eks_cluster, ExternalDns.ZoneType.PRIVATE)
+            if dns_cluster:
+                self._sync_zone(dns_cluster, ExternalDns.ZoneType.PRIVATE, zone, dns_config, image_cache, monitoring)
         if dns_config.get("publicZone", {}).get("enabled"):
             zone_id = self._calculate_zone_identifier(
                 main_zone_domain_name,
                 private_zone=False,
             )
-            self._create_zone(
+            zone = self._create_zone(
                 zone_id,
                 fqdn=main_zone_domain_name,
                 private_zone=False,
                 vpc=vpc
             )
-            if dns_config.get('eksExternalDnsSyncEnabled') and isinstance(eks_cluster, Cluster):
-                ExternalDns.add_to_cluster(eks_cluster, ExternalDns.ZoneType.PUBLIC)
+            if dns_cluster:
+                self._sync_zone(dns_cluster, ExternalDns.ZoneType.PUBLIC, zone, dns_config, image_cache, monitoring)
+
+    @staticmethod
+    def _sync_zone(eks_cluster: Cluster, zone_type: ExternalDns.ZoneType, zone: IHostedZone, dns_config: dict,
+                   image_cache: ImageCache, monitoring: Monitoring) -> None:
+        ExternalDns.add_to_cluster(
+            eks_cluster,
+            zone_type,
+            zone,
+            dns_config.get('externalDns', {}),
+            image_cache,
+            monitoring,
+        )
 
     def _create_zone(self, zone_id: str, fqdn: str, private_zone: bool, vpc: Vpc) -> Union[
         PublicHostedZone, PrivateHostedZone]:
@@ -64,7 +88,15 @@ class Route53Stack(BaseStack):
 
     @staticmethod
     def get_zone_fqdn(scope: BaseApp, domain: str) -> str:
-        return f"{scope.environment_name}.{scope.environment_config.get('projectName')}.{domain}"
+        """
+        Environment zone name, targets get their own subdomain (e.g. us.prod.borg.test.com)
+
+        :param scope:
+        :param domain:
+        :return:
+        """
+        target = f"{scope.target_name}." if scope.target_name else ''
+        return f"{target}{scope.environment_name}.{scope.environment_config.get('projectName')}.{domain}"
 
     @staticmethod
     def _calculate_zone_identifier(fqdn: str, private_zone: bool):
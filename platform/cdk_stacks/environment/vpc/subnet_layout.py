@@ -0,0 +1,186 @@
+import ipaddress
+from typing import Dict, List, Optional
+
+from aws_cdk.aws_ec2 import SubnetConfiguration, SubnetType, SubnetSelection, IVpc, ISubnet
+
+
+class SubnetLayout:
+    """
+    VPC subnet tiers and NAT topology, built from the `vpc` configuration.
+
+    Private-only layouts (public tier disabled) can't have NAT gateways, hence the private tier gets created with
+    isolated subnets and a default route to the configured `privateDefaultRoute` target.
+    """
+    PUBLIC = 'Public'
+    PRIVATE = 'Private'
+    ISOLATED = 'Isolated'
+
+    # `privateDefaultRoute.targetType` values mapped to the `CfnRoute` property to set
+    DEFAULT_ROUTE_TARGETS = {
+        'NatGatewayId': 'nat_gateway_id',
+        'NetworkInterfaceId': 'network_interface_id',
+        'GatewayId': 'gateway_id',
+        'EgressOnlyInternetGatewayId': 'egress_only_internet_gateway_id',
+        'VpcPeeringConnectionId': 'vpc_peering_connection_id',
+        'TransitGatewayId': 'transit_gateway_id',
+        'InstanceId': 'instance_id',
+    }
+
+    # AWS allowed subnet sizes
+    MIN_SUBNET_SUFFIX = 16
+    MAX_SUBNET_SUFFIX = 28
+
+    def __init__(self, config: dict) -> None:
+        """
+        :param config: The `vpc` configuration
+        """
+        self.config = config
+        tiers = config.get('subnetTiers', {})
+        self.public_enabled = bool(tiers.get('public', True))
+        self.private_enabled = bool(tiers.get('private', True))
+        self.isolated_enabled = bool(tiers.get('isolated', True))
+        self.private_default_route: dict = config.get('privateDefaultRoute') or {}
+
+    @property
+    def private_only(self) -> bool:
+        return self.private_enabled and not self.public_enabled
+
+    def subnet_configuration(self) -> List[SubnetConfiguration]:
+        """
+        Get VPC subnets based on desired configuration.
+
+        :return:
+        """
+        return [
+            SubnetConfiguration(subnet_type=subnet_type, cidr_mask=cidr_mask, name=name)
+            for name, subnet_type, cidr_mask in self._tiers()
+        ]
+
+    def nat_gateways(self) -> int:
+        """
+        NAT gateways to create: one per AZ avoids cross-AZ hops (and charges) on every outbound call
+
+        :return:
+        """
+        if not self.private_enabled or self.private_only:
+            return 0
+
+        nat_config = self.config.get('natGateways', {})
+        if nat_config.get('perAZ', True):
+            return self.config.get('maxAZs')
+
+        return nat_config.get('count')
+
+    def workload_subnets(self) -> SubnetSelection:
+        """
+        Subnets hosting the workloads (nodes, pods, VPC endpoints)
+
+        :return:
+        """
+        if self.private_only:
+            return SubnetSelection(subnet_group_name=self.PRIVATE)
+
+        return SubnetSelection(subnet_type=SubnetType.PRIVATE)
+
+    def select_workload_subnets(self, vpc: IVpc) -> List[ISubnet]:
+        """
+        The workload subnets of the VPC, one per AZ
+
+        :param vpc:
+        :return:
+        """
+        if self.private_only:
+            return vpc.select_subnets(subnet_group_name=self.PRIVATE).subnets
+
+        return vpc.select_subnets(subnet_type=SubnetType.PRIVATE).subnets
+
+    def public_subnets(self) -> Optional[SubnetSelection]:
+        return SubnetSelection(subnet_type=SubnetType.PUBLIC) if self.public_enabled else None
+
+    def default_route_properties(self) -> Dict[str, str]:
+        """
+        `CfnRoute` properties of the private subnets default route (private-only layouts)
+
+        :return:
+        """
+        target_type = self.private_default_route.get('targetType')
+        destination = 'destination_ipv6_cidr_block' if target_type == 'EgressOnlyInternetGatewayId' \
+            else 'destination_cidr_block'
+
+        return {
+            destination: '::/0' if destination == 'destination_ipv6_cidr_block' else '0.0.0.0/0',
+            self.DEFAULT_ROUTE_TARGETS[target_type]: self.private_default_route.get('targetId'),
+        }
+
+    def plan(self) -> List[dict]:
+        """
+        Simulates the CDK subnets allocation: tiers are allocated in order, one subnet per AZ,
+        each subnet aligned to its own size.
+
+        :return: The planned subnets (`name`, `az_index`, `cidr`)
+        """
+        network = ipaddress.ip_network(self.config.get('cidr'))
+        next_address = int(network.network_address)
+        subnets = []
+        for name, _, cidr_mask in self._tiers():
+            size = 2 ** (32 - cidr_mask)
+            for az_index in range(self.config.get('maxAZs')):
+                next_address = -(-next_address // size) * size  # align to the subnet size
+                subnet = ipaddress.ip_network((next_address, cidr_mask))
+                if not subnet.subnet_of(network):
+                    raise ValueError(
+                        f"`vpc.cidr` {network} has no room for the {name} subnet in AZ #{az_index} "
+                        f"(/{cidr_mask}), review `vpc.subnetsCIDRSuffixes` and `vpc.maxAZs`"
+                    )
+                subnets.append({'name': name, 'az_index': az_index, 'cidr': subnet})
+                next_address += size
+
+        return subnets
+
+    def validate(self, eks_enabled: bool) -> None:
+        """
+        Validates the layout up front, rather than failing at synth or deploy time
+
+        :param eks_enabled:
+        :return:
+        """
+        if eks_enabled and not self.private_enabled:
+            raise ValueError("EKS nodes run in private subnets, `vpc.subnetTiers.private` must be enabled")
+
+        if self.private_only:
+            if self.private_default_route.get('targetType') not in self.DEFAULT_ROUTE_TARGETS:
+                raise ValueError(
+                    "Private-only layouts need a `vpc.privateDefaultRoute.targetType`, one of "
+                    f"{', '.join(self.DEFAULT_ROUTE_TARGETS.keys())}"
+                )
+            if not self.private_default_route.get('targetId'):
+                raise ValueError("Private-only layouts need a `vpc.privateDefaultRoute.targetId`")
+
+        if not self.private_only and self.private_enabled and not self.nat_gateways():
+            raise ValueError("Private subnets need at least one NAT gateway (`vpc.natGateways.count`)")
+
+        network = ipaddress.ip_network(self.config.get('cidr'))
+        for name, _, cidr_mask in self._tiers():
+            if not network.prefixlen <= cidr_mask or not self.MIN_SUBNET_SUFFIX <= cidr_mask <= self.MAX_SUBNET_SUFFIX:
+                raise ValueError(
+                    f"{name} subnets CIDR suffix /{cidr_mask} must be between /{max(network.prefixlen, self.MIN_SUBNET_SUFFIX)} "
+                    f"and /{self.MAX_SUBNET_SUFFIX}"
+                )
+
+        self.plan()
+
+    def _tiers(self) -> List[tuple]:
+        suffixes = self.config.get('subnetsCIDRSuffixes', {})
+        tiers = []
+        if self.public_enabled:
+            tiers.append((self.PUBLIC, SubnetType.PUBLIC, suffixes.get('public')))
+        if self.private_enabled:
+            tiers.append((
+                self.PRIVATE,
+                SubnetType.ISOLATED if self.private_only else SubnetType.PRIVATE,
+                suffixes.get('private'),
+            ))
+        if self.isolated_enabled:
+            tiers.append((self.ISOLATED, SubnetType.ISOLATED, suffixes.get('isolated')))
+
+        return tiers
@@ -0,0 +1,169 @@
+import functools
+import inspect
+import json
+import os
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+
+class ProfileSpan:
+    def __init__(self, name: str, parent: Optional['ProfileSpan'] = None) -> None:
+        self.name = name
+        self.parent = parent
+        self.seconds = 0.0
+        self.children_seconds = 0.0
+        self.jsii_calls: Counter = Counter()
+
+    @property
+    def path(self) -> str:
+        return f"{self.parent.path};{self.name}" if self.parent else self.name
+
+
+class SynthProfiler:
+    """
+    Opt-in synth profiling, enabled by `CDK_SYNTH_PROFILE=<output prefix>`. Times the stacks constructors and the
+    add-ons `add_to_cluster` calls, counting the JSII calls made by each of them and per construct type.
+    Writes `<prefix>.folded` (collapsed stacks with the self time in microseconds, for flamegraph.pl or
+    speedscope) and `<prefix>.json` (summary).
+    """
+    ENV_VAR = 'CDK_SYNTH_PROFILE'
+    JSII_CALLS = ['create', 'get', 'set', 'sget', 'sset', 'invoke', 'sinvoke']
+
+    def __init__(self, output_prefix: Optional[str] = None) -> None:
+        """
+        :param output_prefix: Profiling is disabled when missing
+        """
+        self.output_prefix = output_prefix
+        self.spans: List[ProfileSpan] = []
+        self.constructs_jsii_calls: Dict[str, Counter] = {}
+        self._current: Optional[ProfileSpan] = None
+        self._spans_by_path: Dict[str, ProfileSpan] = {}
+
+    @classmethod
+    def from_env(cls) -> 'SynthProfiler':
+        profiler = cls(os.getenv(cls.ENV_VAR) or None)
+        if profiler.enabled:
+            profiler.install()
+
+        return profiler
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.output_prefix)
+
+    def install(self, package: str = 'cdk_stacks') -> None:
+        """
+        Instruments the JSII kernel calls, and the stacks and add-ons of the package already imported (by the app)
+
+        :param package:
+        :return:
+        """
+        import jsii
+        from cdk_stacks.abstract.base_stack import BaseStack
+
+        modules = [module for name, module in list(sys.modules.items()) if name.startswith(f'{package}.')]
+        for module in modules:
+            for name, klass in inspect.getmembers(module, inspect.isclass):
+                if klass.__module__ != module.__name__:
+                    continue
+                if issubclass(klass, BaseStack) and '__init__' in klass.__dict__:
+                    self._instrument_constructor(klass)
+                if isinstance(klass.__dict__.get('add_to_cluster'), classmethod):
+                    self._instrument_add_to_cluster(klass)
+
+        for call in self.JSII_CALLS:
+            setattr(jsii, call, self._count_jsii_call(call, getattr(jsii, call)))
+
+    @contextmanager
+    def span(self, name: str):
+        """
+        Times the block, nested in the current span
+
+        :param name:
+        :return:
+        """
+        if not self.enabled:
+            yield
+            return
+
+        parent = self._current
+        path = f"{parent.path};{name}" if parent else name
+        span = self._spans_by_path.get(path)
+        if not span:
+            span = self._spans_by_path[path] = ProfileSpan(name, parent)
+            self.spans.append(span)
+        self._current = span
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started_at
+            span.seconds += elapsed
+            if parent:
+                parent.children_seconds += elapsed
+            self._current = parent
+
+    def write(self) -> None:
+        if not self.enabled:
+            return
+
+        with open(f"{self.output_prefix}.folded", 'w') as f:
+            for span in self.spans:
+                f.write(f"{span.path} {round(1e6 * (span.seconds - span.children_seconds))}\n")
+
+        with open(f"{self.output_prefix}.json", 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def summary(self) -> dict:
+        return {
+            "spans": [
+                {
+                    "path": span.path,
+                    "seconds": round(span.seconds, 3),
+                    "self_seconds": round(span.seconds - span.children_seconds, 3),
+                    "jsii_calls": sum(span.jsii_calls.values()),
+                    "jsii_calls_by_kind": dict(span.jsii_calls),
+                }
+                for span in sorted(self.spans, key=lambda span: span.seconds, reverse=True)
+            ],
+            "constructs": {
+                construct: dict(calls, total=sum(calls.values()))
+                for construct, calls in sorted(
+                    self.constructs_jsii_calls.items(), key=lambda item: sum(item[1].values()), reverse=True
+                )
+            },
+        }
+
+    def _instrument_constructor(self, klass: type) -> None:
+        constructor = klass.__init__
+
+        @functools.wraps(constructor)
+        def profiled_constructor(instance, scope, id, *args, **kwargs):
+            with self.span(f"{klass.__name__}:{id}"):
+                constructor(instance, scope, id, *args, **kwargs)
+
+        klass.__init__ = profiled_constructor
+
+    def _instrument_add_to_cluster(self, klass: type) -> None:
+        add_to_cluster = klass.__dict__['add_to_cluster'].__func__
+
+        @functools.wraps(add_to_cluster)
+        def profiled_add_to_cluster(cls, *args, **kwargs):
+            with self.span(f"{klass.__name__}.add_to_cluster"):
+                return add_to_cluster(cls, *args, **kwargs)
+
+        klass.add_to_cluster = classmethod(profiled_add_to_cluster)
+
+    def _count_jsii_call(self, call: str, function):
+        @functools.wraps(function)
+        def counted_call(target, *args, **kwargs):
+            construct = target.__name__ if isinstance(target, type) else type(target).__name__
+            self.constructs_jsii_calls.setdefault(construct, Counter())[call] += 1
+            if self._current:
+                self._current.jsii_calls[call] += 1
+            return function(target, *args, **kwargs)
+
+        return counted_call
@@ -0,0 +1,89 @@
+import json
+import os
+from typing import Dict, List
+
+
+class TemplateReport:
+    """
+    Size of the synthesized CloudFormation templates against the CloudFormation quotas, read from the cloud assembly.
+    https://docs.aws.amazon.com/AWSCloudFormation/latest/UserGuide/cloudformation-limits.html
+    """
+    LIMITS: Dict[str, int] = {
+        'bytes': 1000000,  # Templates uploaded to S3, as the CDK does for templates bigger than 51200 bytes
+        'resources': 500,
+        'outputs': 200,
+        'parameters': 200,
+    }
+    # Ratio of a limit from which a warning is reported
+    WARNING_RATIO = 0.8
+
+    def __init__(self, assembly_path: str) -> None:
+        """
+        :param assembly_path: The cloud assembly directory (`cdk.out`)
+        """
+        self.assembly_path = assembly_path
+
+    def templates(self) -> Dict[str, dict]:
+        """
+        The stacks templates, keyed by stack name
+
+        :return:
+        """
+        with open(os.path.join(self.assembly_path, 'manifest.json')) as f:
+            manifest = json.load(f)
+
+        templates = {}
+        for name, artifact in manifest.get('artifacts', {}).items():
+            if artifact.get('type') != 'aws:cloudformation:stack':
+                continue
+            with open(os.path.join(self.assembly_path, artifact.get('properties', {}).get('templateFile'))) as f:
+                templates[name] = json.load(f)
+
+        return templates
+
+    def report(self) -> List[dict]:
+        """
+        Usage of every limit, and the biggest resources, of each stack
+
+        :return:
+        """
+        report = []
+        for name, template in self.templates().items():
+            usage = {
+                'bytes': len(json.dumps(template)),
+                'resources': len(template.get('Resources', {})),
+                'outputs': len(template.get('Outputs', {})),
+                'parameters': len(template.get('Parameters', {})),
+            }
+            report.append({
+                'stack': name,
+                'usage': usage,
+                'warnings': [
+                    f"{limit} {used}/{self.LIMITS[limit]}" for limit, used in usage.items()
+                    if used >= self.WARNING_RATIO * self.LIMITS[limit]
+                ],
+                'exceeded': [limit for limit, used in usage.items() if used > self.LIMITS[limit]],
+                'biggest_resources': sorted(
+                    [
+                        (logical_id, resource.get('Type'), len(json.dumps(resource)))
+                        for logical_id, resource in template.get('Resources', {}).items()
+                    ],
+                    key=lambda resource: resource[2],
+                    reverse=True,
+                )[:5],
+            })
+
+        return report
+
+    def validate(self) -> None:
+        """
+        Fails when a template exceeds a limit
+
+        :return:
+        """
+        for stack in self.report():
+            if stack['exceeded']:
+                raise ValueError(
+                    f"Stack {stack['stack']} exceeds the CloudFormation {', '.join(stack['exceeded'])} limits, "
+                    f"move resources to another stack (e.g. `eks.addonsStacks`)"
+                )
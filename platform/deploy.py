@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+
+from cdk_stacks.deploy_orchestrator import DeployOrchestrator, CdkDeployBackend, DryRunDeployBackend
+
+# Deploys the synthesized stacks (run `cdk synth` first) in parallel following their dependencies
+parser = argparse.ArgumentParser()
+parser.add_argument('--assembly', default='cdk.out', help='Cloud assembly directory')
+parser.add_argument('--concurrency', type=int, default=int(os.getenv('DEPLOY_CONCURRENCY', '4')))
+parser.add_argument('--outputs-file', default='outputs.json', help='Stacks outputs, as written by `cdk deploy -O`')
+parser.add_argument('--timings-file', default=None, help='Writes the steps timings in this JSON file')
+parser.add_argument('--dry-run', action='store_true', help='Shows the steps schedule without deploying')
+args = parser.parse_args()
+
+backend = DryRunDeployBackend() if args.dry_run else CdkDeployBackend(
+    args.assembly,
+    args.outputs_file,
+    cdk_command=os.getenv('CDK_COMMAND', 'cdk'),
+)
+steps = DeployOrchestrator(args.assembly, backend, args.concurrency).deploy()
+if not steps:
+    raise SystemExit(f"No stacks found in {args.assembly}")
+
+started_at = min(step.started_at for step in steps)
+timings = [
+    {
+        'step': step.name,
+        'start': round(step.started_at - started_at, 3),
+        'duration': round(step.finished_at - step.started_at, 3),
+    }
+    for step in sorted(steps, key=lambda step: step.started_at)
+]
+for timing in timings:
+    print(f"{timing['step']}: started at +{timing['start']:.1f}s, took {timing['duration']:.1f}s")
+print(f"Total: {max(step.finished_at for step in steps) - started_at:.1f}s")
+
+if args.timings_file:
+    with open(args.timings_file, 'w') as f:
+        json.dump(timings, f, indent=2)
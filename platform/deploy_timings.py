@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+import subprocess
+
+from cdk_stacks.deploy_timings import StackEvents, DeployTimingsStore
+
+# Records the deploy timings of the synthesized stacks from their CloudFormation events, and reports on them
+parser = argparse.ArgumentParser()
+parser.add_argument('--database', default=os.getenv('DEPLOY_TIMINGS_DATABASE', 'deploy-timings.sqlite'))
+parser.add_argument('--environment', default=os.getenv('CIRCLE_BRANCH', 'env-test'))
+subparsers = parser.add_subparsers(dest='command', required=True)
+
+record_parser = subparsers.add_parser('record', help='Stores the timings of the last deploy of every stack')
+record_parser.add_argument('--assembly', default='cdk.out', help='Cloud assembly directory')
+record_parser.add_argument('--git-sha', default=os.getenv('CIRCLE_SHA1'))
+record_parser.add_argument('--events-dir', default=None,
+                           help='Reads `<stack>.json` recorded `describe-stack-events` outputs instead of AWS')
+
+slowest_parser = subparsers.add_parser('slowest', help='Slowest resources of the last deploy')
+slowest_parser.add_argument('--git-sha', default=None)
+slowest_parser.add_argument('--limit', type=int, default=10)
+
+regressions_parser = subparsers.add_parser('regressions', help='Resources slower than in the previous deploys')
+regressions_parser.add_argument('--ratio', type=float, default=1.5)
+regressions_parser.add_argument('--min-delta', type=float, default=30)
+
+args = parser.parse_args()
+store = DeployTimingsStore(args.database)
+
+if args.command == 'record':
+    git_sha = args.git_sha or subprocess.run(
+        ['git', 'rev-parse', 'HEAD'], check=True, capture_output=True, text=True
+    ).stdout.strip()
+    with open(os.path.join(args.assembly, 'manifest.json')) as f:
+        artifacts = json.load(f).get('artifacts', {})
+    for name, artifact in artifacts.items():
+        if artifact.get('type') != 'aws:cloudformation:stack':
+            continue
+        stack_name = artifact.get('properties', {}).get('stackName', name)
+        # Targets stacks are in other regions, environment is `aws://<account>/<region>`
+        region = artifact.get('environment', '').rpartition('/')[2]
+        events = StackEvents.from_file(stack_name, os.path.join(args.events_dir, f"{stack_name}.json")) \
+            if args.events_dir else StackEvents.from_aws(stack_name, None if region.startswith('unknown-') else region)
+        print(f"{stack_name}: {store.record(args.environment, git_sha, events.resource_timings())} timings recorded")
+
+if args.command == 'slowest':
+    for timing in store.slowest(args.environment, args.git_sha, args.limit):
+        print(f"{timing['duration']:>7.0f}s {timing['stack']} {timing['logical_id']} ({timing['resource_type']}, "
+              f"{timing['status']}, {timing['git_sha'][:8]})")
+
+if args.command == 'regressions':
+    for timing in store.regressions(args.environment, args.ratio, args.min_delta):
+        print(f"{timing['duration']:>7.0f}s (median {timing['median']:.0f}s) {timing['stack']} {timing['logical_id']} "
+              f"({timing['resource_type']}, {timing['git_sha'][:8]})")
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+import os
+
+from aws_cdk.core import Environment
+
+from apps.abstract.base_app import BaseApp
+from cdk_stacks.environment.vpc.ip_capacity import IpCapacityPlanner
+
+platform_account_env = Environment(
+    account=os.getenv("AWS_ACCOUNT_ID", "360064003702"),
+    region=os.getenv("AWS_DEFAULT_REGION", "eu-west-1"),
+)
+
+users_account_env = Environment(
+    account=os.getenv("AWS_BASTION_ACCOUNT_ID", platform_account_env.account),
+    region=os.getenv("AWS_DEFAULT_REGION", platform_account_env.region),
+)
+
+# Prints the private subnets IP capacity at maximum fleets size, fails as synth would
+app = BaseApp(platform_account_env=platform_account_env, users_account_env=users_account_env)
+planner = IpCapacityPlanner(app.environment_config)
+for instance_type in planner.unknown_instance_types():
+    print(f"Unknown ENI limits of `{instance_type}`, add them to `eks.cni.instanceLimits`: its fleets are left out")
+for subnet in planner.plan():
+    print(
+        f"AZ #{subnet['az_index']} {subnet['name']} {subnet['cidr']}: {subnet['usable']} usable IPs, "
+        f"{subnet['demand']} needed by {subnet['max_nodes']} nodes, headroom {subnet['headroom']:.1%}"
+    )
+planner.validate()
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+import os
+
+from aws_cdk.core import Environment
+
+from apps.abstract.base_app import BaseApp
+from cdk_stacks.environment.vpc.eks.eks_resources.external_secrets.sync_planner import SecretSyncPlanner
+
+platform_account_env = Environment(
+    account=os.getenv("AWS_ACCOUNT_ID", "360064003702"),
+    region=os.getenv("AWS_DEFAULT_REGION", "eu-west-1"),
+)
+
+users_account_env = Environment(
+    account=os.getenv("AWS_BASTION_ACCOUNT_ID", platform_account_env.account),
+    region=os.getenv("AWS_DEFAULT_REGION", platform_account_env.region),
+)
+
+# Polls a stand-in of every backend with the configured load, fails as synth would
+app = BaseApp(platform_account_env=platform_account_env, users_account_env=users_account_env)
+planner = SecretSyncPlanner(app.environment_config.get('eks', {}).get('externalSecrets', {}))
+for backend in planner.plan():
+    print(
+        f"{backend['backend']}: {backend['keys']} keys, {backend['average_rate']:.2f} requests/s on average "
+        f"(limit {backend['rate_limit']}/s), {backend['throttled']} of {backend['requests']} requests throttled, "
+        f"secrets synced at least every {backend['max_sync_gap']:.0f}s"
+    )
+planner.validate()
@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+import sys
+
+from cdk_stacks.template_report import TemplateReport
+
+# Prints the synthesized templates size against the CloudFormation limits (run `cdk synth` first)
+report = TemplateReport(sys.argv[1] if len(sys.argv) > 1 else 'cdk.out')
+for stack in report.report():
+    usage = ', '.join(
+        f"{used} {limit} ({used / TemplateReport.LIMITS[limit]:.0%})" for limit, used in stack['usage'].items()
+    )
+    print(f"{stack['stack']}: {usage}")
+    for logical_id, resource_type, size in stack['biggest_resources']:
+        print(f"  {logical_id} ({resource_type}): {size} bytes")
+    for warning in stack['warnings']:
+        print(f"  WARNING: close to the {warning} limit")
+report.validate()
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+import argparse
+import os
+
+from aws_cdk.core import Environment
+
+from apps.abstract.base_app import BaseApp
+from cdk_stacks.environment.vpc.eks.chart_archives import ChartArchives
+
+platform_account_env = Environment(
+    account=os.getenv("AWS_ACCOUNT_ID", "360064003702"),
+    region=os.getenv("AWS_DEFAULT_REGION", "eu-west-1"),
+)
+
+users_account_env = Environment(
+    account=os.getenv("AWS_BASTION_ACCOUNT_ID", platform_account_env.account),
+    region=os.getenv("AWS_DEFAULT_REGION", platform_account_env.region),
+)
+
+# Downloads the charts archives listed in `charts.json` and locks their digests, a chart given with its version and
+# repository gets added to the list first
+parser = argparse.ArgumentParser()
+parser.add_argument('--chart', default=None)
+parser.add_argument('--version', default=None)
+parser.add_argument('--repository', default=None)
+args = parser.parse_args()
+if args.chart and not (args.version and args.repository):
+    parser.error('--chart needs --version and --repository')
+
+app = BaseApp(platform_account_env=platform_account_env, users_account_env=users_account_env)
+archives = ChartArchives(app.environment_config.get('eks', {}).get('vendoredCharts', {}))
+archives.vendor(args.chart, args.version, args.repository)
+for chart, locked in sorted(archives.lock.items()):
+    print(f"{chart} {locked['version']} {locked['digest']}")
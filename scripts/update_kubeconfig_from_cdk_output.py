@@ -1,5 +1,6 @@
 import json
 import os
+import sys
 
 
 def _find_kubeconfig_command(obj):
@@ -16,4 +17,6 @@ def _find_kubeconfig_command(obj):
 
 
 with open(os.path.join(os.path.dirname(__file__), '..', 'outputs.json')) as f:
-    print(_find_kubeconfig_command(json.load(f)))
+    outputs = json.load(f)
+# Outputs of the given cluster stack only, as every target has its own cluster
+print(_find_kubeconfig_command(outputs.get(sys.argv[1], {}) if len(sys.argv) > 1 else outputs))
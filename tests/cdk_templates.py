@@ -0,0 +1,32 @@
+import json
+from typing import List
+
+
+def kubernetes_manifests(template: dict) -> List[dict]:
+    """
+    Kubernetes objects of the template `KubernetesResource`s, only the ones without CloudFormation tokens
+    """
+    manifests = []
+    for resource in template.get('Resources', {}).values():
+        manifest = resource.get('Properties', {}).get('Manifest')
+        if resource.get('Type') == 'Custom::AWSCDK-EKS-KubernetesResource' and isinstance(manifest, str):
+            manifests += json.loads(manifest)
+
+    return manifests
+
+
+def kubernetes_manifest(template: dict, kind: str, name: str) -> dict:
+    return next(
+        manifest for manifest in kubernetes_manifests(template)
+        if manifest.get('kind') == kind and manifest.get('metadata', {}).get('name') == name
+    )
+
+
+def helm_values(template: dict, release: str) -> dict:
+    """
+    Values of a `HelmChart` release, it must have no CloudFormation tokens
+    """
+    return next(
+        json.loads(resource['Properties']['Values']) for resource in template.get('Resources', {}).values()
+        if resource.get('Type') == 'Custom::AWSCDK-EKS-HelmChart' and resource['Properties'].get('Release') == release
+    )
@@ -0,0 +1,39 @@
+import os
+import sys
+from typing import Optional
+
+import pytest
+import yaml
+
+# Same import root of the app (`platform/app.py`)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'platform'))
+
+FIXTURES_PATH = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+@pytest.fixture
+def synth(tmp_path, monkeypatch):
+    """
+    Synthesizes the platform app with the default configuration and the given environment configuration
+    (instead of the `config` directory ones), returns the cloud assembly
+    """
+    pytest.importorskip('aws_cdk.core')
+    from aws_cdk.core import Environment
+    from apps.abstract.base_app import BaseApp
+    from apps.platform import Platform
+
+    def synth_platform(config: Optional[dict] = None, environment: str = 'env-test'):
+        config_path = tmp_path / 'config'
+        config_path.mkdir(exist_ok=True)
+        (config_path / f'{environment}.yaml').write_text(yaml.dump(config or {}))
+        monkeypatch.setattr(BaseApp, '_config_path', str(config_path))
+        monkeypatch.setenv('CIRCLE_BRANCH', environment)
+
+        account_env = Environment(account='360064003702', region='eu-west-1')
+        return Platform(
+            platform_account_env=account_env,
+            users_account_env=account_env,
+            outdir=str(tmp_path / f'cdk.out-{environment}'),
+        ).synth()
+
+    return synth_platform
@@ -0,0 +1,54 @@
+import json
+
+
+def stacks_by_name(assembly) -> dict:
+    return {stack.stack_name: stack for stack in assembly.stacks}
+
+
+def service_account_manifests(template: dict) -> dict:
+    return {
+        logical_id: resource for logical_id, resource in template.get('Resources', {}).items()
+        if resource.get('Type') == 'Custom::AWSCDK-EKS-KubernetesResource'
+        and '\\"kind\\":\\"ServiceAccount\\"' in json.dumps(resource.get('Properties', {}).get('Manifest'))
+    }
+
+
+def test_addons_stacks_dependencies(synth):
+    stacks = stacks_by_name(synth())
+
+    assert {'env-test-borg-EKS-base', 'env-test-borg-EKS-monitoring', 'env-test-borg-EKS-logging',
+            'env-test-borg-EKS-dns'} <= set(stacks)
+    assert [dependency.id for dependency in stacks['env-test-borg-EKS'].dependencies] == ['env-test-borg-VPC']
+    assert [dependency.id for dependency in stacks['env-test-borg-route53'].dependencies] == ['env-test-borg-VPC']
+    # Charts with ServiceMonitors wait for prometheus-operator, which waits for nothing but the cluster
+    assert [dependency.id for dependency in stacks['env-test-borg-EKS-monitoring'].dependencies] == \
+        ['env-test-borg-EKS']
+    assert {dependency.id for dependency in stacks['env-test-borg-EKS-dns'].dependencies} == \
+        {'env-test-borg-EKS', 'env-test-borg-EKS-monitoring', 'env-test-borg-route53'}
+    for name, stack in stacks.items():
+        if not name.startswith('env-test-borg-EKS-'):
+            assert not [dependency.id for dependency in stack.dependencies if 'EKS-' in dependency.id], name
+
+
+def test_service_accounts_in_addons_stacks(synth):
+    stacks = stacks_by_name(synth())
+
+    assert not service_account_manifests(stacks['env-test-borg-EKS'].template)
+    for group in ['base', 'monitoring', 'dns']:
+        template = stacks[f'env-test-borg-EKS-{group}'].template
+        manifests = service_account_manifests(template)
+        assert manifests, group
+        for logical_id, resource in manifests.items():
+            role_arns = [
+                part['Fn::GetAtt'][0] for part in resource['Properties']['Manifest']['Fn::Join'][1]
+                if isinstance(part, dict) and 'Fn::GetAtt' in part
+            ]
+            assert len(role_arns) == 1, logical_id
+            assert template['Resources'][role_arns[0]]['Type'] == 'AWS::IAM::Role'
+
+
+def test_addons_in_cluster_stack(synth):
+    stacks = stacks_by_name(synth({'eks': {'addonsStacks': {'enabled': False}}}))
+
+    assert not [name for name in stacks if name.startswith('env-test-borg-EKS-')]
+    assert service_account_manifests(stacks['env-test-borg-EKS'].template)
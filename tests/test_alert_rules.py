@@ -0,0 +1,143 @@
+import glob
+import json
+import os
+
+import pytest
+import yaml
+
+from cdk_templates import kubernetes_manifest
+
+# The `cdk_stacks.environment.vpc` package imports the CDK
+pytest.importorskip('aws_cdk.core')
+
+from apps.abstract.base_app import BaseApp  # noqa: E402
+from cdk_stacks.environment.vpc.eks.eks_resources.prometheus_operator.alert_rules import \
+    PlatformAlertRules  # noqa: E402
+
+PROMTOOL_TESTS_PATH = os.path.join(os.path.dirname(__file__), '..', 'monitoring', 'tests')
+
+
+def alerts_config() -> dict:
+    with open(os.path.join(BaseApp._default_config_path, 'env.yaml')) as f:
+        return yaml.load(f, Loader=yaml.FullLoader)['eks']['monitoring']['alerts']
+
+
+def rules(groups: list) -> list:
+    return [rule for group in groups for rule in group['rules']]
+
+
+def alert(groups: list, name: str) -> dict:
+    return next(rule for rule in rules(groups) if rule.get('alert') == name)
+
+
+def test_rule_groups():
+    groups = PlatformAlertRules.groups(alerts_config())
+
+    assert [group['name'] for group in groups] == [
+        'platform.capacity',
+        'platform.autoscaler',
+        'platform.dns',
+        'platform.ingress-slo',
+    ]
+    for rule in rules(groups):
+        assert ('alert' in rule) != ('record' in rule)
+        assert rule['expr'].count('(') == rule['expr'].count(')'), rule['expr']
+        assert rule['expr'].count('{') == rule['expr'].count('}'), rule['expr']
+        assert 'None' not in rule['expr'], rule['expr']
+        if 'alert' in rule:
+            assert rule['for'] and rule['labels']['severity'] in ['warning', 'critical']
+            assert rule['annotations']['summary']
+
+
+def test_thresholds_from_config():
+    groups = PlatformAlertRules.groups({
+        **alerts_config(),
+        'saturationFor': '30m',
+        'nodeCpuSaturation': 0.75,
+        'pendingPods': 12,
+        'dnsLatencySeconds': 0.25,
+    })
+
+    cpu = alert(groups, 'NodeCPUSaturated')
+    assert cpu['expr'].endswith('> 0.75')
+    assert cpu['for'] == '30m'
+    assert alert(groups, 'PodsPending')['expr'] == 'sum(kube_pod_status_phase{phase="Pending"}) > 12'
+    assert alert(groups, 'CoreDNSLatencyHigh')['expr'].endswith('> 0.25')
+
+
+def test_ingress_slo_burn_rates():
+    groups = PlatformAlertRules.groups({
+        **alerts_config(),
+        'ingressLatency': {'thresholdMilliseconds': 250, 'objective': 0.995},
+    })
+    slo_group = groups[-1]
+
+    recorded = {rule['record']: rule['expr'] for rule in slo_group['rules'] if 'record' in rule}
+    windows = {window for _, _, long, short in PlatformAlertRules.BURN_RATE_WINDOWS for window in [long, short]}
+    assert set(recorded) == {f'platform:ingress_slow_requests:ratio_rate{window}' for window in windows}
+    assert all('le="250"' in expr for expr in recorded.values())
+
+    burn_alerts = [rule for rule in slo_group['rules'] if rule.get('alert') == 'IngressLatencySLOBudgetBurn']
+    assert len(burn_alerts) == len(PlatformAlertRules.BURN_RATE_WINDOWS)
+    for rule, (severity, burn_rate, long_window, short_window) in zip(burn_alerts,
+                                                                     PlatformAlertRules.BURN_RATE_WINDOWS):
+        assert rule['labels']['severity'] == severity
+        assert rule['expr'] == (
+            f'platform:ingress_slow_requests:ratio_rate{long_window} > ({burn_rate} * 0.005) '
+            f'and platform:ingress_slow_requests:ratio_rate{short_window} > ({burn_rate} * 0.005)'
+        )
+        # Every window used by the alerts is recorded
+        assert f'platform:ingress_slow_requests:ratio_rate{long_window}' in recorded
+        assert f'platform:ingress_slow_requests:ratio_rate{short_window}' in recorded
+
+
+def test_prometheus_rule_provisioning(synth):
+    template = next(stack.template for stack in synth().stacks if stack.stack_name == 'env-test-borg-EKS-monitoring')
+
+    prometheus_rule = kubernetes_manifest(template, 'PrometheusRule', 'platform')
+    assert prometheus_rule['apiVersion'] == 'monitoring.coreos.com/v1'
+    assert prometheus_rule['spec']['groups'] == PlatformAlertRules.groups(alerts_config())
+
+
+@pytest.mark.parametrize('test_file', sorted(glob.glob(os.path.join(PROMTOOL_TESTS_PATH, '*.test.yaml'))))
+def test_promtool_tests_match_the_rules(test_file):
+    """
+    The promtool rule unit tests (`make test-alert-rules`) reference existing alerts and recording rules
+    """
+    groups = PlatformAlertRules.groups(alerts_config())
+    alerts = {}
+    for rule in rules(groups):
+        if 'alert' in rule:
+            alerts.setdefault(rule['alert'], []).append(rule)
+    records = {rule['record'] for rule in rules(groups) if 'record' in rule}
+    with open(test_file) as f:
+        promtool_tests = yaml.safe_load(f)
+
+    assert promtool_tests['rule_files'] == ['../rules/platform.rules.yaml']
+    for test in promtool_tests['tests']:
+        for alert_test in test.get('alert_rule_test', []):
+            assert alert_test['alertname'] in alerts
+            for expected in alert_test['exp_alerts']:
+                assert any(
+                    expected['exp_labels'].items() >= rule['labels'].items() and
+                    expected['exp_annotations'].keys() == rule['annotations'].keys()
+                    for rule in alerts[alert_test['alertname']]
+                ), expected
+        for expr_test in test.get('promql_expr_test', []):
+            assert expr_test['expr'] in records
+
+
+def test_cluster_autoscaler_job(synth):
+    from cdk_stacks.environment.vpc.eks.eks_resources.cluster_autoscaler import ClusterAutoscaler
+
+    template = next(stack.template for stack in synth().stacks if stack.stack_name == 'env-test-borg-EKS-base')
+
+    # The chart values reference the cluster name, they are a CloudFormation join
+    values = next(
+        json.dumps(resource['Properties']['Values']) for resource in template['Resources'].values()
+        if resource['Type'] == 'Custom::AWSCDK-EKS-HelmChart' and
+        resource['Properties']['Release'] == 'cluster-autoscaler'
+    )
+    assert json.dumps(f'"fullnameOverride":"{ClusterAutoscaler.FULLNAME}"')[1:-1] in values
+    assert f'job="{ClusterAutoscaler.FULLNAME}"' in \
+        alert(PlatformAlertRules.groups(alerts_config()), 'ClusterAutoscalerDown')['expr']
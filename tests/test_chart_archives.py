@@ -0,0 +1,70 @@
+import json
+import os
+
+import pytest
+
+pytest.importorskip('aws_cdk.core')
+
+from cdk_stacks.environment.vpc.eks.chart_archives import ChartArchives  # noqa: E402
+
+CHARTS = {
+    'metrics-server': {'version': '4.2.1', 'repository': 'https://charts.bitnami.com/bitnami'},
+    'grafana': {'version': '3.1.1', 'repository': 'https://charts.bitnami.com/bitnami'},
+}
+
+
+@pytest.fixture
+def archives(tmp_path):
+    """
+    Charts directory with the listed charts already downloaded, `helm pull` isn't run
+    """
+    (tmp_path / ChartArchives.CHARTS_FILE).write_text(json.dumps(CHARTS))
+    for chart, requested in CHARTS.items():
+        (tmp_path / f"{chart}-{requested['version']}.tgz").write_bytes(f"{chart} archive".encode())
+
+    return ChartArchives({'enabled': True, 'directory': str(tmp_path)})
+
+
+def test_repository_lock_is_complete():
+    repository_charts = ChartArchives({'directory': os.path.join(os.path.dirname(__file__), '..', 'charts')})
+
+    # Every vendored chart is pinned by digest
+    assert all(locked['digest'].startswith('sha256:') for locked in repository_charts.lock.values())
+    assert repository_charts.charts
+
+
+def test_vendor_locks_the_digests(archives, tmp_path):
+    archives.vendor()
+
+    with open(tmp_path / ChartArchives.LOCK_FILE) as f:
+        lock = json.load(f)
+    assert lock['grafana'] == {
+        **CHARTS['grafana'],
+        'digest': ChartArchives.digest(str(tmp_path / 'grafana-3.1.1.tgz')),
+    }
+    assert archives.chart_options({'chart': 'grafana', 'version': '3.1.1', 'repository': 'x', 'namespace': 'n'}) == \
+        {'chart': f'{ChartArchives.LAYER_PATH}/grafana-3.1.1.tgz', 'namespace': 'n'}
+
+
+def test_lock_entry_without_digest_is_refused(archives, tmp_path):
+    (tmp_path / ChartArchives.LOCK_FILE).write_text(json.dumps({'grafana': {**CHARTS['grafana'], 'digest': None}}))
+
+    with pytest.raises(ValueError, match='no digest'):
+        archives.archive_path('grafana', '3.1.1')
+
+
+def test_modified_archive_is_refused(archives, tmp_path):
+    archives.vendor()
+    (tmp_path / 'grafana-3.1.1.tgz').write_bytes(b'another archive')
+
+    with pytest.raises(ValueError, match="doesn't match"):
+        archives.archive_path('grafana', '3.1.1')
+    with pytest.raises(ValueError, match="doesn't match"):
+        ChartArchives({'directory': str(tmp_path)}).vendor()
+
+
+def test_unlisted_version_is_refused(archives):
+    archives.vendor()
+
+    with pytest.raises(ValueError, match='not in'):
+        archives.archive_path('grafana', '3.2.0')
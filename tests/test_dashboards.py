@@ -0,0 +1,96 @@
+import json
+
+import pytest
+import yaml
+
+from cdk_templates import kubernetes_manifest, helm_values
+
+# The `cdk_stacks.environment.vpc` package imports the CDK
+pytest.importorskip('aws_cdk.core')
+
+from cdk_stacks.environment.vpc.eks.eks_resources.grafana.dashboards import PlatformDashboards  # noqa: E402
+
+
+def panels():
+    return [(dashboard, panel) for dashboard in PlatformDashboards.all().values() for panel in dashboard['panels']]
+
+
+def test_dashboards_render():
+    dashboards = PlatformDashboards.all()
+
+    assert set(dashboards) == {
+        'platform-node-saturation.json',
+        'platform-autoscaler.json',
+        'platform-pod-start.json',
+        'platform-dns.json',
+        'platform-ingress.json',
+    }
+    for file_name, dashboard in dashboards.items():
+        assert file_name == f"{dashboard['uid']}.json"
+        assert json.loads(json.dumps(dashboard)) == dashboard
+        assert dashboard['version'] == PlatformDashboards.VERSION
+        assert dashboard['panels']
+
+
+def test_panels_wiring():
+    for dashboard, panel in panels():
+        assert panel['datasource'] in [PlatformDashboards.PROMETHEUS_DATASOURCE, PlatformDashboards.LOKI_DATASOURCE]
+        ref_ids = [target['refId'] for target in panel['targets']]
+        assert len(ref_ids) == len(set(ref_ids)), panel['title']
+        assert all(target['expr'] and target['legendFormat'] for target in panel['targets']), panel['title']
+
+
+def test_panels_layout():
+    for dashboard in PlatformDashboards.all().values():
+        cells = set()
+        for panel in dashboard['panels']:
+            position = panel['gridPos']
+            assert position['x'] + position['w'] <= 24, panel['title']
+            panel_cells = {
+                (x, y) for x in range(position['x'], position['x'] + position['w'])
+                for y in range(position['y'], position['y'] + position['h'])
+            }
+            assert not cells & panel_cells, f"{dashboard['title']}: {panel['title']} overlaps another panel"
+            cells |= panel_cells
+
+
+@pytest.mark.parametrize('change', [
+    lambda dashboard: dashboard.pop('uid'),
+    lambda dashboard: dashboard['panels'][0].update(datasource='Graphite'),
+    lambda dashboard: dashboard['panels'][0].update(targets=[]),
+    lambda dashboard: dashboard['panels'][0]['targets'][0].update(expr='sum(rate(up[5m])'),
+    lambda dashboard: dashboard['panels'][1].update(id=dashboard['panels'][0]['id']),
+])
+def test_validate_rejects_broken_dashboards(change):
+    dashboard = PlatformDashboards.node_saturation()
+    change(dashboard)
+
+    with pytest.raises(ValueError):
+        PlatformDashboards.validate(dashboard)
+
+
+def test_grafana_provisioning(synth):
+    from cdk_stacks.environment.vpc.eks.eks_resources.grafana import Grafana
+    from cdk_stacks.environment.vpc.eks.eks_resources.loki import Loki
+    from cdk_stacks.environment.vpc.eks.eks_resources.prometheus_operator import PrometheusOperator
+
+    template = next(stack.template for stack in synth().stacks if stack.stack_name == 'env-test-borg-EKS-monitoring')
+
+    secret = kubernetes_manifest(template, 'Secret', Grafana.DATASOURCES_SECRET)
+    datasources = {
+        datasource['name']: datasource
+        for datasource in yaml.safe_load(secret['stringData']['datasources.yaml'])['datasources']
+    }
+    assert datasources[PlatformDashboards.PROMETHEUS_DATASOURCE]['url'] == PrometheusOperator.prometheus_url()
+    assert datasources[PlatformDashboards.LOKI_DATASOURCE]['url'] == Loki.loki_url()
+    assert {panel['datasource'] for _, panel in panels()} <= set(datasources)
+
+    config_map = kubernetes_manifest(template, 'ConfigMap', Grafana.DASHBOARDS_CONFIG_MAP)
+    assert {file_name: json.loads(dashboard) for file_name, dashboard in config_map['data'].items()} == \
+        PlatformDashboards.all()
+
+    values = helm_values(template, 'grafana')
+    assert values['datasources']['secretName'] == Grafana.DATASOURCES_SECRET
+    assert {dashboard['configMapName'] for dashboard in values['dashboardsConfigMaps']} == \
+        {Grafana.DASHBOARDS_CONFIG_MAP}
+    assert [dashboard['fileName'] for dashboard in values['dashboardsConfigMaps']] == list(config_map['data'])
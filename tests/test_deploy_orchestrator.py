@@ -0,0 +1,165 @@
+import json
+import os
+import shutil
+import threading
+import time
+
+import pytest
+from conftest import FIXTURES_PATH
+
+from cdk_stacks.deploy_orchestrator import DeployBackend, DeployOrchestrator
+
+# Stacks and dependencies of the default configuration synth
+ASSEMBLY_PATH = os.path.join(FIXTURES_PATH, 'deploy_assembly')
+ISTIO_COMMAND = DeployOrchestrator.ISTIO_COMMAND.format(stack='env-test-borg-EKS')
+
+
+class RecordingBackend(DeployBackend):
+    """
+    Mocked backend recording when each step starts and finishes
+    """
+
+    def __init__(self, durations: dict = None, failing: str = None) -> None:
+        self.durations = durations or {}
+        self.failing = failing
+        self.events = []
+        self._lock = threading.Lock()
+
+    def deploy_stack(self, stack: str) -> None:
+        self._run(stack)
+
+    def run_command(self, command: str) -> None:
+        self._run(command)
+
+    def _run(self, name: str) -> None:
+        with self._lock:
+            self.events.append(('start', name))
+        time.sleep(self.durations.get(name, 0.05))
+        if name == self.failing:
+            raise RuntimeError(f"{name} failed")
+        with self._lock:
+            self.events.append(('finish', name))
+
+    def started(self, name: str) -> int:
+        return self.events.index(('start', name))
+
+    def finished(self, name: str) -> int:
+        return self.events.index(('finish', name))
+
+
+def test_backend_is_abstract():
+    class IncompleteBackend(DeployBackend):
+        def deploy_stack(self, stack: str) -> None:
+            pass
+
+    with pytest.raises(TypeError):
+        IncompleteBackend()
+
+
+def test_steps_from_the_assembly():
+    steps = DeployOrchestrator(ASSEMBLY_PATH, RecordingBackend()).steps()
+
+    assert set(steps) == {
+        'env-test-borg-VPC',
+        'env-test-borg-EKS',
+        'env-test-borg-EKS-base',
+        'env-test-borg-EKS-monitoring',
+        'env-test-borg-EKS-logging',
+        'env-test-borg-route53',
+        'env-test-borg-EKS-dns',
+        'istio-env-test-borg-EKS',
+    }
+    istio = steps[DeployOrchestrator.istio_step('env-test-borg-EKS')]
+    assert istio.dependencies == ['env-test-borg-EKS']
+    assert istio.command == ISTIO_COMMAND
+
+
+def test_serial_deploy_order():
+    backend = RecordingBackend()
+
+    DeployOrchestrator(ASSEMBLY_PATH, backend, concurrency=1).deploy()
+
+    order = [name for event, name in backend.events if event == 'start']
+    assert order.index('env-test-borg-EKS') > order.index('env-test-borg-VPC')
+    assert order.index('env-test-borg-EKS-dns') > order.index('env-test-borg-route53')
+    assert order.index('env-test-borg-EKS-dns') > order.index('env-test-borg-EKS-monitoring')
+    # Same order of `make deploy-cdk deploy-apps`: Istio once all the stacks are deployed
+    assert order[-1] == ISTIO_COMMAND
+
+
+def test_parallel_deploy_order():
+    backend = RecordingBackend(durations={
+        'env-test-borg-EKS': 0.2,
+        'env-test-borg-EKS-monitoring': 0.3,
+        ISTIO_COMMAND: 0.8,
+    })
+
+    steps = DeployOrchestrator(ASSEMBLY_PATH, backend, concurrency=4).deploy()
+
+    assert len(steps) == 8
+    assert all(step.started_at <= step.finished_at for step in steps)
+    # Independent stacks run at the same time
+    assert backend.started('env-test-borg-route53') < backend.finished('env-test-borg-EKS')
+    assert backend.started('env-test-borg-EKS') > backend.finished('env-test-borg-VPC')
+    assert backend.started('env-test-borg-EKS-dns') > max(
+        backend.finished('env-test-borg-route53'),
+        backend.finished('env-test-borg-EKS'),
+        backend.finished('env-test-borg-EKS-monitoring'),
+    )
+    # Istio starts with the cluster, without waiting for the add-ons stacks, and is the last step to complete
+    assert backend.started(ISTIO_COMMAND) > backend.finished('env-test-borg-EKS')
+    assert backend.started(ISTIO_COMMAND) < backend.finished('env-test-borg-EKS-monitoring')
+    assert backend.events[-1] == ('finish', ISTIO_COMMAND)
+
+
+def test_failure_stops_the_deploy():
+    backend = RecordingBackend(failing='env-test-borg-EKS')
+
+    with pytest.raises(RuntimeError):
+        DeployOrchestrator(ASSEMBLY_PATH, backend, concurrency=4).deploy()
+
+    started = {name for event, name in backend.events if event == 'start'}
+    assert 'env-test-borg-EKS-monitoring' not in started
+    assert ISTIO_COMMAND not in started
+
+
+def test_istio_in_every_target_cluster(tmp_path):
+    # Same assembly with an `us` target, whose stacks are copies of the default ones
+    assembly_path = tmp_path / 'cdk.out'
+    shutil.copytree(ASSEMBLY_PATH, assembly_path)
+    with open(assembly_path / 'manifest.json') as f:
+        manifest = json.load(f)
+    for name, artifact in list(manifest['artifacts'].items()):
+        if artifact['type'] == 'aws:cloudformation:stack':
+            target_name = name.replace('env-test-borg-', 'env-test-borg-us-')
+            shutil.copy(assembly_path / f'{name}.template.json', assembly_path / f'{target_name}.template.json')
+            manifest['artifacts'][target_name] = {
+                **artifact,
+                'environment': 'aws://360064003702/us-east-1',
+                'properties': {'templateFile': f'{target_name}.template.json'},
+                'dependencies': [
+                    dependency.replace('env-test-borg-', 'env-test-borg-us-')
+                    for dependency in artifact.get('dependencies', [])
+                ],
+            }
+    (assembly_path / 'manifest.json').write_text(json.dumps(manifest))
+    backend = RecordingBackend(durations={'env-test-borg-EKS': 0.3})
+
+    steps = {step.name: step for step in DeployOrchestrator(str(assembly_path), backend, concurrency=8).deploy()}
+
+    assert len(steps) == 16
+    us_istio_command = DeployOrchestrator.ISTIO_COMMAND.format(stack='env-test-borg-us-EKS')
+    assert steps[DeployOrchestrator.istio_step('env-test-borg-us-EKS')].command == us_istio_command
+    assert steps[DeployOrchestrator.istio_step('env-test-borg-us-EKS')].dependencies == ['env-test-borg-us-EKS']
+    # Every cluster gets Istio once deployed, without waiting for the other targets
+    assert backend.started(us_istio_command) > backend.finished('env-test-borg-us-EKS')
+    assert backend.started(us_istio_command) < backend.finished('env-test-borg-EKS')
+    assert backend.started(ISTIO_COMMAND) > backend.finished('env-test-borg-EKS')
+
+
+def test_dependency_cycles_are_rejected():
+    steps = DeployOrchestrator(ASSEMBLY_PATH, RecordingBackend()).steps()
+    steps['env-test-borg-VPC'].dependencies = ['env-test-borg-EKS']
+
+    with pytest.raises(ValueError):
+        DeployOrchestrator._validate(steps)
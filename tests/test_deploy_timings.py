@@ -0,0 +1,100 @@
+import os
+import subprocess
+
+from conftest import FIXTURES_PATH
+
+from cdk_stacks.deploy_timings import StackEvents, DeployTimingsStore
+
+STACK_NAME = 'env-test-borg-EKS'
+# `aws cloudformation describe-stack-events` output of a stack creation and update, with events recorded twice
+EVENTS_FILE = os.path.join(FIXTURES_PATH, 'stack_events', f'{STACK_NAME}.json')
+
+
+def durations(timings: list) -> dict:
+    return {timing['logical_id']: timing['duration'] for timing in timings}
+
+
+def previous_timings(started_at: str, cluster: float, fleet: float, barrier: float) -> list:
+    return [
+        {
+            'stack': STACK_NAME,
+            'logical_id': logical_id,
+            'resource_type': resource_type,
+            'operation': 'UPDATE',
+            'status': 'UPDATE_COMPLETE',
+            'started_at': started_at,
+            'duration': duration,
+        }
+        for logical_id, resource_type, duration in [
+            ('EKSClusterE11008B6', 'Custom::AWSCDK-EKS-Cluster', cluster),
+            ('EKSBaseFleetASG6B3D5A1C', 'AWS::AutoScaling::AutoScalingGroup', fleet),
+            ('EKSKubectlReadyBarrier7547948A', 'AWS::SSM::Parameter', barrier),
+        ]
+    ]
+
+
+def test_resource_timings_of_the_last_operation():
+    timings = StackEvents.from_file(STACK_NAME, EVENTS_FILE).resource_timings()
+
+    # Once per resource even with duplicated events, the stack creation is not taken into account
+    assert durations(timings) == {
+        'EKSClusterE11008B6': 720,
+        'EKSNodesIngressFromPodsA4F1B2C3': 2,
+        'EKSBaseFleetASG6B3D5A1C': 400,
+        'EKSKubectlReadyBarrier7547948A': 35,
+        STACK_NAME: 1205,
+    }
+    cluster = next(timing for timing in timings if timing['logical_id'] == 'EKSClusterE11008B6')
+    assert cluster == {
+        'stack': STACK_NAME,
+        'logical_id': 'EKSClusterE11008B6',
+        'resource_type': 'Custom::AWSCDK-EKS-Cluster',
+        'operation': 'UPDATE',
+        'status': 'UPDATE_COMPLETE',
+        'started_at': '2026-10-12T10:00:20+00:00',
+        'duration': 720,
+    }
+
+
+def test_recording_twice_stores_nothing(tmp_path):
+    store = DeployTimingsStore(str(tmp_path / 'deploy-timings.sqlite'))
+    timings = StackEvents.from_file(STACK_NAME, EVENTS_FILE).resource_timings()
+
+    assert store.record('env-test', 'b' * 40, timings) == 5
+    assert store.record('env-test', 'b' * 40, timings) == 0
+    assert [timing['logical_id'] for timing in store.slowest('env-test', limit=2)] == \
+        ['EKSClusterE11008B6', 'EKSBaseFleetASG6B3D5A1C']
+
+
+def test_regressions(tmp_path):
+    store = DeployTimingsStore(str(tmp_path / 'deploy-timings.sqlite'))
+    store.record('env-test', 'a' * 40, previous_timings('2026-10-08T10:00:00+00:00', 600, 200, 10))
+    store.record('env-test', 'a' * 40, previous_timings('2026-10-09T10:00:00+00:00', 620, 210, 12))
+    store.record('env-test', 'a' * 40, previous_timings('2026-10-10T10:00:00+00:00', 580, 190, 9))
+    store.record('env-test', 'b' * 40, StackEvents.from_file(STACK_NAME, EVENTS_FILE).resource_timings())
+
+    regressions = store.regressions('env-test', ratio=1.5, min_delta=30)
+
+    # The cluster is not slow enough (1.2x), the barrier is slower by less than `min_delta` (+25s) and the
+    # security group ingress has no history
+    assert [(regression['logical_id'], regression['median']) for regression in regressions] == \
+        [('EKSBaseFleetASG6B3D5A1C', 200)]
+    assert regressions[0]['git_sha'] == 'b' * 40
+    assert durations(store.regressions('env-test', ratio=1.1, min_delta=30)) == \
+        {'EKSClusterE11008B6': 720, 'EKSBaseFleetASG6B3D5A1C': 400}
+
+
+def test_events_of_another_region(monkeypatch):
+    calls = []
+
+    def run(command, **kwargs):
+        calls.append(command)
+        with open(EVENTS_FILE, 'rb') as f:
+            return subprocess.CompletedProcess(command, 0, stdout=f.read())
+
+    monkeypatch.setattr(subprocess, 'run', run)
+
+    events = StackEvents.from_aws('env-test-borg-us-EKS', region='us-east-1')
+
+    assert calls[0][-2:] == ['--region', 'us-east-1']
+    assert len(events.events) == 20
@@ -0,0 +1,39 @@
+import json
+
+import pytest
+
+pytest.importorskip('aws_cdk.core')
+
+
+def chart_values(assembly, release: str) -> str:
+    # The values reference the zone and the cluster name, they are a CloudFormation join
+    template = next(stack.template for stack in assembly.stacks if stack.stack_name == 'env-test-borg-EKS-dns')
+    return next(
+        json.dumps(resource['Properties']['Values']) for resource in template['Resources'].values()
+        if resource['Type'] == 'Custom::AWSCDK-EKS-HelmChart' and resource['Properties']['Release'] == release
+    )
+
+
+def test_default_args_are_known_by_the_chart_release(synth):
+    values = chart_values(synth(), 'ext-dns-public')
+
+    assert 'aws-batch-change-size' in values
+    assert 'aws-zones-cache-duration' not in values
+    assert 'min-event-sync-interval' not in values
+
+
+def test_newer_release_args_with_an_image_tag(synth):
+    values = chart_values(synth({'dns': {'externalDns': {
+        'imageTag': '0.7.6',
+        'zonesCacheDuration': '1h',
+        'minEventSyncInterval': '30s',
+    }}}), 'ext-dns-public')
+
+    assert json.dumps('"image":{"tag":"0.7.6"}')[1:-1] in values
+    assert json.dumps('"aws-zones-cache-duration":"1h"')[1:-1] in values
+    assert json.dumps('"min-event-sync-interval":"30s"')[1:-1] in values
+
+
+def test_newer_release_args_need_an_image_tag(synth):
+    with pytest.raises(ValueError, match='zonesCacheDuration'):
+        synth({'dns': {'externalDns': {'zonesCacheDuration': '1h'}}})
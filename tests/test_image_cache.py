@@ -0,0 +1,69 @@
+import copy
+
+import pytest
+
+pytest.importorskip('aws_cdk.core')
+
+from cdk_stacks.environment.vpc.eks.image_cache import ImageCache  # noqa: E402
+
+CONFIG = {
+    'enabled': True,
+    'upstreamRegistries': {
+        'docker.io': {
+            'prefix': 'docker-hub',
+            'upstreamRegistryUrl': 'registry-1.docker.io',
+            'credentialArn': 'arn:aws:secretsmanager:eu-west-1:123456789012:secret:ecr-pullthroughcache/docker-hub',
+        },
+        'quay.io': {'prefix': 'quay', 'upstreamRegistryUrl': 'quay.io'},
+    },
+}
+
+
+def test_repository_prefix_fitting_ecr_limit():
+    assert ImageCache.repository_prefix('env-test-borg-cache', 'docker-hub') == 'env-test-borg-cache-docker-hub'
+
+
+def test_long_repository_prefix_is_hashed():
+    staging = ImageCache.repository_prefix('env-staging-borg-cache', 'docker-hub')
+    production = ImageCache.repository_prefix('env-production-borg-cache', 'docker-hub')
+
+    assert len(staging) <= ImageCache.REPOSITORY_PREFIX_MAX_LENGTH
+    assert staging.endswith('-docker-hub')
+    assert staging != production
+    assert staging == ImageCache.repository_prefix('env-staging-borg-cache', 'docker-hub')
+
+
+@pytest.mark.parametrize('rule_prefix', ['a-very-long-upstream-registry', 'Docker_Hub!', 'docker-'])
+def test_invalid_repository_prefix(rule_prefix):
+    with pytest.raises(ValueError):
+        ImageCache.repository_prefix('env-test-borg-cache', rule_prefix)
+
+
+def test_images_served_by_the_cache():
+    image_cache = ImageCache(CONFIG, prefix='env-staging-borg-cache', account='123456789012', region='eu-west-1')
+    docker_hub = ImageCache.repository_prefix('env-staging-borg-cache', 'docker-hub')
+
+    assert image_cache.repository('nginx') == \
+        f'123456789012.dkr.ecr.eu-west-1.amazonaws.com/{docker_hub}/library/nginx'
+    assert image_cache.repository('quay.io/jetstack/cert-manager-controller') == \
+        '123456789012.dkr.ecr.eu-west-1.amazonaws.com/env-staging-borg-cache-quay/jetstack/cert-manager-controller'
+    assert image_cache.repository('gcr.io/google-containers/pause') == 'gcr.io/google-containers/pause'
+
+
+def test_docker_hub_rule_needs_credentials():
+    config = copy.deepcopy(CONFIG)
+    del config['upstreamRegistries']['docker.io']['credentialArn']
+
+    with pytest.raises(ValueError, match='credentialArn'):
+        ImageCache(config, prefix='env-test-borg-cache', account='123456789012', region='eu-west-1')
+    # Only checked when the cache is enabled
+    ImageCache({**config, 'enabled': False}, prefix='env-test-borg-cache', account='123456789012', region='eu-west-1')
+
+
+def test_default_registries_synth(synth):
+    template = next(stack.template for stack in synth({'eks': {'imageCache': {'enabled': True}}}).stacks
+                    if stack.stack_name == 'env-test-borg-EKS')
+
+    rules = [resource['Properties'] for resource in template['Resources'].values()
+             if resource['Type'] == 'AWS::ECR::PullThroughCacheRule']
+    assert sorted(rule['UpstreamRegistryUrl'] for rule in rules) == ['quay.io', 'registry.k8s.io']
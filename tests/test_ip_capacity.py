@@ -0,0 +1,104 @@
+import copy
+import json
+import os
+
+import pytest
+import yaml
+
+# The `cdk_stacks.environment.vpc` package imports the CDK
+pytest.importorskip('aws_cdk.core')
+
+from apps.abstract.base_app import BaseApp  # noqa: E402
+from cdk_stacks.environment.vpc.ip_capacity import IpCapacityPlanner  # noqa: E402
+
+with open(os.path.join(BaseApp._default_config_path, 'env.yaml')) as f:
+    DEFAULT_CONFIG = yaml.load(f, Loader=yaml.FullLoader)
+
+
+def environment_config(cni: dict = None, fleets: list = None, private_suffix: int = 19) -> dict:
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    config['vpc']['subnetsCIDRSuffixes']['private'] = private_suffix
+    config['eks']['cni'] = {'reservedIpsPerSubnet': 16, 'minimumHeadroom': 0.1, **(cni or {})}
+    config['eks']['workerNodesFleets'] = fleets or [
+        {'name': 'BaseFleet', 'instanceType': 't3a.medium', 'autoscaling': {'maxInstances': 10}},
+    ]
+    return config
+
+
+@pytest.mark.parametrize('cni, node_ips', [
+    # 3 ENIs of 6 IPs: 15 pods fill them, the warm ENI can't be attached
+    ({'warmEniTarget': 1}, 18),
+    ({'warmEniTarget': 1, 'podsPerNode': 4}, 12),
+    ({'warmEniTarget': 0, 'podsPerNode': 4}, 6),
+    # Secondary IPs of the pods and the warm pool, plus the primary IPs of the 2 ENIs holding them
+    ({'warmIpTarget': 2, 'podsPerNode': 4}, 8),
+    ({'minimumIpTarget': 10, 'podsPerNode': 4}, 12),
+    ({'warmIpTarget': 30}, 18),
+])
+def test_node_ips_with_warm_pool_settings(cni, node_ips):
+    assert IpCapacityPlanner(environment_config(cni)).node_ips('t3a.medium') == node_ips
+
+
+def test_headroom():
+    plan = IpCapacityPlanner(environment_config({'warmEniTarget': 1})).plan()
+
+    # A private /19 per AZ, 10 nodes of 18 IPs plus the reserved ones
+    assert len(plan) == 3
+    for subnet in plan:
+        assert subnet['usable'] == 8192 - 5
+        assert subnet['max_nodes'] == 10
+        assert subnet['demand'] == 10 * 18 + 16
+        assert subnet['headroom'] == pytest.approx((8187 - 196) / 8187)
+
+
+def test_fleets_demand_with_several_instance_types():
+    plan = IpCapacityPlanner(environment_config(fleets=[
+        {'name': 'Spot', 'instanceTypes': ['t3a.medium', 'm5d.large'], 'autoscaling': {'maxInstances': 4}},
+        {'name': 'Base', 'instanceType': 't3a.large', 'autoscaling': {'maxInstances': 2}},
+    ])).plan()
+
+    # The largest instance type of each fleet: m5d.large (3 ENIs of 10 IPs) and t3a.large (3 ENIs of 12 IPs)
+    assert plan[0]['demand'] == 4 * 30 + 2 * 36 + 16
+    assert plan[0]['max_nodes'] == 6
+
+
+def test_validate_fails_without_headroom():
+    planner = IpCapacityPlanner(environment_config(private_suffix=24))
+    planner.validate()
+
+    with pytest.raises(ValueError, match='headroom'):
+        IpCapacityPlanner(environment_config({'minimumHeadroom': 0.5}, private_suffix=24)).validate()
+    with pytest.raises(ValueError, match='needs 196 IPs'):
+        IpCapacityPlanner(environment_config(private_suffix=26)).validate()
+
+
+def test_unknown_instance_types_are_left_out():
+    planner = IpCapacityPlanner(environment_config(private_suffix=26, fleets=[
+        {'name': 'Memory', 'instanceType': 'x2gd.large', 'autoscaling': {'maxInstances': 50}},
+        {'name': 'Base', 'instanceType': 't3a.medium', 'autoscaling': {'maxInstances': 2}},
+    ]))
+
+    assert planner.unknown_instance_types() == ['x2gd.large']
+    assert planner.plan()[0]['demand'] == 2 * 18 + 16
+    planner.validate()
+    with pytest.raises(ValueError, match='x2gd.large'):
+        planner.node_ips('x2gd.large')
+
+
+def test_configured_instance_limits():
+    planner = IpCapacityPlanner(environment_config({'instanceLimits': {'x2gd.large': {'enis': 3, 'ipsPerEni': 10}}}))
+
+    assert not planner.unknown_instance_types()
+    assert planner.node_ips('x2gd.large') == 30
+
+
+def test_unknown_instance_type_synth_warning(synth):
+    assembly = synth({'eks': {'workerNodesFleets': [
+        {**DEFAULT_CONFIG['eks']['workerNodesFleets'][0], 'instanceType': 'x2gd.large'},
+    ]}})
+
+    with open(os.path.join(assembly.directory, 'manifest.json')) as f:
+        metadata = json.load(f)['artifacts']['env-test-borg-VPC'].get('metadata', {})
+    warnings = [entry['data'] for entries in metadata.values() for entry in entries
+                if entry['type'] == 'aws:cdk:warning']
+    assert any('`x2gd.large`' in warning for warning in warnings)
@@ -0,0 +1,101 @@
+import json
+import os
+
+import pytest
+import yaml
+
+pytest.importorskip('aws_cdk.core')
+
+from apps.abstract.base_app import BaseApp  # noqa: E402
+from apps.platform import Platform  # noqa: E402
+from cdk_stacks.environment.vpc.lookup_context import LookupContext  # noqa: E402
+
+ACCOUNT = '360064003702'
+REGION = 'eu-west-1'
+
+SELECTED_VPC_CONFIG = {
+    'vpc': {'enabled': False},
+    'vpcSelectionFilter': {'enabled': True, 'vpcName': 'platform-vpc', 'tags': {'team': 'platform'}},
+}
+
+
+def missing_context(assembly) -> set:
+    """
+    Keys of the lookups the CDK CLI would have to do
+    """
+    with open(os.path.join(assembly.directory, 'manifest.json')) as f:
+        return {entry.get('key') for entry in json.load(f).get('missing', [])}
+
+
+def subnet_ids(assembly) -> set:
+    """
+    Subnets ids referenced by the templates
+    """
+    return {
+        value for stack in assembly.stacks
+        for value in json.dumps(stack.template).replace('"', ' ').split()
+        if value.startswith('subnet-')
+    }
+
+
+def test_lookups_are_reported_missing_with_the_same_keys(synth, monkeypatch):
+    monkeypatch.delenv('CDK_LOOKUP_PROVIDER', raising=False)
+
+    missing = missing_context(synth(SELECTED_VPC_CONFIG))
+
+    lookup_context = LookupContext(ACCOUNT, REGION)
+    assert lookup_context.vpc_key(SELECTED_VPC_CONFIG['vpcSelectionFilter']) in missing
+
+
+def test_stand_in_provider_synth(synth, monkeypatch):
+    monkeypatch.setenv('CDK_LOOKUP_PROVIDER', LookupContext.STAND_IN_PROVIDER)
+
+    assembly = synth(SELECTED_VPC_CONFIG)
+
+    assert not missing_context(assembly)
+    # Public, private and isolated tiers in 3 AZs: the cluster runs in the private ones
+    assert subnet_ids(assembly) == {f'subnet-{counter:017x}' for counter in range(3, 6)}
+
+
+def test_context_file_synth(synth, monkeypatch, tmp_path):
+    monkeypatch.delenv('CDK_LOOKUP_PROVIDER', raising=False)
+    with open(os.path.join(BaseApp._default_config_path, 'env.yaml')) as f:
+        environment_config = yaml.load(f, Loader=yaml.FullLoader)
+    environment_config['vpcSelectionFilter'] = {
+        **SELECTED_VPC_CONFIG['vpcSelectionFilter'],
+        'standIn': {'vpcId': 'vpc-0123456789abcdef0', 'cidr': '10.8.0.0/16', 'availabilityZones': ['eu-west-1a']},
+    }
+    context_file = tmp_path / 'cdk.context.json'
+    context_file.write_text(json.dumps(LookupContext(ACCOUNT, REGION).stand_in(environment_config)))
+    monkeypatch.setattr(Platform, '_lookup_context_path', str(context_file))
+
+    assembly = synth(SELECTED_VPC_CONFIG)
+
+    assert not missing_context(assembly)
+    assert subnet_ids(assembly) == {'subnet-00000000000000001'}
+    assert 'vpc-0123456789abcdef0' in json.dumps([stack.template for stack in assembly.stacks])
+
+
+@pytest.mark.parametrize('value, quoted', [
+    ('platform-vpc', 'platform-vpc'),
+    ('a:b:c', 'a$:b:c'),
+    ('$a$', '$$a$'),
+])
+def test_key_quoting(value, quoted):
+    assert LookupContext(ACCOUNT, REGION).vpc_key({'vpcName': value}) == \
+        f'vpc-provider:account={ACCOUNT}:filter.tag:Name={quoted}:region={REGION}:returnAsymmetricSubnets=true'
+
+
+def vpc_endpoints(assembly) -> list:
+    return [
+        resource for stack in assembly.stacks for resource in stack.template.get('Resources', {}).values()
+        if resource['Type'] == 'AWS::EC2::VPCEndpoint'
+    ]
+
+
+def test_no_endpoints_in_selected_vpcs(synth, monkeypatch):
+    monkeypatch.setenv('CDK_LOOKUP_PROVIDER', LookupContext.STAND_IN_PROVIDER)
+
+    assert vpc_endpoints(synth())
+    # The default `vpc.endpoints` would add an S3 gateway endpoint to the route tables of the selected VPC
+    assert not vpc_endpoints(synth(SELECTED_VPC_CONFIG))
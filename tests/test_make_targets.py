@@ -0,0 +1,32 @@
+import os
+import re
+import shlex
+
+import pytest
+
+ROOT_PATH = os.path.join(os.path.dirname(__file__), '..')
+
+
+def pipfile_scripts() -> dict:
+    """
+    The Pipfile `[scripts]` section, scripts are single line strings
+    """
+    with open(os.path.join(ROOT_PATH, 'Pipfile')) as f:
+        section = re.search(r'^\[scripts\]\n(.*?)(?=^\[|\Z)', f.read(), re.MULTILINE | re.DOTALL).group(1)
+
+    return dict(re.findall(r'^([\w-]+)\s*=\s*"(.*)"\s*$', section, re.MULTILINE))
+
+
+def make_pipenv_scripts() -> list:
+    with open(os.path.join(ROOT_PATH, 'Makefile')) as f:
+        return sorted(set(re.findall(r'pipenv run ([\w-]+)', f.read())))
+
+
+@pytest.mark.parametrize('script', make_pipenv_scripts())
+def test_make_targets_scripts_are_registered(script):
+    scripts = pipfile_scripts()
+
+    assert script in scripts, f"`pipenv run {script}` is used by the Makefile, add it to the Pipfile `[scripts]`"
+    command = shlex.split(scripts[script])
+    if command[0] == 'python3' and command[1].endswith('.py'):
+        assert os.path.isfile(os.path.join(ROOT_PATH, command[1])), scripts[script]
@@ -0,0 +1,97 @@
+import copy
+import os
+
+import pytest
+import yaml
+
+# The `cdk_stacks.environment.vpc` package imports the CDK
+pytest.importorskip('aws_cdk.core')
+
+from apps.abstract.base_app import BaseApp  # noqa: E402
+from cdk_stacks.environment.vpc.eks.eks_resources.external_secrets.sync_planner import \
+    SecretSyncPlanner, StandInBackend  # noqa: E402
+
+with open(os.path.join(BaseApp._default_config_path, 'env.yaml')) as f:
+    DEFAULT_CONFIG = yaml.load(f, Loader=yaml.FullLoader)['eks']['externalSecrets']
+
+
+def external_secrets_config(secrets_manager: dict = None, **settings) -> dict:
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    config['backends']['secretsManager'].update(secrets_manager or {})
+    config.update(settings)
+    return config
+
+
+def backend_report(planner: SecretSyncPlanner, backend_name: str) -> dict:
+    return next(backend for backend in planner.plan() if backend['backend'] == backend_name)
+
+
+def test_token_bucket_throttling():
+    backend = StandInBackend(rate_limit=1, burst=2)
+
+    # The burst is served at once, then a request per second
+    assert [backend.get_secret_value(0) for _ in range(3)] == [True, True, False]
+    assert backend.get_secret_value(1)
+    assert not backend.get_secret_value(1.5)
+    assert backend.get_secret_value(2.5)
+    # The bucket never holds more than the burst
+    assert [backend.get_secret_value(100) for _ in range(3)] == [True, True, False]
+    assert (backend.requests, backend.throttled) == (9, 3)
+
+
+def test_sync_gap_without_throttling():
+    report = backend_report(SecretSyncPlanner(external_secrets_config()), 'secretsManager')
+
+    # 20 secrets polled every 600s over the 5400s simulation
+    assert report['keys'] == 20
+    assert report['average_rate'] == pytest.approx(20 / 600)
+    assert report['requests'] == 20 * 9
+    assert report['throttled'] == 0
+    assert report['max_sync_gap'] == 600
+
+
+def test_sync_gap_with_throttling():
+    throttled = SecretSyncPlanner(external_secrets_config({'externalSecrets': 100, 'rateLimit': 1, 'burst': 10}))
+    report = backend_report(throttled, 'secretsManager')
+
+    # Pollers starting together exhaust the burst at every interval, the SDK retries don't wait for enough tokens:
+    # the same secrets are throttled every time and never get synced
+    assert report['throttled'] > 0
+    assert report['max_sync_gap'] == throttled.simulation_seconds()
+    with pytest.raises(ValueError, match='secretsManager secrets'):
+        throttled.validate()
+
+    # Pollers spread over an interval stay within the rate limit
+    spread = SecretSyncPlanner(external_secrets_config(
+        {'externalSecrets': 100, 'rateLimit': 1, 'burst': 10}, startupSpreadSeconds=600,
+    ))
+    assert backend_report(spread, 'secretsManager')['throttled'] == 0
+    spread.validate()
+
+
+def test_validate_fails_above_the_maximum_sync_delay():
+    SecretSyncPlanner(external_secrets_config()).validate()
+
+    with pytest.raises(ValueError, match='up to 600s'):
+        SecretSyncPlanner(external_secrets_config(maxSyncDelaySeconds=300)).validate()
+
+
+@pytest.mark.parametrize('config', [
+    external_secrets_config(pollerIntervalSeconds=0),
+    external_secrets_config(pollerIntervalSeconds=-60),
+    external_secrets_config(maxSyncDelaySeconds=0),
+    external_secrets_config({'rateLimit': 0}),
+    external_secrets_config({'burst': None}),
+])
+def test_invalid_settings(config):
+    with pytest.raises(ValueError, match='must be positive'):
+        SecretSyncPlanner(config)
+
+
+def test_backend_without_secrets_needs_no_rate_limit():
+    SecretSyncPlanner(external_secrets_config({'externalSecrets': 0, 'rateLimit': 0})).validate()
+
+
+def test_synth_fails_with_a_zero_poller_interval(synth):
+    with pytest.raises(ValueError, match='pollerIntervalSeconds'):
+        synth({'eks': {'externalSecrets': {'pollerIntervalSeconds': 0}}})
@@ -0,0 +1,74 @@
+import json
+import os
+
+import pytest
+
+pytest.importorskip('aws_cdk.core')
+
+from cdk_stacks.environment.vpc.lookup_context import LookupContext  # noqa: E402
+
+TARGETS_CONFIG = {
+    'targets': [
+        {'name': 'us', 'region': 'us-east-1', 'config': {'vpc': {'cidr': '10.1.0.0/16'}}},
+        {'name': 'ops', 'account': '123456789012'},
+    ],
+}
+
+
+def stacks(assembly) -> dict:
+    return {stack.stack_name: stack for stack in assembly.stacks}
+
+
+def resources(template: dict, resource_type: str) -> list:
+    return [resource for resource in template['Resources'].values() if resource['Type'] == resource_type]
+
+
+def test_targets_synth(synth, monkeypatch):
+    monkeypatch.setenv('CDK_LOOKUP_PROVIDER', LookupContext.STAND_IN_PROVIDER)
+
+    assembly = synth(TARGETS_CONFIG)
+
+    with open(os.path.join(assembly.directory, 'manifest.json')) as f:
+        manifest = json.load(f)
+    assert not manifest.get('missing')
+    synthesized = stacks(assembly)
+    for prefix, environment in [
+        ('env-test-borg', 'aws://360064003702/eu-west-1'),
+        ('env-test-borg-us', 'aws://360064003702/us-east-1'),
+        ('env-test-borg-ops', 'aws://123456789012/eu-west-1'),
+    ]:
+        for group in ['VPC', 'EKS', 'EKS-base', 'EKS-monitoring', 'EKS-logging', 'route53', 'EKS-dns']:
+            assert manifest['artifacts'][f'{prefix}-{group}']['environment'] == environment
+        assert manifest['artifacts'][f'{prefix}-EKS']['dependencies'] == [f'{prefix}-VPC']
+
+    us_subnets = resources(synthesized['env-test-borg-us-VPC'].template, 'AWS::EC2::Subnet')
+    assert {subnet['Properties']['AvailabilityZone'] for subnet in us_subnets} == \
+        {'us-east-1a', 'us-east-1b', 'us-east-1c'}
+    assert all(subnet['Properties']['CidrBlock'].startswith('10.1.') for subnet in us_subnets)
+
+
+def test_targets_zones(synth, monkeypatch):
+    monkeypatch.setenv('CDK_LOOKUP_PROVIDER', LookupContext.STAND_IN_PROVIDER)
+
+    synthesized = stacks(synth(TARGETS_CONFIG))
+
+    zones = {
+        name: sorted(zone['Properties']['Name'] for zone in resources(stack.template, 'AWS::Route53::HostedZone'))
+        for name, stack in synthesized.items() if name.endswith('-route53')
+    }
+    assert zones == {
+        'env-test-borg-route53': ['env-test.borg.test.com.', 'env-test.borg.test.com.'],
+        'env-test-borg-us-route53': ['us.env-test.borg.test.com.', 'us.env-test.borg.test.com.'],
+        'env-test-borg-ops-route53': ['ops.env-test.borg.test.com.', 'ops.env-test.borg.test.com.'],
+    }
+
+
+@pytest.mark.parametrize('targets', [
+    [{'region': 'us-east-1'}],
+    [{'name': 'us', 'region': 'us-east-1'}, {'name': 'us', 'region': 'us-west-2'}],
+])
+def test_invalid_targets(synth, monkeypatch, targets):
+    monkeypatch.setenv('CDK_LOOKUP_PROVIDER', LookupContext.STAND_IN_PROVIDER)
+
+    with pytest.raises(ValueError):
+        synth({'targets': targets})
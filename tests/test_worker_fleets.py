@@ -0,0 +1,33 @@
+import pytest
+
+pytest.importorskip('aws_cdk.core')
+
+
+def fleet(**settings) -> dict:
+    return {
+        'name': 'BaseFleet',
+        'type': 'managed',
+        'instanceType': 't3a.medium',
+        'rootVolume': {'sizeGiB': 50, 'type': 'gp3', 'iops': 3000, 'throughputMiBps': 125},
+        'autoscaling': {'minInstances': 1, 'maxInstances': 10},
+        **settings,
+    }
+
+
+def test_managed_fleet_launch_template(synth):
+    template = next(stack.template for stack in synth({'eks': {'workerNodesFleets': [fleet()]}}).stacks
+                    if stack.stack_name == 'env-test-borg-EKS')
+
+    launch_templates = [resource for resource in template['Resources'].values()
+                        if resource['Type'] == 'AWS::EC2::LaunchTemplate']
+    assert len(launch_templates) == 1
+    assert 'ImageId' not in launch_templates[0]['Properties']['LaunchTemplateData']
+    assert len([resource for resource in template['Resources'].values()
+                if resource['Type'] == 'AWS::EKS::Nodegroup']) == 3
+
+
+def test_managed_fleet_rejects_baked_ami(synth):
+    baked_ami = {'enabled': True, 'amiId': 'ami-0123456789abcdef0'}
+
+    with pytest.raises(ValueError, match='`bakedAmi` is only supported by ASG fleets'):
+        synth({'eks': {'workerNodesFleets': [fleet(bakedAmi=baked_ami)]}})